@@ -105,7 +105,7 @@ def get_image_pairs():
     theta_values = set()
 
     # pattern matching
-    pattern = r'theta_(\d+_\d+)_roughness_(\d+_\d+)_left_eye\.png'
+    pattern = r'theta_(-?\d+_\d+)_roughness_(\d+_\d+)_left_eye\.png'
 
     for filename in image_files:
         match = re.match(pattern, filename)
@@ -0,0 +1,85 @@
+import csv
+import importlib.util
+import os
+import time
+
+import numpy as np
+from psychopy import visual, core
+from pyglet.gl import glFinish, glDeleteLists
+
+# Frame times of GlossyGround / Microfacet ground with the floor re-emitted every frame (baseline)
+# vs. compiled once into a display list, results printed and saved to static_floor_benchmark.csv
+
+scene_files = ['GlossyGround.py', 'Microfacet ground.py']
+warmup_frames = 10
+timed_frames = 200
+results_file = 'static_floor_benchmark.csv'
+
+
+def load_scene_class(filename):
+    # file names with spaces cannot be imported normally
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(filename)[0].replace(' ', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SpecularStreakScene
+
+
+def time_frames(scene, frames):
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        scene.render_frame()
+        glFinish()  # wait for the GPU so the draw is counted, no flip so vsync does not cap it
+        times.append(time.perf_counter() - start)
+    return np.array(times)
+
+
+def run_benchmark():
+    win = None
+    rows = []
+    try:
+        win = visual.Window(size=[1024, 768], units='pix', fullscr=False, allowGUI=True, winType='pyglet',
+                            color=[0, 0, 0], colorSpace='rgb', waitBlanking=False)
+
+        for filename in scene_files:
+            scene = load_scene_class(filename)(win)
+            for mode, use_display_list in [('immediate (baseline)', False), ('display list', True)]:
+                scene.use_display_list = use_display_list
+                scene.floor_dirty = True
+                time_frames(scene, warmup_frames)
+                times = 1000 * time_frames(scene, timed_frames)
+                row = {
+                    'scene': filename,
+                    'mode': mode,
+                    'frames': timed_frames,
+                    'mean_ms': round(float(np.mean(times)), 3),
+                    'median_ms': round(float(np.median(times)), 3),
+                    'p95_ms': round(float(np.percentile(times, 95)), 3),
+                    'max_ms': round(float(np.max(times)), 3),
+                }
+                rows.append(row)
+                print(f"{filename:24s} {mode:22s} mean {row['mean_ms']:8.3f} ms  median {row['median_ms']:8.3f} ms  "
+                      f"p95 {row['p95_ms']:8.3f} ms")
+
+            if scene.floor_list is not None:
+                glDeleteLists(scene.floor_list, 1)
+
+        with open(results_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Saved {results_file}")
+
+    except Exception as e:
+        print(f"Benchmark failed: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if win is not None:
+            win.close()
+        core.quit()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,60 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Lookup tables for the specular lobes of OptimizedFromScratch (opt-in, scene.use_brdf_tables)
+# read by LightingKernels.compute_specular_table_numba only, where a table read is much cheaper than a scalar
+# pow / exp, the NumPy path always evaluates the BRDF exactly
+#   Blinn-Phong: n.h ** shininess   rows = shininess (log spaced), columns = n.h (uniform in sqrt(1 - n.h))
+#   Ward:        exp(-x)            one row,                       columns = x in [0, ward_cutoff]
+#     x = (h.t^2 / ax^2 + h.b^2 / ay^2) / (n.h)^2, tan^2 / a^2 when isotropic, the kernel computes it
+#     and multiplies by 1 / (4 pi ax ay sqrt(n.l n.v)), so the one row covers every alpha and anisotropy
+# built once, so a sweep over thousands of materials reuses them
+# a material picks one row (Blinn-Phong: blend of the two nearest), each vertex is then a single linear interpolation
+
+table_columns = 2048
+table_rows = 512
+shininess_range = (1.0, 2048.0)
+alpha_range = (0.001, 1.0)
+ward_cutoff = 20.0  # exponent past which Ward counts as 0, same as compute_ward_numpy
+
+
+class BrdfTable:
+    def __init__(self, name, values, row_range, column_scale):
+        self.name = name
+        self.values = np.ascontiguousarray(values, dtype=np.float32)  # (rows, columns), a single row = 1D table
+        self.row_range = row_range
+        self.column_scale = column_scale  # param -> factor from the column variable to a column index
+
+    def covers(self, param):
+        return self.row_range[0] <= param <= self.row_range[1]
+
+    def row(self, param):
+        # (columns,) float32 row for one material, None when param is outside the table
+        if not self.covers(param):
+            return None
+        if len(self.values) == 1:
+            return self.values[0]
+        low, high = np.log(self.row_range[0]), np.log(self.row_range[1])
+        position = (math.log(param) - low) / (high - low) * (len(self.values) - 1)
+        r0 = min(int(position), len(self.values) - 2)
+        weight = np.float32(position - r0)
+        return (1.0 - weight) * self.values[r0] + weight * self.values[r0 + 1]
+
+
+@lru_cache(maxsize=None)
+def blinn_phong_table(columns=table_columns, rows=table_rows):
+    shininess = np.geomspace(*shininess_range, rows)
+    # column c <-> sqrt(1 - n.h) = c / (columns - 1)
+    n_dot_h = 1.0 - np.square(np.linspace(0.0, 1.0, columns))
+    values = np.power(n_dot_h[np.newaxis, :], shininess[:, np.newaxis])
+    return BrdfTable('blinn_phong', values, shininess_range, lambda shininess: columns - 1)
+
+
+@lru_cache(maxsize=None)
+def ward_table(columns=table_columns):
+    # column c <-> x = c / (columns - 1) * ward_cutoff, the alphas are applied by the kernel
+    exponents = np.linspace(0.0, ward_cutoff, columns)
+    return BrdfTable('ward', np.exp(-exponents)[np.newaxis, :], alpha_range,
+                     lambda alpha: (columns - 1) / ward_cutoff)
@@ -0,0 +1,64 @@
+import math
+import numpy as np
+
+# Camera / model matrices of the streak scenes (gluPerspective, gluLookAt, glRotatef) as numpy arrays
+# kept free of numba so the interactive scene can import it without paying for the JIT at startup
+
+# same camera as setup_camera in the streak scenes
+DEFAULT_EYE = (0.0, 1.5, 0.0)
+DEFAULT_CENTER = (0.0, 1.0, -10.0)
+DEFAULT_UP = (0.0, 1.0, 0.0)
+DEFAULT_FOVY = 45.0
+DEFAULT_NEAR = 0.1
+DEFAULT_FAR = 100.0
+
+
+def perspective_matrix(fovy_deg, aspect, near, far):
+    # gluPerspective
+    f = 1.0 / math.tan(math.radians(fovy_deg) / 2.0)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+        [0, 0, -1, 0]
+    ], dtype=np.float64)
+
+
+def look_at_matrix(eye, center, up):
+    # gluLookAt
+    eye = np.asarray(eye, dtype=np.float64)
+    forward = np.asarray(center, dtype=np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, np.asarray(up, dtype=np.float64))
+    side /= np.linalg.norm(side)
+    true_up = np.cross(side, forward)
+
+    view = np.identity(4)
+    view[0, :3] = side
+    view[1, :3] = true_up
+    view[2, :3] = -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+def rotation_matrix(angle_deg, x, y, z):
+    # glRotatef
+    axis = np.array([x, y, z], dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    x, y, z = axis
+    c = math.cos(math.radians(angle_deg))
+    s = math.sin(math.radians(angle_deg))
+    rot = np.identity(4)
+    rot[:3, :3] = [
+        [x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+        [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s],
+        [x * z * (1 - c) - y * s, y * z * (1 - c) + x * s, z * z * (1 - c) + c]
+    ]
+    return rot
+
+
+def scene_mvp(width, height, angle_x=0.0, angle_z=0.0, eye=DEFAULT_EYE, center=DEFAULT_CENTER,
+              up=DEFAULT_UP, fovy=DEFAULT_FOVY, near=DEFAULT_NEAR, far=DEFAULT_FAR):
+    # projection * view * model, model rotation in the same order as render_frame
+    model = rotation_matrix(angle_x, 1.0, 0.0, 0.0) @ rotation_matrix(angle_z, 0.0, 1.0, 0.0)
+    return perspective_matrix(fovy, width / height, near, far) @ look_at_matrix(eye, center, up) @ model
@@ -0,0 +1,56 @@
+import sys
+
+import numpy as np
+
+from MicrofacetNormals import microfacet_normals
+from OptimizedFromScratch import OptimizedSpecularStreakScene, get_kernels
+
+# The vectorized NumPy and the numba Ward BRDF against the per vertex ward_lighting_single, isotropic and
+# anisotropic alphas, on floor points around the streak of the default light / camera
+# exits 1 on a mismatch, run it after touching any of the three
+#   python CheckWardParity.py
+
+num_points = 4000
+alphas = [(0.001, 0.001), (0.05, 0.05), (0.2, 0.2), (0.02, 0.2), (0.2, 0.02), (0.1, 0.3)]
+
+
+def sample_floor(count, seed=0):
+    # points on y = 0 around the mirror point of the default light, rough normals plus a few steep ones
+    rng = np.random.default_rng(seed)
+    vertices = np.zeros((count, 3), dtype=np.float32)
+    vertices[:, 0] = rng.uniform(-0.5, 0.5, count)
+    vertices[:, 2] = rng.uniform(-6.0, -0.5, count)
+
+    normals = microfacet_normals(count, 'anisotropic', seed=seed, cache=False, roughness_x=0.1, roughness_z=0.05)
+    steep = rng.random(count) < 0.1
+    tilted = rng.standard_normal((int(steep.sum()), 3)).astype(np.float32)
+    tilted[:, 1] = np.abs(tilted[:, 1])
+    normals[steep] = tilted / np.linalg.norm(tilted, axis=1, keepdims=True)
+    # normal along x, the tangent frame's fallback axis
+    normals[0] = (1.0, 0.0, 0.0)
+    return vertices, np.ascontiguousarray(normals)
+
+
+def main():
+    # only the lighting state is needed, no window
+    scene = OptimizedSpecularStreakScene.__new__(OptimizedSpecularStreakScene)
+    scene.setup_custom_lighting()
+
+    if not get_kernels().NUMBA_AVAILABLE:
+        print("numba not installed, only the NumPy path is checked")
+
+    vertices, normals = sample_floor(num_points)
+    # the material as rendered (peaks clip at 1), then dimmed so the whole lobe is compared unclipped
+    for specular in (1.0, 0.01):
+        scene.material['specular'] = np.full(3, specular, dtype=np.float32)
+        print(f"Material specular {specular}")
+        try:
+            scene.check_ward_parity(vertices, normals, alphas=alphas, num_samples=num_points)
+        except AssertionError as e:
+            print(f"FAILED: {e}")
+            sys.exit(1)
+    print("Ward parity OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+
+# Shared floor tessellation for the specular streak scenes
+# one vertex per grid point + uint32 index buffer instead of 6 duplicated vertices per cell
+# triangle winding matches the old loops: (x1,z1) (x2,z1) (x1,z2) and (x2,z1) (x2,z2) (x1,z2)
+
+
+def generate_floor_grid(size_x, size_z, divisions_x, divisions_z, x_min=None, z_min=None):
+    # default is a floor centered on the origin, pass x_min/z_min to place it elsewhere
+    if x_min is None:
+        x_min = -size_x / 2
+    if z_min is None:
+        z_min = -size_z / 2
+
+    xs = np.linspace(x_min, x_min + size_x, divisions_x + 1, dtype=np.float32)
+    zs = np.linspace(z_min, z_min + size_z, divisions_z + 1, dtype=np.float32)
+    return generate_floor_grid_axes(xs, zs)
+
+
+def generate_floor_grid_axes(xs, zs):
+    # grid over any increasing x / z coordinates (uniform or graded)
+    xs = np.asarray(xs, dtype=np.float32)
+    zs = np.asarray(zs, dtype=np.float32)
+    divisions_x = len(xs) - 1
+    divisions_z = len(zs) - 1
+
+    # grid vertex (i, j) -> index i * (divisions_z + 1) + j, same i/j order as the old loops
+    grid_x, grid_z = np.meshgrid(xs, zs, indexing='ij')
+    vertices = np.zeros(((divisions_x + 1) * (divisions_z + 1), 3), dtype=np.float32)
+    vertices[:, 0] = grid_x.ravel()
+    vertices[:, 2] = grid_z.ravel()
+
+    row = np.uint32(divisions_z + 1)
+    v00 = (np.arange(divisions_x, dtype=np.uint32)[:, np.newaxis] * row
+           + np.arange(divisions_z, dtype=np.uint32)[np.newaxis, :])
+    v10 = v00 + row
+    v01 = v00 + np.uint32(1)
+    v11 = v10 + np.uint32(1)
+
+    indices = np.stack([v00, v10, v01, v10, v11, v01], axis=-1).reshape(-1)
+    return vertices, indices
+
+
+# Streak adaptive tessellation
+# only where the half vector is close to the floor normal is there any specular energy, so the grid is
+# fine there and coarse elsewhere. Refinement is per axis (tensor product) so the mesh stays conforming,
+# no T-junctions and no cracks.
+# the footprint comes from the light and camera alone: the caller's streak rule (half_vector.y above a
+# threshold, GlossyFloorStreak's reflection_threshold) has no roughness term, so roughness is not an input
+
+
+def predict_streak_region(light_pos, camera_pos, size_x, size_z, divisions_x, divisions_z,
+                          min_half_y, x_min=None, z_min=None):
+    # (x_lo, x_hi, z_lo, z_hi) of the floor (y = 0, floor space) where half_vector.y >= min_half_y,
+    # sampled at the given resolution, None if the streak misses the floor
+    if x_min is None:
+        x_min = -size_x / 2
+    if z_min is None:
+        z_min = -size_z / 2
+
+    xs = np.linspace(x_min, x_min + size_x, divisions_x + 1)
+    zs = np.linspace(z_min, z_min + size_z, divisions_z + 1)
+    grid_x, grid_z = np.meshgrid(xs, zs, indexing='ij')
+    points = np.stack([grid_x, np.zeros_like(grid_x), grid_z], axis=-1)
+
+    light_dirs = np.asarray(light_pos, dtype=np.float64) - points
+    light_dirs /= np.linalg.norm(light_dirs, axis=-1, keepdims=True)
+    view_dirs = np.asarray(camera_pos, dtype=np.float64) - points
+    view_dirs /= np.linalg.norm(view_dirs, axis=-1, keepdims=True)
+    half_vectors = light_dirs + view_dirs
+    half_y = half_vectors[..., 1] / np.maximum(np.linalg.norm(half_vectors, axis=-1), 1e-12)
+
+    inside = half_y >= min_half_y
+    if not inside.any():
+        return None
+    return (float(grid_x[inside].min()), float(grid_x[inside].max()),
+            float(grid_z[inside].min()), float(grid_z[inside].max()))
+
+
+def graded_axis(start, size, coarse_divisions, fine_divisions, band_lo, band_hi):
+    # coarse spacing everywhere except [band_lo, band_hi] (snapped outward to coarse lines) at fine spacing
+    coarse_step = size / coarse_divisions
+    i_lo = min(max(int(math.floor((band_lo - start) / coarse_step)), 0), coarse_divisions)
+    i_hi = min(max(int(math.ceil((band_hi - start) / coarse_step)), i_lo), coarse_divisions)
+    lo = start + i_lo * coarse_step
+    hi = start + i_hi * coarse_step
+    n_fine = max(int(math.ceil((i_hi - i_lo) * fine_divisions / coarse_divisions)), i_hi - i_lo)
+
+    return np.concatenate([
+        np.linspace(start, lo, i_lo + 1),
+        np.linspace(lo, hi, n_fine + 1)[1:],
+        np.linspace(hi, start + size, coarse_divisions - i_hi + 1)[1:],
+    ]).astype(np.float32)
+
+
+def generate_streak_adaptive_grid(size_x, size_z, light_pos, camera_pos, min_half_y,
+                                  coarse_x, coarse_z, fine_x, fine_z, x_min=None, z_min=None):
+    # fine_x/fine_z = divisions the uniform floor would have, used inside the streak
+    # returns vertices, indices, region (None = no streak on the floor, all coarse)
+    if x_min is None:
+        x_min = -size_x / 2
+    if z_min is None:
+        z_min = -size_z / 2
+
+    region = predict_streak_region(light_pos, camera_pos, size_x, size_z, fine_x, fine_z, min_half_y,
+                                   x_min=x_min, z_min=z_min)
+    if region is None:
+        return generate_floor_grid(size_x, size_z, coarse_x, coarse_z, x_min=x_min, z_min=z_min) + (None,)
+
+    # one fine cell of margin, the samples are a fine step apart
+    pad_x = size_x / fine_x
+    pad_z = size_z / fine_z
+    xs = graded_axis(x_min, size_x, coarse_x, fine_x, region[0] - pad_x, region[1] + pad_x)
+    zs = graded_axis(z_min, size_z, coarse_z, fine_z, region[2] - pad_z, region[3] + pad_z)
+    vertices, indices = generate_floor_grid_axes(xs, zs)
+    return vertices, indices, region
+
+
+def expand_indexed(array, indices):
+    # back to one row per triangle corner (immediate mode / per-corner attributes)
+    return np.ascontiguousarray(array[indices])
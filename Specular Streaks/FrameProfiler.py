@@ -0,0 +1,125 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Per-stage frame timing for the render loops
+# wrap each part of a frame in profiler.stage('name'), call begin_frame()/end_frame() around it
+# keeps the last `capacity` frames only, export to CSV or Chrome trace JSON (chrome://tracing, Perfetto)
+
+DEFAULT_STAGES = ['events', 'lighting', 'upload', 'draw', 'flip']
+
+
+class FrameProfiler:
+    def __init__(self, refresh_interval=1.0 / 60.0, capacity=3600, stages=None):
+        self.refresh_interval = refresh_interval
+        self.stages = list(stages) if stages is not None else list(DEFAULT_STAGES)
+
+        # ring buffers
+        self.frames = deque(maxlen=capacity)  # (frame_index, start, total, {stage: seconds}, dropped)
+        self.events = deque(maxlen=capacity * len(self.stages) * 2)  # (frame_index, stage, start, duration)
+
+        self.frame_index = 0
+        self.dropped_total = 0
+        self._frame_start = None
+        self._previous_start = None
+        self._stage_times = {}
+        self._origin = time.perf_counter()
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        self._stage_times = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            # stages can run more than once per frame (several keys), add them up
+            self._stage_times[name] = self._stage_times.get(name, 0.0) + duration
+            if name not in self.stages:
+                self.stages.append(name)
+            self.events.append((self.frame_index, name, start, duration))
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        end = time.perf_counter()
+        total = end - self._frame_start
+
+        # dropped frames: refresh periods skipped between consecutive frame starts
+        dropped = 0
+        if self._previous_start is not None:
+            interval = self._frame_start - self._previous_start
+            if interval > 1.5 * self.refresh_interval:
+                dropped = int(round(interval / self.refresh_interval)) - 1
+        self.dropped_total += dropped
+
+        self.frames.append((self.frame_index, self._frame_start, total, dict(self._stage_times), dropped))
+        self._previous_start = self._frame_start
+        self._frame_start = None
+        self.frame_index += 1
+
+    def frame_times(self, last=None):
+        # whole frame seconds (begin_frame to end_frame) of the last `last` frames, all kept frames by default
+        frames = list(self.frames)[-last:] if last else list(self.frames)
+        return [total for _, _, total, _, _ in frames]
+
+    def summary(self, last=None):
+        frames = list(self.frames)[-last:] if last else list(self.frames)
+        if not frames:
+            return "no frames profiled"
+
+        parts = []
+        for name in self.stages:
+            times = [stage_times.get(name, 0.0) for _, _, _, stage_times, _ in frames]
+            parts.append(f"{name} {1000 * sum(times) / len(times):.2f}/{1000 * max(times):.2f}")
+
+        # which stage is the biggest in frames that went over budget
+        over_budget = [frame for frame in frames if frame[2] > self.refresh_interval]
+        culprits = {}
+        for _, _, _, stage_times, _ in over_budget:
+            if stage_times:
+                worst = max(stage_times, key=stage_times.get)
+                culprits[worst] = culprits.get(worst, 0) + 1
+        culprit_text = ", ".join(f"{name} x{count}" for name, count in
+                                 sorted(culprits.items(), key=lambda item: -item[1]))
+
+        dropped = sum(frame[4] for frame in frames)
+        return (f"stages ms avg/max: {' | '.join(parts)} || over {1000 * self.refresh_interval:.1f} ms: "
+                f"{len(over_budget)}/{len(frames)} frames{' (' + culprit_text + ')' if culprit_text else ''}, "
+                f"dropped {dropped}")
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'start_ms', 'total_ms'] + [f'{name}_ms' for name in self.stages] +
+                            ['over_budget', 'dropped'])
+            for frame_index, start, total, stage_times, dropped in self.frames:
+                writer.writerow([frame_index, round(1000 * (start - self._origin), 3), round(1000 * total, 3)] +
+                                [round(1000 * stage_times.get(name, 0.0), 3) for name in self.stages] +
+                                [int(total > self.refresh_interval), dropped])
+
+    def export_chrome_trace(self, path):
+        trace_events = []
+        for frame_index, start, total, _, dropped in self.frames:
+            trace_events.append({'name': f'frame {frame_index}', 'ph': 'X', 'pid': 0, 'tid': 0,
+                                 'ts': 1e6 * (start - self._origin), 'dur': 1e6 * total,
+                                 'args': {'dropped': dropped}})
+        for frame_index, name, start, duration in self.events:
+            trace_events.append({'name': name, 'ph': 'X', 'pid': 0, 'tid': 1,
+                                 'ts': 1e6 * (start - self._origin), 'dur': 1e6 * duration,
+                                 'args': {'frame': frame_index}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+    def export(self, path_stem):
+        # both formats side by side, returns the written paths
+        csv_path = f"{path_stem}.csv"
+        json_path = f"{path_stem}_trace.json"
+        self.export_csv(csv_path)
+        self.export_chrome_trace(json_path)
+        return csv_path, json_path
@@ -0,0 +1,211 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+import numpy as np
+
+# Builds the theta_X_roughness_Y_{left,right}_eye.png library that the stereoscope
+# experiments read, without anyone sitting at the interactive scene.
+# theta = floor slant (angle_x of the scene), roughness = Ward alpha of the material
+
+# default sweep
+theta_values = [-3.0, -2.0, -1.0, 0.0, 1.0, 2.0, 3.0]
+# roughness 0 (alpha clamped to 0.001) is ReferenceStreak's reference image
+roughness_values = [0.0, 0.02, 0.05, 0.1, 0.15, 0.2]
+light_heights = [1.0]
+
+image_width = 740  # same size as the stereoscope windows
+image_height = 920
+interocular_distance = 0.065  # in scene units (metres)
+output_folder = 'StreakImages'
+manifest_name = 'manifest.csv'
+
+# per worker process state (GL context + scene are built once per process)
+_worker_window = None
+_worker_scene = None
+_worker_targets = None  # (left, right)
+
+
+def format_value(value, decimals):
+    # 1.02 -> "1_020", same naming as the experiment scripts expect
+    return f"{value:.{decimals}f}".replace('.', '_')
+
+
+def pair_filenames(theta, roughness):
+    stem = f"theta_{format_value(theta, 1)}_roughness_{format_value(roughness, 3)}"
+    return f"{stem}_left_eye.png", f"{stem}_right_eye.png"
+
+
+class OffscreenTarget:
+    # framebuffer object so nothing has to be shown on screen
+    # also stands in for the psychopy window (scene only needs .size)
+    def __init__(self, width, height):
+        from pyglet.gl import (GLuint, glGenFramebuffers, glBindFramebuffer, glGenRenderbuffers,
+                               glBindRenderbuffer, glRenderbufferStorage, glFramebufferRenderbuffer,
+                               glCheckFramebufferStatus, GL_FRAMEBUFFER, GL_RENDERBUFFER, GL_RGBA8,
+                               GL_DEPTH_COMPONENT24, GL_COLOR_ATTACHMENT0, GL_DEPTH_ATTACHMENT,
+                               GL_FRAMEBUFFER_COMPLETE)
+
+        self.size = (width, height)
+
+        self.fbo = GLuint()
+        glGenFramebuffers(1, self.fbo)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+        self.color_rb = GLuint()
+        glGenRenderbuffers(1, self.color_rb)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color_rb)
+
+        self.depth_rb = GLuint()
+        glGenRenderbuffers(1, self.depth_rb)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_rb)
+
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"Offscreen framebuffer incomplete (status {status})")
+
+    def bind(self):
+        from pyglet.gl import glBindFramebuffer, glViewport, GL_FRAMEBUFFER
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.size[0], self.size[1])
+
+    def read_pixels(self):
+        from pyglet.gl import (glReadPixels, glPixelStorei, glBindFramebuffer, GL_RGB, GL_UNSIGNED_BYTE,
+                               GL_PACK_ALIGNMENT, GL_READ_FRAMEBUFFER)
+        width, height = self.size
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        pixels = np.empty((height, width, 3), dtype=np.uint8)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE, pixels.ctypes.data)
+        # GL origin is bottom left
+        return np.flipud(pixels)
+
+
+def _init_worker(width, height, headless):
+    global _worker_window, _worker_scene, _worker_targets
+
+    # has to be set before anything imports pyglet.gl
+    import pyglet
+    pyglet.options['headless'] = headless
+    pyglet.options['shadow_window'] = False
+
+    # hidden window only to own a GL context, all drawing goes to the FBO
+    _worker_window = pyglet.window.Window(width=width, height=height, visible=False)
+    _worker_window.switch_to()
+
+    from OptimizedFromScratch import OptimizedSpecularStreakScene
+
+    _worker_targets = (OffscreenTarget(width, height), OffscreenTarget(width, height))
+    _worker_scene = OptimizedSpecularStreakScene(_worker_targets[0])
+
+
+def _render_pair(theta, roughness, light_height, out_dir, iod, use_ward, brdf_tables=False):
+    from PIL import Image
+
+    scene = _worker_scene
+    scene.use_ward = use_ward
+    scene.use_brdf_tables = brdf_tables
+    scene.angle_x = theta
+    scene.original_light_pos[1] = light_height
+    scene.material['roughness'] = roughness
+
+    start = time.perf_counter()
+    filenames = pair_filenames(theta, roughness)
+    # both eyes in one pass (also picks up the theta/material set above)
+    scene.render_stereo_pair(*_worker_targets, iod=iod)
+    for filename, target in zip(filenames, _worker_targets):
+        Image.fromarray(target.read_pixels()).save(os.path.join(out_dir, filename))
+
+    return {
+        'theta': theta,
+        'roughness': roughness,
+        'light_height': light_height,
+        'brdf': 'ward' if use_ward else 'blinn_phong',
+        'brdf_tables': int(brdf_tables),
+        'interocular_distance': iod,
+        'left_eye': filenames[0],
+        'right_eye': filenames[1],
+        'render_seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def generate_library(thetas=None, roughnesses=None, heights=None, out_folder=output_folder,
+                     width=image_width, height=image_height, iod=interocular_distance,
+                     use_ward=True, workers=None, headless=True, brdf_tables=False):
+    thetas = theta_values if thetas is None else thetas
+    roughnesses = roughness_values if roughnesses is None else roughnesses
+    heights = light_heights if heights is None else heights
+
+    # names have no light height in them, so split heights into subfolders when sweeping more than one
+    jobs = []
+    for light_height in heights:
+        out_dir = out_folder
+        if len(heights) > 1:
+            out_dir = os.path.join(out_folder, f"light_height_{format_value(light_height, 1)}")
+        os.makedirs(out_dir, exist_ok=True)
+        for theta, roughness in itertools.product(thetas, roughnesses):
+            jobs.append((theta, roughness, light_height, out_dir))
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Rendering {len(jobs)} stereo pairs on {workers} worker(s)...")
+
+    rows = []
+    start = time.perf_counter()
+    # spawn so each worker gets a clean GL context
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(width, height, headless)) as pool:
+        futures = {pool.submit(_render_pair, theta, roughness, light_height, out_dir, iod, use_ward,
+                               brdf_tables): out_dir
+                   for theta, roughness, light_height, out_dir in jobs}
+        for future in as_completed(futures):
+            row = future.result()
+            row['folder'] = os.path.relpath(futures[future], out_folder)
+            rows.append(row)
+            print(f"[{len(rows)}/{len(jobs)}] theta={row['theta']:.1f} roughness={row['roughness']:.3f} "
+                  f"height={row['light_height']:.1f} ({row['render_seconds']:.2f}s)")
+
+    rows.sort(key=lambda r: (r['light_height'], r['theta'], r['roughness']))
+    manifest_path = os.path.join(out_folder, manifest_name)
+    with open(manifest_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['folder', 'theta', 'roughness', 'light_height', 'brdf', 'brdf_tables',
+                                               'interocular_distance', 'left_eye', 'right_eye',
+                                               'render_seconds'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"Done: {len(rows)} pairs in {time.perf_counter() - start:.1f}s, manifest at {manifest_path}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the stereo streak image library offscreen")
+    parser.add_argument('--theta', type=float, nargs='+', default=theta_values)
+    parser.add_argument('--roughness', type=float, nargs='+', default=roughness_values)
+    parser.add_argument('--light-height', type=float, nargs='+', default=light_heights)
+    parser.add_argument('--out', default=output_folder)
+    parser.add_argument('--size', type=int, nargs=2, default=[image_width, image_height])
+    parser.add_argument('--iod', type=float, default=interocular_distance)
+    parser.add_argument('--blinn-phong', action='store_true', help="roughness is then ignored")
+    parser.add_argument('--brdf-tables', action='store_true',
+                        help="specular lobes from BrdfTables (faster sweeps, checked against the exact BRDF)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--windowed', action='store_true', help="use hidden windows instead of headless EGL")
+    args = parser.parse_args()
+
+    generate_library(args.theta, args.roughness, args.light_height, args.out,
+                     args.size[0], args.size[1], args.iod,
+                     use_ward=not args.blinn_phong, workers=args.workers, headless=not args.windowed,
+                     brdf_tables=args.brdf_tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import zipfile
+
+import numpy as np
+
+# Generated scene geometry saved as compressed .npz, named by a hash of everything that went into it
+# (generation parameters, seed, source of the generating function), so every lab machine loads the exact same
+# stimuli instead of regenerating them
+# the folder is not in git: export it on the machine that built it and import it on each lab machine
+#   python GeometrySnapshots.py export snapshots.zip  /  python GeometrySnapshots.py import snapshots.zip
+# the parameters are stored inside the archive too and checked on load
+
+snapshot_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'GeometrySnapshots')
+
+
+def source_digest(*functions):
+    # editing a generator changes its snapshots' names, so stale geometry is never loaded
+    digest = hashlib.sha1()
+    for function in functions:
+        try:
+            digest.update(inspect.getsource(function).encode('utf-8'))
+        except (OSError, TypeError):
+            digest.update(getattr(function, '__qualname__', repr(function)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def params_text(params):
+    return json.dumps(params, sort_keys=True, default=lambda value: np.asarray(value).tolist())
+
+
+def snapshot_path(kind, params):
+    digest = hashlib.sha1(params_text(params).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_folder, f"{kind}_{digest}.npz")
+
+
+def load_snapshot(kind, params, build):
+    # dict of arrays from the snapshot, or from build() (then saved for next time)
+    path = snapshot_path(kind, params)
+    text = params_text(params)
+
+    if os.path.exists(path):
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                if str(archive['_params']) == text:
+                    return {name: archive[name] for name in archive.files if name != '_params'}
+                print(f"Snapshot {path} was made with other parameters, regenerating")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read snapshot {path}: {e}, regenerating")
+
+    arrays = build()
+
+    try:
+        os.makedirs(snapshot_folder, exist_ok=True)
+        # write then rename so a half written file is never loaded
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, _params=np.array(text), **arrays)
+        os.replace(tmp_path, path)
+        print(f"Saved geometry snapshot {os.path.basename(path)}")
+    except OSError as e:
+        print(f"Could not save snapshot to {path}: {e}")
+
+    return arrays
+
+
+def export_snapshots(archive_path):
+    # every snapshot in snapshot_folder into one zip, returns the names
+    names = sorted(name for name in os.listdir(snapshot_folder) if name.endswith('.npz')) \
+        if os.path.isdir(snapshot_folder) else []
+    if not names:
+        raise FileNotFoundError(f"No snapshots in {snapshot_folder}, run the experiment once to build them")
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name in names:
+            archive.write(os.path.join(snapshot_folder, name), name)
+    return names
+
+
+def import_snapshots(archive_path):
+    # snapshots from an export_snapshots zip into snapshot_folder, each checked before it is kept
+    os.makedirs(snapshot_folder, exist_ok=True)
+    names = []
+    with zipfile.ZipFile(archive_path) as archive:
+        for name in archive.namelist():
+            if os.path.basename(name) != name or not name.endswith('.npz'):
+                print(f"Skipping {name}, not a snapshot")
+                continue
+            path = os.path.join(snapshot_folder, name)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(archive.read(name))
+            try:
+                with np.load(tmp_path, allow_pickle=False) as snapshot:
+                    str(snapshot['_params'])
+            except (OSError, ValueError, KeyError) as e:
+                os.remove(tmp_path)
+                print(f"Skipping {name}: {e}")
+                continue
+            os.replace(tmp_path, path)
+            names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move geometry snapshots between lab machines")
+    parser.add_argument('action', choices=['export', 'import'])
+    parser.add_argument('archive', help="zip file to write (export) or read (import)")
+    args = parser.parse_args()
+
+    if args.action == 'export':
+        names = export_snapshots(args.archive)
+        print(f"Exported {len(names)} snapshot(s) from {snapshot_folder} to {args.archive}")
+    else:
+        names = import_snapshots(args.archive)
+        print(f"Imported {len(names)} snapshot(s) into {snapshot_folder}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
 from psychopy import visual, core, event
 from pyglet.gl import *
-import random
 import numpy as np
 
+from FloorMesh import generate_floor_grid, generate_streak_adaptive_grid, expand_indexed
+from MicrofacetNormals import microfacet_normals
+
 #HYPERPARAMETERS TO TOUCH ARE LIGHT DISTANCE AND SPECIFIC RANDOMIZATION
 class SpecularStreakScene:
     def __init__(self, win):
@@ -13,6 +15,16 @@ class SpecularStreakScene:
         self.setup_lighting()
         print("Setting up camera...")
         #self.setup_camera()
+
+        # Light and viewer positions for the streak test in render_glossy_floor
+        self.light_position = (0.0, 32.0, -100.0)
+        self.viewer_position = (0.0, 1.5, 0.0)
+        self.reflection_threshold = 0.98  # Adjust this to control streak length
+
+        # fine (divisions) only where the streak can be, coarse_divisions everywhere else
+        self.adaptive_floor = True
+        self.coarse_divisions = 25
+
         print("Generating floor geometry...")
         self.generate_floor_geometry()
         print("Scene initialization complete")
@@ -69,7 +81,6 @@ class SpecularStreakScene:
         floor_size = 40.0
         #divisions = 100
         divisions = 250
-        step = floor_size / divisions
 
         # Store vertices and normals
         self.floor_vertices = []
@@ -83,39 +94,26 @@ class SpecularStreakScene:
             length = (nx ** 2 + ny ** 2 + nz ** 2) ** 0.5
             return (nx / length, ny / length, nz / length)"""
 
-        def jittered_normal():
-            nx = random.gauss(0.0, 0.5) #increasing standard deviation makes streak more wide ??
-            #nx = 0.0
-            ny = 1.0
-            nz = random.uniform(-0.05, 0.05)  # perfectly vertical streaks changing the z makes a more conical streak?
-            length = (nx ** 2 + ny ** 2) ** 0.5
-            return (nx / length, ny / length, 0.0)
-
-        for i in range(divisions):
-            for j in range(divisions):
-                x1 = -floor_size / 2 + i * step
-                x2 = x1 + step
-                z1 = -floor_size / 2 + j * step
-                z2 = z1 + step
-
-                # Triangle 1 vertices and normals
-                triangle1_vertices = [(x1, 0.0, z1), (x2, 0.0, z1), (x1, 0.0, z2)]
-                triangle1_normals = [jittered_normal() for _ in range(3)]
-
-                # Triangle 2 vertices and normals
-                triangle2_vertices = [(x2, 0.0, z1), (x2, 0.0, z2), (x1, 0.0, z2)]
-                triangle2_normals = [jittered_normal() for _ in range(3)]
-
-                # Store all of em
-                self.floor_vertices.extend(triangle1_vertices)
-                self.floor_vertices.extend(triangle2_vertices)
-                self.floor_normals.extend(triangle1_normals)
-                self.floor_normals.extend(triangle2_normals)
+        # shared grid, expanded back to one entry per triangle corner so every corner keeps its own normal
+        if self.adaptive_floor:
+            vertices, indices, region = generate_streak_adaptive_grid(
+                floor_size, floor_size, self.light_position, self.viewer_position, self.reflection_threshold,
+                self.coarse_divisions, self.coarse_divisions, divisions, divisions)
+            print(f"Adaptive floor: {len(indices) // 3} triangles instead of {2 * divisions * divisions}, "
+                  f"streak region {region}")
+        else:
+            vertices, indices = generate_floor_grid(floor_size, floor_size, divisions, divisions)
+        self.floor_vertices = expand_indexed(vertices, indices).tolist()
+        # sigma_x: increasing standard deviation makes streak more wide ??
+        # sigma_z 0 = perfectly vertical streaks, changing the z makes a more conical streak?
+        self.floor_normals = microfacet_normals(len(self.floor_vertices), 'gaussian', seed=0,
+                                                sigma_x=0.5, sigma_z=0.0).tolist()
 
     def render_glossy_floor(self):
         # Light and viewer positions
-        light_x, light_y, light_z = 0.0, 32.0, -100.0
-        viewer_x, viewer_y, viewer_z = 0.0, 1.5, 0.0
+        light_x, light_y, light_z = self.light_position
+        viewer_x, viewer_y, viewer_z = self.viewer_position
+        reflection_threshold = self.reflection_threshold
 
         # Material properties
         mat_ambient = (GLfloat * 4)(0.01, 0.01, 0.01, 1.0)
@@ -152,8 +150,6 @@ class SpecularStreakScene:
             # Check if this point should have specular reflection
             # For specular reflection, half vector should be close to surface normal (0,1,0)
             # This creates the finite streak effect shown in the PDF
-            reflection_threshold = 0.98  # Adjust this to control streak length
-
             if hy > reflection_threshold:  # hy is the Y component of normalized half vector
                 # Use the original normal for strong specular reflection
                 nx, ny, nz = 0.0, 1.0, 0.0
@@ -11,6 +11,17 @@ class SpecularStreakScene:
         self.setup_lighting()
         print("Setting up camera...")
         self.setup_camera()
+
+        # floor parameters, changing one through set_floor_params recompiles the floor
+        self.floor_size = 40.0  # Larger floor
+        self.divisions = 120  # More tessellation for smoother specular
+        self.shininess = 128.0
+        self.floor_params = ('floor_size', 'divisions', 'shininess')
+
+        # static floor compiled into a display list (use_display_list False = re-emit every frame)
+        self.use_display_list = True
+        self.floor_list = None
+        self.floor_dirty = True
         print("Scene initialization complete")
 
     def setup_opengl(self):
@@ -66,7 +77,7 @@ class SpecularStreakScene:
         mat_ambient = (GLfloat * 4)(0.1, 0.1, 0.1, 1.0)  # Darker ambient
         mat_diffuse = (GLfloat * 4)(0.2, 0.2, 0.2, 1.0)  # Darker diffuse
         mat_specular = (GLfloat * 4)(1.0, 1.0, 1.0, 1.0)  # Bright specular
-        mat_shininess = (GLfloat * 1)(128.0)  # Higher shininess
+        mat_shininess = (GLfloat * 1)(self.shininess)  # Higher shininess
 
         glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT, mat_ambient)
         glMaterialfv(GL_FRONT_AND_BACK, GL_DIFFUSE, mat_diffuse)
@@ -77,8 +88,8 @@ class SpecularStreakScene:
         glColor3f(1.0, 1.0, 1.0)
 
         #tesselation of floor for division/light computation
-        floor_size = 40.0  # Larger floor
-        divisions = 120  # More tessellation for smoother specular
+        floor_size = self.floor_size
+        divisions = self.divisions
         step = floor_size / divisions
 
         glBegin(GL_TRIANGLES)
@@ -105,6 +116,29 @@ class SpecularStreakScene:
 
         glEnd()
 
+    def set_floor_params(self, **params):
+        # only a real change marks the compiled floor dirty
+        for name, value in params.items():
+            if name not in self.floor_params:
+                raise AttributeError(f"Unknown floor parameter '{name}'")
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self.floor_dirty = True
+
+    def draw_floor(self):
+        if not self.use_display_list:
+            self.create_glossy_floor()
+            return
+
+        # compile once, replay every frame
+        if self.floor_dirty or self.floor_list is None:
+            if self.floor_list is None:
+                self.floor_list = glGenLists(1)
+            glNewList(self.floor_list, GL_COMPILE)
+            self.create_glossy_floor()
+            glEndList()
+            self.floor_dirty = False
+        glCallList(self.floor_list)
 
     def render_frame(self):
         #render 1 frame but its always 1 frame anyway coz no movement
@@ -126,7 +160,7 @@ class SpecularStreakScene:
             glPushMatrix()
 
             # glossy floor
-            self.create_glossy_floor()
+            self.draw_floor()
 
             glPopMatrix()
 
@@ -0,0 +1,223 @@
+import numpy as np
+
+# Numba lighting kernels of OptimizedFromScratch
+# imported lazily (numba import + JIT was most of the scene startup), explicit float32 signatures so
+# they compile once, cache=True so later runs load the machine code from __pycache__ instead of compiling
+# nogil so OptimizedFromScratch's background lighting thread does not hold up the render loop
+# callers pass C contiguous float32 arrays, float shininess/alphas (see as_f32)
+
+try:
+    from numba import jit, prange, float32, float64, boolean
+
+    NUMBA_AVAILABLE = True
+    print("Numba available - using accelerated lighting calculations")
+except ImportError:
+    print("Numba not available - using pure NumPy (slower but still optimized)")
+    NUMBA_AVAILABLE = False
+
+
+def as_f32(array):
+    return np.ascontiguousarray(array, dtype=np.float32)
+
+
+if NUMBA_AVAILABLE:
+    points = float32[:, ::1]  # (N, 3)
+    values = float32[::1]  # (N,)
+    vec3 = float32[::1]
+
+    @jit((points, points, vec3, vec3, vec3, vec3, vec3, vec3, vec3, vec3, float64),
+         nopython=True, parallel=True, nogil=True, cache=True)
+    def compute_blinn_phong_numba(vertices, normals, light_pos, camera_pos,
+                                  material_ambient, material_diffuse, material_specular,
+                                  light_ambient, light_diffuse, light_specular, shininess):
+        num_vertices = vertices.shape[0]
+        colors = np.zeros((num_vertices, 3), dtype=np.float32)
+
+        for i in prange(num_vertices):
+            # vector compute
+            light_dir = light_pos - vertices[i]
+            light_dist = np.sqrt(np.sum(light_dir * light_dir))
+            if light_dist > 1e-8:
+                light_dir = light_dir / light_dist
+
+            view_dir = camera_pos - vertices[i]
+            view_dist = np.sqrt(np.sum(view_dir * view_dir))
+            if view_dist > 1e-8:
+                view_dir = view_dir / view_dist
+
+            half_vector = light_dir + view_dir
+            half_dist = np.sqrt(np.sum(half_vector * half_vector))
+            if half_dist > 1e-8:
+                half_vector = half_vector / half_dist
+
+            # light components
+            ambient = material_ambient * light_ambient
+
+            n_dot_l = max(0.0, np.sum(normals[i] * light_dir))
+            diffuse = material_diffuse * light_diffuse * n_dot_l
+
+            n_dot_h = max(0.0, np.sum(normals[i] * half_vector))
+            spec_power = n_dot_h ** shininess
+            specular = material_specular * light_specular * spec_power
+
+            # clamp
+            color = ambient + diffuse + specular
+            colors[i] = np.clip(color, 0.0, 1.0)
+
+        return colors
+
+
+    @jit((points, points, vec3, vec3, vec3, vec3, vec3, vec3, vec3, vec3, float64, float64),
+         nopython=True, parallel=True, nogil=True, cache=True)
+    def compute_ward_numba(vertices, normals, light_pos, camera_pos,
+                           material_ambient, material_diffuse, material_specular,
+                           light_ambient, light_diffuse, light_specular, alpha_x, alpha_y):
+        num_vertices = vertices.shape[0]
+        colors = np.zeros((num_vertices, 3), dtype=np.float32)
+        alpha_x = max(0.001, alpha_x)
+        alpha_y = max(0.001, alpha_y)
+
+        for i in prange(num_vertices):
+            n = normals[i]
+
+            light_dir = light_pos - vertices[i]
+            light_dist = np.sqrt(np.sum(light_dir * light_dir))
+            if light_dist > 1e-8:
+                light_dir = light_dir / light_dist
+
+            view_dir = camera_pos - vertices[i]
+            view_dist = np.sqrt(np.sum(view_dir * view_dir))
+            if view_dist > 1e-8:
+                view_dir = view_dir / view_dist
+
+            half_vector = light_dir + view_dir
+            half_dist = np.sqrt(np.sum(half_vector * half_vector))
+            if half_dist > 1e-8:
+                half_vector = half_vector / half_dist
+
+            ambient = material_ambient * light_ambient
+
+            n_dot_l = max(0.0, np.sum(n * light_dir))
+            diffuse = material_diffuse * light_diffuse * n_dot_l
+
+            # same safety checks as ward_lighting_single
+            n_dot_v = max(0.001, np.sum(n * view_dir))
+            n_dot_h = max(0.0, np.sum(n * half_vector))
+
+            ward_spec = 0.0
+            if n_dot_l >= 0.001 and n_dot_v >= 0.001 and n_dot_h >= 0.001:
+                # tangent frame from the world x axis (z if the normal is along x)
+                tx = 1.0 - n[0] * n[0]
+                ty = -n[0] * n[1]
+                tz = -n[0] * n[2]
+                t_len = np.sqrt(tx * tx + ty * ty + tz * tz)
+                if t_len < 1e-8:
+                    tx = -n[2] * n[0]
+                    ty = -n[2] * n[1]
+                    tz = 1.0 - n[2] * n[2]
+                    t_len = np.sqrt(tx * tx + ty * ty + tz * tz)
+                tx, ty, tz = tx / t_len, ty / t_len, tz / t_len
+                bx = n[1] * tz - n[2] * ty
+                by = n[2] * tx - n[0] * tz
+                bz = n[0] * ty - n[1] * tx
+
+                h_t = (half_vector[0] * tx + half_vector[1] * ty + half_vector[2] * tz) / alpha_x
+                h_b = (half_vector[0] * bx + half_vector[1] * by + half_vector[2] * bz) / alpha_y
+                exponent = (h_t * h_t + h_b * h_b) / (n_dot_h * n_dot_h)
+                denominator = 4.0 * np.pi * alpha_x * alpha_y * np.sqrt(n_dot_l * n_dot_v)
+                if exponent <= 20.0 and denominator > 0.0001:
+                    ward_spec = np.exp(-exponent) / denominator
+
+            specular = material_specular * light_specular * ward_spec
+
+            color = ambient + diffuse + specular
+            colors[i] = np.clip(color, 0.0, 1.0)
+
+        return colors
+
+
+    @jit((points, points, points, values, points, points, vec3, boolean, float64, float64, float64),
+         nopython=True, parallel=True, nogil=True, cache=True)
+    def compute_specular_numba(vertices, normals, light_dirs, n_dot_l, tangents, bitangents, camera_pos,
+                               use_ward, shininess, alpha_x, alpha_y):
+        # view dependent part only (stereo), light dirs / n.l / tangent frame come precomputed
+        num_vertices = vertices.shape[0]
+        spec = np.zeros(num_vertices, dtype=np.float32)
+        alpha_x = max(0.001, alpha_x)
+        alpha_y = max(0.001, alpha_y)
+
+        for i in prange(num_vertices):
+            n = normals[i]
+
+            view_dir = camera_pos - vertices[i]
+            view_dist = np.sqrt(np.sum(view_dir * view_dir))
+            if view_dist > 1e-8:
+                view_dir = view_dir / view_dist
+
+            half_vector = light_dirs[i] + view_dir
+            half_dist = np.sqrt(np.sum(half_vector * half_vector))
+            if half_dist > 1e-8:
+                half_vector = half_vector / half_dist
+
+            n_dot_h = max(0.0, np.sum(n * half_vector))
+            if not use_ward:
+                spec[i] = n_dot_h ** shininess
+            else:
+                n_dot_v = max(0.001, np.sum(n * view_dir))
+                if n_dot_l[i] >= 0.001 and n_dot_v >= 0.001 and n_dot_h >= 0.001:
+                    h_t = np.sum(half_vector * tangents[i]) / alpha_x
+                    h_b = np.sum(half_vector * bitangents[i]) / alpha_y
+                    exponent = (h_t * h_t + h_b * h_b) / (n_dot_h * n_dot_h)
+                    denominator = 4.0 * np.pi * alpha_x * alpha_y * np.sqrt(n_dot_l[i] * n_dot_v)
+                    if exponent <= 20.0 and denominator > 0.0001:
+                        spec[i] = np.exp(-exponent) / denominator
+
+        return spec
+
+
+    @jit((points, points, points, values, points, points, vec3, boolean, values, float64, float64, float64),
+         nopython=True, parallel=True, nogil=True, cache=True)
+    def compute_specular_table_numba(vertices, normals, light_dirs, n_dot_l, tangents, bitangents, camera_pos,
+                                     use_ward, row, column_scale, alpha_x, alpha_y):
+        # compute_specular_numba with the lobe read from a BrdfTables row (no pow / exp)
+        num_vertices = vertices.shape[0]
+        spec = np.zeros(num_vertices, dtype=np.float32)
+        last = row.shape[0] - 1
+        alpha_x = max(0.001, alpha_x)
+        alpha_y = max(0.001, alpha_y)
+
+        for i in prange(num_vertices):
+            n = normals[i]
+
+            view_dir = camera_pos - vertices[i]
+            view_dist = np.sqrt(np.sum(view_dir * view_dir))
+            if view_dist > 1e-8:
+                view_dir = view_dir / view_dist
+
+            half_vector = light_dirs[i] + view_dir
+            half_dist = np.sqrt(np.sum(half_vector * half_vector))
+            if half_dist > 1e-8:
+                half_vector = half_vector / half_dist
+
+            n_dot_h = max(0.0, np.sum(n * half_vector))
+            column = -1.0
+            scale = 1.0
+            if not use_ward:
+                column = np.sqrt(max(0.0, 1.0 - n_dot_h)) * column_scale
+            else:
+                n_dot_v = max(0.001, np.sum(n * view_dir))
+                if n_dot_l[i] >= 0.001 and n_dot_v >= 0.001 and n_dot_h >= 0.001:
+                    denominator = 4.0 * np.pi * alpha_x * alpha_y * np.sqrt(n_dot_l[i] * n_dot_v)
+                    if denominator > 0.0001:
+                        # the Ward table is exp(-x) over the exponent alone, the alphas go in here
+                        h_t = np.sum(half_vector * tangents[i]) / alpha_x
+                        h_b = np.sum(half_vector * bitangents[i]) / alpha_y
+                        column = (h_t * h_t + h_b * h_b) / (n_dot_h * n_dot_h) * column_scale
+                        scale = 1.0 / denominator
+
+            if 0.0 <= column < last:
+                c0 = int(column)
+                weight = column - c0
+                spec[i] = (row[c0] + weight * (row[c0 + 1] - row[c0])) * scale
+
+        return spec
@@ -1,6 +1,7 @@
 from psychopy import visual, core, event
 from pyglet.gl import *
-import random
+
+from MicrofacetNormals import microfacet_normals
 
 
 #HAVE TO FIX THE GROUND TEXTURE FOR THE MICROFACETS STUFF IN THE REFLECTION
@@ -13,6 +14,20 @@ class SpecularStreakScene:
         self.setup_lighting()
         print("Setting up camera...")
         self.setup_camera()
+
+        # floor parameters, changing one through set_floor_params recompiles the floor
+        self.floor_size = 40.0
+        self.divisions = 120
+        self.shininess = 128.0  # Higher shininess for sharp highlights
+        self.jitter_x = 0.3
+        self.jitter_z = 0.05  # Less variation in Z
+        self.normal_seed = 0
+        self.floor_params = ('floor_size', 'divisions', 'shininess', 'jitter_x', 'jitter_z', 'normal_seed')
+
+        # static floor compiled into a display list (use_display_list False = re-emit every frame)
+        self.use_display_list = True
+        self.floor_list = None
+        self.floor_dirty = True
         print("Scene initialization complete")
 
     def setup_opengl(self):
@@ -68,7 +83,7 @@ class SpecularStreakScene:
         mat_ambient = (GLfloat * 4)(0.01, 0.01, 0.01, 0.01)  # Darker ambient
         mat_diffuse = (GLfloat * 4)(0.02, 0.02, 0.02, 1.0)  # Darker diffuse
         mat_specular = (GLfloat * 4)(1.0, 1.0, 1.0, 1.0)  # Bright specular
-        mat_shininess = (GLfloat * 1)(128.0)  # Higher shininess for sharp highlights
+        mat_shininess = (GLfloat * 1)(self.shininess)
 
         glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT, mat_ambient)
         glMaterialfv(GL_FRONT_AND_BACK, GL_DIFFUSE, mat_diffuse)
@@ -78,17 +93,13 @@ class SpecularStreakScene:
         glColor3f(1.0, 1.0, 1.0)  # Reset color
 
         # Tessellation parameters
-        floor_size = 40.0
-        divisions = 120
+        floor_size = self.floor_size
+        divisions = self.divisions
         step = floor_size / divisions
 
-        def jittered_normal():
-            nx = random.uniform(-0.3, 0.3)
-            ny = 1.0
-            nz = random.uniform(-0.05, 0.05)  # Less variation in Z
-            # Normalize the perturbed normal
-            length = (nx ** 2 + ny ** 2 + nz ** 2) ** 0.5
-            return (nx / length, ny / length, nz / length)
+        # one normal per triangle corner, seeded so the compiled floor is the same field every time
+        normals = iter(microfacet_normals(divisions * divisions * 6, 'uniform', seed=self.normal_seed,
+                                          range_x=self.jitter_x, range_z=self.jitter_z).tolist())
 
         glBegin(GL_TRIANGLES)
 
@@ -101,18 +112,42 @@ class SpecularStreakScene:
 
                 # Triangle 1
                 for (x, z) in [(x1, z1), (x2, z1), (x1, z2)]:
-                    nx, ny, nz = jittered_normal()
+                    nx, ny, nz = next(normals)
                     glNormal3f(nx, ny, nz)
                     glVertex3f(x, 0.0, z)
 
                 # Triangle 2
                 for (x, z) in [(x2, z1), (x2, z2), (x1, z2)]:
-                    nx, ny, nz = jittered_normal()
+                    nx, ny, nz = next(normals)
                     glNormal3f(nx, ny, nz)
                     glVertex3f(x, 0.0, z)
 
         glEnd()
 
+    def set_floor_params(self, **params):
+        # only a real change marks the compiled floor dirty
+        for name, value in params.items():
+            if name not in self.floor_params:
+                raise AttributeError(f"Unknown floor parameter '{name}'")
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self.floor_dirty = True
+
+    def draw_floor(self):
+        if not self.use_display_list:
+            self.create_glossy_floor()
+            return
+
+        # compile once, replay every frame
+        if self.floor_dirty or self.floor_list is None:
+            if self.floor_list is None:
+                self.floor_list = glGenLists(1)
+            glNewList(self.floor_list, GL_COMPILE)
+            self.create_glossy_floor()
+            glEndList()
+            self.floor_dirty = False
+        glCallList(self.floor_list)
+
     def render_frame(self):
         #render 1 frame but its always 1 frame anyway coz no movement
         try:
@@ -133,7 +168,7 @@ class SpecularStreakScene:
             glPushMatrix()
 
             # glossy floor
-            self.create_glossy_floor()
+            self.draw_floor()
 
             glPopMatrix()
 
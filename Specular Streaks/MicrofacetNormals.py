@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+import numpy as np
+
+# Shared microfacet normal fields for the specular scenes (replaces the per-vertex jittered_normal loops)
+# normals are perturbations of the floor normal (0, 1, 0): x across the floor, z along it
+# seeded fields are cached as .npy so the same roughness loads instantly for every session and both eyes
+
+cache_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MicrofacetCache')
+
+DISTRIBUTIONS = ['gaussian', 'uniform', 'beckmann', 'anisotropic']
+
+# parameters each distribution understands, with defaults
+DEFAULT_PARAMS = {
+    'gaussian': {'sigma_x': 0.1, 'sigma_z': 0.02},  # std of the x / z normal components before normalizing
+    'uniform': {'range_x': 0.3, 'range_z': 0.05},  # components drawn from [-range, range]
+    'beckmann': {'roughness': 0.1},  # isotropic Beckmann alpha
+    'anisotropic': {'roughness_x': 0.3, 'roughness_z': 0.05},  # anisotropic Beckmann (slope) alphas
+}
+
+
+def _sample(count, distribution, params, rng):
+    normals = np.empty((count, 3), dtype=np.float32)
+    normals[:, 1] = 1.0
+
+    if distribution == 'gaussian':
+        normals[:, 0] = rng.standard_normal(count, dtype=np.float32) * params['sigma_x']
+        normals[:, 2] = rng.standard_normal(count, dtype=np.float32) * params['sigma_z']
+    elif distribution == 'uniform':
+        normals[:, 0] = rng.uniform(-params['range_x'], params['range_x'], count)
+        normals[:, 2] = rng.uniform(-params['range_z'], params['range_z'], count)
+    elif distribution == 'beckmann':
+        # tan^2(theta) = -alpha^2 ln(1 - u), azimuth uniform
+        alpha = params['roughness']
+        tan_theta = np.sqrt(-alpha * alpha * np.log1p(-rng.random(count, dtype=np.float32)))
+        phi = rng.random(count, dtype=np.float32) * np.float32(2.0 * np.pi)
+        normals[:, 0] = tan_theta * np.cos(phi)
+        normals[:, 2] = tan_theta * np.sin(phi)
+    elif distribution == 'anisotropic':
+        # Beckmann slopes are gaussian with std alpha / sqrt(2) along each axis
+        scale = np.float32(1.0 / np.sqrt(2.0))
+        normals[:, 0] = rng.standard_normal(count, dtype=np.float32) * (params['roughness_x'] * scale)
+        normals[:, 2] = rng.standard_normal(count, dtype=np.float32) * (params['roughness_z'] * scale)
+    else:
+        raise ValueError(f"Unknown microfacet distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+
+    normals /= np.sqrt(np.einsum('ij,ij->i', normals, normals))[:, np.newaxis]
+    return normals
+
+
+def cache_path(count, distribution, params, seed):
+    key = repr((distribution, sorted(params.items()), seed, count))
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_folder, f"{distribution}_{count}_seed{seed}_{digest}.npy")
+
+
+def microfacet_normals(count, distribution='gaussian', seed=0, cache=True, **params):
+    # (count, 3) float32 unit normals
+    # seed=None draws a fresh field every call (never cached), like the old per-frame jitter
+    if distribution not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown microfacet distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+    unknown = set(params) - set(DEFAULT_PARAMS[distribution])
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) {sorted(unknown)} for '{distribution}' normals")
+    params = {name: float(params.get(name, default)) for name, default in DEFAULT_PARAMS[distribution].items()}
+
+    if seed is None:
+        return _sample(count, distribution, params, np.random.default_rng())
+
+    path = cache_path(count, distribution, params, seed) if cache else None
+    if path is not None and os.path.exists(path):
+        try:
+            return np.load(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not read cached normals {path}: {e}, regenerating")
+
+    normals = _sample(count, distribution, params, np.random.default_rng(seed))
+
+    if path is not None:
+        try:
+            os.makedirs(cache_folder, exist_ok=True)
+            # write then rename so a half written file is never loaded
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, normals)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache normals to {path}: {e}")
+
+    return normals
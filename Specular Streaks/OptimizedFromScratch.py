@@ -1,76 +1,193 @@
-from psychopy import visual, core, event
-from pyglet.gl import *
-import random
-import numpy as np
-import math
-
-# Test with numba
-try:
-    from numba import jit, prange
-
-    NUMBA_AVAILABLE = True
-    print("Numba available - using accelerated lighting calculations")
-except ImportError:
-    print("Numba not available - using pure NumPy (slower but still optimized)")
-    NUMBA_AVAILABLE = False
-
-
-    # Needed decorator
-    def jit(*args, **kwargs):
-        def decorator(func):
-            return func
-
-        return decorator
+import time
 
+_startup_start = time.perf_counter()
+_startup_marks = []
 
-    def prange(n):
-        return range(n)
 
-# numba test
-if NUMBA_AVAILABLE:
-    @jit(nopython=True, parallel=True)
-    def compute_blinn_phong_numba(vertices, normals, light_pos, camera_pos,
-                                  material_ambient, material_diffuse, material_specular,
-                                  light_ambient, light_diffuse, light_specular, shininess):
-        num_vertices = vertices.shape[0]
-        colors = np.zeros((num_vertices, 3), dtype=np.float32)
+def mark_startup(label):
+    # seconds since the module started importing, printed by startup_report()
+    _startup_marks.append((label, time.perf_counter() - _startup_start))
 
-        for i in prange(num_vertices):
-            # vector compute
-            light_dir = light_pos - vertices[i]
-            light_dist = np.sqrt(np.sum(light_dir * light_dir))
-            if light_dist > 1e-8:
-                light_dir = light_dir / light_dist
 
-            view_dir = camera_pos - vertices[i]
-            view_dist = np.sqrt(np.sum(view_dir * view_dir))
-            if view_dist > 1e-8:
-                view_dir = view_dir / view_dist
-
-            half_vector = light_dir + view_dir
-            half_dist = np.sqrt(np.sum(half_vector * half_vector))
-            if half_dist > 1e-8:
-                half_vector = half_vector / half_dist
+import copy
+import ctypes
+import os
+import random
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+import numpy as np
+import math
 
-            # light components
-            ambient = material_ambient * light_ambient
+from FloorMesh import generate_floor_grid, generate_floor_grid_axes
+from CameraMath import perspective_matrix, look_at_matrix, rotation_matrix
+from FrameProfiler import FrameProfiler
+from MicrofacetNormals import microfacet_normals
+from BrdfTables import blinn_phong_table, ward_table
+from GeometrySnapshots import load_snapshot, source_digest
+from PackedVertices import (packed_vertices, pack_colors, unpacked_bytes, PACKED_STRIDE, POSITION_OFFSET,
+                            NORMAL_OFFSET, COLOR_OFFSET)
+
+mark_startup('imports')
+
+# numba + the lighting kernels load on a background thread while psychopy opens the window
+_kernels = None
+_kernel_thread = None
+
+
+def load_kernels():
+    global _kernels
+    import LightingKernels
+    _kernels = LightingKernels
+    mark_startup('lighting kernels')
+    return _kernels
+
+
+def start_loading_kernels():
+    global _kernel_thread
+    if _kernels is None and _kernel_thread is None:
+        _kernel_thread = threading.Thread(target=load_kernels, daemon=True)
+        _kernel_thread.start()
+
+
+def get_kernels():
+    if _kernels is None:
+        if _kernel_thread is not None:
+            _kernel_thread.join()
+        if _kernels is None:
+            load_kernels()
+    return _kernels
+
+
+# pyglet.gl is bound on the first scene, when psychopy (or the caller) already has a GL context
+_gl_loaded = False
+
+
+def load_gl():
+    # same names as `from pyglet.gl import *`, into this module
+    global _gl_loaded
+    if not _gl_loaded:
+        import pyglet.gl
+        names = getattr(pyglet.gl, '__all__', None) or [name for name in dir(pyglet.gl) if not name.startswith('_')]
+        globals().update({name: getattr(pyglet.gl, name) for name in names})
+        _gl_loaded = True
+        mark_startup('pyglet.gl')
+
+
+def startup_report():
+    previous = 0.0
+    print("Startup:")
+    for label, elapsed in _startup_marks:
+        print(f"  {label:24s} +{1000 * (elapsed - previous):7.1f} ms  ({elapsed:.2f} s)")
+        previous = elapsed
+    return previous
+
+
+# per stage frame timings (CSV + Chrome trace) are written here on exit
+profile_folder = 'FrameProfiles'
+
+# seconds from launch to the participant ready screen before a warning is printed
+startup_budget = 2.0
+
+
+class LitColorCache:
+    # LRU of computed floor_colors arrays keyed by the full lighting state, capped in bytes
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        colors = self.entries.get(key)
+        if colors is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return colors
 
-            n_dot_l = max(0.0, np.sum(normals[i] * light_dir))
-            diffuse = material_diffuse * light_diffuse * n_dot_l
+    def put(self, key, colors):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key).nbytes
+        # too big to ever fit, don't flush everything else for it
+        if colors.nbytes > self.max_bytes:
+            return
+        self.entries[key] = colors
+        self.total_bytes += colors.nbytes
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        return (f"color cache {self.hits} hits / {self.misses} misses, "
+                f"{len(self.entries)} entries, {self.total_bytes / (1024 * 1024):.1f} MB")
+
+
+class LightingWorker:
+    # relights on a background thread so the render loop never waits for it
+    # one pending slot: a new request replaces one that has not started yet (coalescing),
+    # the finished colors wait in a ready slot until the render thread swaps them in (GL calls stay there)
+    def __init__(self, compute):
+        self.compute = compute  # (snapshot, vertices, normals) -> colors
+        self.coalesced = 0
+        self.completed = 0
+        self._condition = threading.Condition()
+        self._pending = None
+        self._ready = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, sequence, snapshot, vertices, normals):
+        with self._condition:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (key, sequence, snapshot, vertices, normals)
+            self._condition.notify()
+
+    def take_ready(self):
+        # (key, sequence, snapshot, colors) or None, each result is handed out once
+        with self._condition:
+            ready, self._ready = self._ready, None
+            return ready
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                key, sequence, snapshot, vertices, normals = self._pending
+                self._pending = None
 
-            n_dot_h = max(0.0, np.sum(normals[i] * half_vector))
-            spec_power = n_dot_h ** shininess
-            specular = material_specular * light_specular * spec_power
+            try:
+                colors = self.compute(snapshot, vertices, normals)
+            except Exception as e:
+                print(f"Background lighting failed: {e}")
+                continue
 
-            # clamp
-            color = ambient + diffuse + specular
-            colors[i] = np.clip(color, 0.0, 1.0)
+            with self._condition:
+                # an unclaimed older result is simply replaced
+                self._ready = (key, sequence, snapshot, colors)
+                self.completed += 1
 
-        return colors
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join(timeout=5.0)
 
 
 class OptimizedSpecularStreakScene:
     def __init__(self, win):
+        load_gl()
         self.win = win
         print("Setting up OpenGL...")
         self.setup_opengl()
@@ -81,18 +198,73 @@ class OptimizedSpecularStreakScene:
         self.angle_x = 0
         self.angle_z = 0
 
+        # horizontal camera shift for stereo pairs (0 = cyclopean view)
+        self.eye_offset_x = 0.0
+        self.interocular_distance = 0.065  # render_stereo_pair, scene units (metres)
+
         # Store original positions for transformation
         self.original_light_pos = np.array([0.0, 1.0, -100.0], dtype=np.float32)
         self.original_camera_pos = np.array([0.0, 1.5, 0.0], dtype=np.float32)
 
         # Cache for expensive calculations
-        self._rotation_cache = {}
+        self.color_cache = LitColorCache()
         self._geometry_cache = None
+        self._geometry_version = 0
+
+        # floor rect (x centered, z in [-size_z, 0]) and tessellation (grid cells, 2 triangles each)
+        self.floor_size_x = 10.0
+        self.floor_size_z = 20.0
+        self.floor_divisions_x = 25
+        self.floor_divisions_z = 100
+
+        # microfacet normals: std of the x / z components, seeded so every run and machine gets the same floor
+        self.floor_normal_sigma = 0.1
+        self.floor_seed = 42
 
         # Rendering method selection
         self.use_vertex_arrays = True
         self.rendering_method = "vertex_arrays"  # or "immediate_mode"
 
+        # floor lives in GPU buffers, geometry uploaded once and colors updated in place
+        self.use_gpu_buffers = True
+        self.floor_buffers = None
+        self._buffer_geometry = None
+        self._buffer_colors = None
+
+        # what the GPU / client arrays draw: floor_packed interleaves position, 10 bit normals and uint8 colors
+        # (PackedVertices), the float32 floor_* arrays stay for the CPU lighting and SoftwareRasterizer
+        self.floor_packed = None
+        self.floor_color_stream = None  # floor_packed['color'] as its own contiguous array for the color buffer
+        self._packed_geometry = None
+        self._packed_colors = None
+
+        # per fragment GLSL lighting (streak.vert / streak.frag), built on first use
+        self.use_shader = False
+        self.shader_program = None
+
+        # normal map mode (GLSL only): microfacet normals in a float texture on a single floor quad,
+        # roughness detail set by the texture resolution instead of the tessellation
+        self.use_normal_map = False
+        self.normal_map_size = 2048  # texels per side, 4096 works too
+        self.normal_map_texture = None
+        self.normal_map_vao = None
+
+        # optional FrameProfiler, times the lighting and upload stages when set
+        self.profiler = None
+
+        # specular lobes from BrdfTables instead of pow / exp in the numba kernels (NumPy stays exact, its
+        # vectorized pow / exp beat a table gather), checked per material against the exact BRDF on a vertex
+        # sample, a material whose colors differ by more than the tolerance is evaluated exactly
+        self.use_brdf_tables = False
+        self.brdf_table_tolerance = 1e-3
+        self._brdf_table_checks = {}  # material -> passed
+
+        # background relighting for the interactive loop (start_async_lighting), off = relight in place
+        self.lighting_worker = None
+        self._lighting_sequence = 0  # bumped for every lighting state asked for
+        self._displayed_sequence = 0  # newest state on screen, older background results are not shown
+        self._requested = None  # (key, sequence) of the newest submitted job
+
         print("Generating floor geometry...")
         self.generate_floor_geometry()
         print("Scene initialization complete")
@@ -115,7 +287,10 @@ class OptimizedSpecularStreakScene:
             'diffuse': np.array([0.0, 0.0, 0.0], dtype=np.float32),
             'specular': np.array([1.0, 1.0, 1.0], dtype=np.float32),
             'shininess': 128.0,
-            'roughness': 0.05
+            'roughness': 0.05,
+            # anisotropic Ward, None = use 'roughness' for that axis
+            'roughness_x': None,
+            'roughness_y': None
         }
 
         self.light = {
@@ -126,6 +301,15 @@ class OptimizedSpecularStreakScene:
 
         self.use_ward = False
 
+    def get_ward_alphas(self):
+        alpha_x = self.material['roughness_x']
+        alpha_y = self.material['roughness_y']
+        if alpha_x is None:
+            alpha_x = self.material['roughness']
+        if alpha_y is None:
+            alpha_y = self.material['roughness']
+        return float(alpha_x), float(alpha_y)
+
     def get_rotation_matrix_x(self, angle_deg):
         angle_rad = math.radians(angle_deg)
         cos_a = math.cos(angle_rad)
@@ -147,17 +331,11 @@ class OptimizedSpecularStreakScene:
         ], dtype=np.float32)
 
     def get_inverse_rotation_matrix(self):
-        # cache key to not compute everysingle time
-        cache_key = (round(self.angle_x, 2), round(self.angle_z, 2))
-
-        if cache_key not in self._rotation_cache:
-            # inverse rot
-            rot_z = self.get_rotation_matrix_z(-self.angle_z)
-            rot_x = self.get_rotation_matrix_x(-self.angle_x)
-            # same order
-            self._rotation_cache[cache_key] = np.dot(rot_z, rot_x)
-
-        return self._rotation_cache[cache_key]
+        # inverse rot (cheap, the expensive part is cached in color_cache)
+        rot_z = self.get_rotation_matrix_z(-self.angle_z)
+        rot_x = self.get_rotation_matrix_x(-self.angle_x)
+        # same order
+        return np.dot(rot_z, rot_x)
 
     def update_lighting_positions(self):
         inv_rotation = self.get_inverse_rotation_matrix()
@@ -173,72 +351,186 @@ class OptimizedSpecularStreakScene:
         if self._geometry_cache is not None:
             return self._geometry_cache
 
-        floor_size_z = 20.0
-        floor_size_x = 10.0
-        divisions_x = 25
-        divisions_z = 100
+        # built once per parameter set, then loaded from GeometrySnapshots (same floor on every lab machine)
+        params = {
+            'size': (self.floor_size_x, self.floor_size_z),
+            'divisions': (self.floor_divisions_x, self.floor_divisions_z),
+            'normal_sigma': self.floor_normal_sigma,
+            'seed': self.floor_seed,
+            'generator': source_digest(generate_floor_grid, generate_floor_grid_axes,
+                                       OptimizedSpecularStreakScene.build_floor_geometry),
+        }
+        arrays = load_snapshot('floor', params, self.build_floor_geometry)
+        vertices, normals, indices = arrays['vertices'], arrays['normals'], arrays['indices']
+
+        self._geometry_cache = (vertices, normals, indices)
+        self._geometry_version += 1
+        return vertices, normals, indices
+
+    def build_floor_geometry(self):
+        floor_size_z = self.floor_size_z
+        floor_size_x = self.floor_size_x
+
+        # shared grid vertices + index buffer (floor spans z in [-20, 0])
+        vertices, indices = generate_floor_grid(floor_size_x, floor_size_z,
+                                                self.floor_divisions_x, self.floor_divisions_z,
+                                                x_min=-floor_size_x / 2, z_min=-floor_size_z)
+        num_vertices = len(vertices)
+
+        # pre gen, float32 throughout so millions of vertices stay fast
+        rng = np.random.default_rng(self.floor_seed)
+        normals = np.empty((num_vertices, 3), dtype=np.float32)
+        normals[:, 0] = rng.standard_normal(num_vertices, dtype=np.float32) * self.floor_normal_sigma
+        normals[:, 1] = 1.0  # need y as 1
+        normals[:, 2] = rng.standard_normal(num_vertices, dtype=np.float32) * self.floor_normal_sigma
 
-        # Pregeo
-        num_triangles = divisions_x * divisions_z * 2
-        num_vertices = num_triangles * 3
+        # normalize all at once
+        normals /= np.sqrt(np.einsum('ij,ij->i', normals, normals))[:, np.newaxis]
 
-        vertices = np.zeros((num_vertices, 3), dtype=np.float32)
-        normals = np.zeros((num_vertices, 3), dtype=np.float32)
+        return {'vertices': vertices, 'normals': normals, 'indices': indices}
 
-        step_x = floor_size_x / divisions_x
-        step_z = floor_size_z / divisions_z
+    def lighting_state_key(self):
+        # everything the lit colors depend on, rounded so +0.01/-0.01 steps land on the same key
+        def values(array):
+            return tuple(round(float(v), 6) for v in np.ravel(array))
 
-        # pre gen
-        np.random.seed(42)
-        normal_variations = np.random.normal(0, [0.1, 0.0, 0.1], (num_vertices, 3))
-        normal_variations[:, 1] = 1.0  # need y as 1
+        material_key = tuple(
+            (name, values(value) if value is not None else None)
+            for name, value in sorted(self.material.items())
+        )
+        light_key = tuple((name, values(value)) for name, value in sorted(self.light.items()))
+        return (round(float(self.angle_x), 6), round(float(self.angle_z), 6),
+                values(self.original_light_pos), values(self.original_camera_pos),
+                material_key, light_key, 'ward' if self.use_ward else 'blinn_phong',
+                self.use_brdf_tables, self._geometry_version)
+
+    def profile_stage(self, name):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name)
+
+    def get_lit_colors(self, vertices, normals):
+        key = self.lighting_state_key()
+        colors = self.color_cache.get(key)
+        if colors is not None:
+            print(f"Lighting cache hit ({self.color_cache.stats()})")
+            return colors
+
+        with self.profile_stage('lighting'):
+            colors = np.ascontiguousarray(self.compute_lighting_vectorized(vertices, normals), dtype=np.float32)
+        # cached arrays are shared, never write into them
+        colors.setflags(write=False)
+        self.color_cache.put(key, colors)
+        return colors
 
-        # normalize all at once
-        norms = np.linalg.norm(normal_variations, axis=1, keepdims=True)
-        normals = normal_variations / norms
-
-        idx = 0
-        for i in range(divisions_x):
-            for j in range(divisions_z):
-                x1 = -floor_size_x / 2 + i * step_x
-                x2 = x1 + step_x
-                z1 = -floor_size_z + j * step_z
-                z2 = z1 + step_z
-
-                # Triangle 1 vertices
-                vertices[idx:idx + 3] = [
-                    [x1, 0.0, z1],
-                    [x2, 0.0, z1],
-                    [x1, 0.0, z2]
-                ]
-
-                # Triangle 2 vertices
-                vertices[idx + 3:idx + 6] = [
-                    [x2, 0.0, z1],
-                    [x2, 0.0, z2],
-                    [x1, 0.0, z2]
-                ]
-
-                idx += 6
-
-        self._geometry_cache = (vertices, normals)
-        return vertices, normals
+    def start_async_lighting(self):
+        if self.lighting_worker is None:
+            self.lighting_worker = LightingWorker(self.compute_snapshot_colors)
+            print("Background lighting enabled")
+
+    def stop_async_lighting(self):
+        if self.lighting_worker is not None:
+            self.lighting_worker.stop()
+            print(f"Background lighting: {self.lighting_worker.completed} relights, "
+                  f"{self.lighting_worker.coalesced} superseded requests skipped")
+            self.lighting_worker = None
+
+    def lighting_snapshot(self):
+        # private copy of what the lighting code reads, the render thread keeps changing the originals
+        # a shallow copy otherwise, so every dict / cache the lighting code could fill is copied or cut off here
+        def copied(values):
+            return {name: np.copy(value) if isinstance(value, np.ndarray) else value
+                    for name, value in values.items()}
+
+        snapshot = copy.copy(self)
+        snapshot.light_pos = np.copy(self.light_pos)
+        snapshot.camera_pos = np.copy(self.camera_pos)
+        snapshot.material = copied(self.material)
+        snapshot.light = copied(self.light)
+        snapshot._brdf_table_checks = dict(self._brdf_table_checks)
+        snapshot.color_cache = None  # results go into the cache on the render thread (poll_lighting)
+        snapshot.lighting_worker = None
+        snapshot.profiler = None
+        return snapshot
+
+    @staticmethod
+    def compute_snapshot_colors(snapshot, vertices, normals):
+        return np.ascontiguousarray(snapshot.compute_lighting_vectorized(vertices, normals), dtype=np.float32)
+
+    def request_lit_colors(self, vertices, normals):
+        # same as get_lit_colors without the worker
+        # with it: cached colors right away, otherwise None (keep the current colors) and relight in the background
+        if self.lighting_worker is None:
+            return self.get_lit_colors(vertices, normals)
+
+        key = self.lighting_state_key()
+        colors = self.color_cache.get(key)
+        if colors is not None:
+            self._lighting_sequence += 1
+            self._displayed_sequence = self._lighting_sequence
+            return colors
+
+        if self._requested is not None and self._requested[0] == key and \
+                self._requested[1] > self._displayed_sequence:
+            return None  # already on its way
+
+        self._lighting_sequence += 1
+        self._requested = (key, self._lighting_sequence)
+        # the BRDF table check of a new material runs here, so the worker only reads its result
+        self.checked_brdf_lookup(vertices, normals)
+        snapshot = self.lighting_snapshot()
+        self.lighting_worker.submit(key, self._lighting_sequence, snapshot, vertices, normals)
+        return None
+
+    def poll_lighting(self):
+        # render thread, once per frame: swap in finished background colors, True if the floor changed
+        if self.lighting_worker is None:
+            return False
+        ready = self.lighting_worker.take_ready()
+        if ready is None:
+            return False
+
+        key, sequence, snapshot, colors = ready
+        colors.setflags(write=False)
+        self.color_cache.put(key, colors)
+
+        # superseded by something already shown, built on old geometry (R key), or the shader path is lighting
+        if sequence <= self._displayed_sequence or key[-1] != self._geometry_version or self.use_shader:
+            return False
+
+        self._displayed_sequence = sequence
+        vertices, normals, indices = self.generate_floor_geometry_static()
+        self.store_floor_arrays(vertices, normals, colors, indices)
+        return True
 
     def compute_lighting_vectorized(self, vertices, normals):
+        lookup = self.checked_brdf_lookup(vertices, normals)
+        if lookup is not None:
+            return self.compute_lighting_from_tables(vertices, normals, lookup)
+
         if self.use_ward:
             print("Using Ward BRDF lighting...")
-            return self.compute_ward_lighting_fallback(vertices, normals)
+
+            kernels = get_kernels()
+            if kernels.NUMBA_AVAILABLE:
+                try:
+                    alpha_x, alpha_y = self.get_ward_alphas()
+                    colors = kernels.compute_ward_numba(*self.kernel_arguments(vertices, normals),
+                                                        float(alpha_x), float(alpha_y))
+                    print(f"Numba: Computed {len(colors)} colors, range: {np.min(colors):.3f} to {np.max(colors):.3f}")
+                    return colors
+                except Exception as e:
+                    print(f"Numba calculation failed: {e}, falling back to NumPy")
+
+            return self.compute_ward_numpy(vertices, normals)
         else:
             print("Using Blinn-Phong lighting...")
 
-            if NUMBA_AVAILABLE:
+            kernels = get_kernels()
+            if kernels.NUMBA_AVAILABLE:
                 try:
-                    colors = compute_blinn_phong_numba(
-                        vertices, normals, self.light_pos, self.camera_pos,
-                        self.material['ambient'], self.material['diffuse'], self.material['specular'],
-                        self.light['ambient'], self.light['diffuse'], self.light['specular'],
-                        self.material['shininess']
-                    )
+                    colors = kernels.compute_blinn_phong_numba(*self.kernel_arguments(vertices, normals),
+                                                               float(self.material['shininess']))
                     print(f"Numba: Computed {len(colors)} colors, range: {np.min(colors):.3f} to {np.max(colors):.3f}")
                     return colors
                 except Exception as e:
@@ -247,6 +539,64 @@ class OptimizedSpecularStreakScene:
             # pure numpy
             return self.compute_blinn_phong_numpy(vertices, normals)
 
+    def brdf_table_lookup(self):
+        # (table row, column scale) for the current material, None = evaluate the BRDF exactly
+        if not self.use_brdf_tables or not get_kernels().NUMBA_AVAILABLE:
+            return None
+        if self.use_ward:
+            table, param = ward_table(), max(0.001, *self.get_ward_alphas())
+        else:
+            table, param = blinn_phong_table(), float(self.material['shininess'])
+        row = table.row(param)
+        if row is None:
+            return None
+        return row, float(table.column_scale(param))
+
+    def checked_brdf_lookup(self, vertices, normals, num_samples=2000):
+        # brdf_table_lookup once its material passed the error check
+        lookup = self.brdf_table_lookup()
+        if lookup is None:
+            return None
+
+        material = ('ward', self.get_ward_alphas()) if self.use_ward else ('blinn_phong', self.material['shininess'])
+        material += (tuple(np.ravel(self.material['specular'] * self.light['specular']).tolist()),
+                     self.brdf_table_tolerance)
+        if material not in self._brdf_table_checks:
+            sample = np.random.default_rng(0).choice(len(vertices), min(num_samples, len(vertices)), replace=False)
+            sample_vertices = np.ascontiguousarray(vertices[sample])
+            sample_normals = np.ascontiguousarray(normals[sample])
+            shared = self.compute_shared_lighting(sample_vertices, sample_normals)
+            specular_color = self.material['specular'] * self.light['specular']
+
+            colors = {}
+            for name, table_lookup in [('exact', None), ('table', lookup)]:
+                spec = self.compute_specular_term(sample_vertices, sample_normals, shared, self.camera_pos,
+                                                  table_lookup)
+                colors[name] = np.clip(shared['base'] + specular_color * spec[:, np.newaxis], 0.0, 1.0)
+            max_error = float(np.max(np.abs(colors['table'] - colors['exact'])))
+            passed = max_error <= self.brdf_table_tolerance
+            self._brdf_table_checks[material] = passed
+            print(f"BRDF table ({material[0]}): max color error {max_error:.2e} "
+                  f"{'OK' if passed else f'over {self.brdf_table_tolerance:.0e}, using the exact BRDF'}")
+
+        return lookup if self._brdf_table_checks[material] else None
+
+    def compute_lighting_from_tables(self, vertices, normals, lookup):
+        shared = self.compute_shared_lighting(vertices, normals)
+        spec = self.compute_specular_term(vertices, normals, shared, self.camera_pos, lookup)
+        colors = np.clip(shared['base'] + self.material['specular'] * self.light['specular'] * spec[:, np.newaxis],
+                         0.0, 1.0)
+        print(f"BRDF table: Computed {len(colors)} colors, range: {np.min(colors):.3f} to {np.max(colors):.3f}")
+        return colors.astype(np.float32)
+
+    def kernel_arguments(self, vertices, normals):
+        # the kernels have fixed float32 signatures, rotated light/camera positions come out as float64
+        as_f32 = get_kernels().as_f32
+        return (as_f32(vertices), as_f32(normals), as_f32(self.light_pos), as_f32(self.camera_pos),
+                as_f32(self.material['ambient']), as_f32(self.material['diffuse']),
+                as_f32(self.material['specular']), as_f32(self.light['ambient']),
+                as_f32(self.light['diffuse']), as_f32(self.light['specular']))
+
     def compute_blinn_phong_numpy(self, vertices, normals):
         #numpy only
         print("Using pure NumPy Blinn-Phong implementation...")
@@ -282,21 +632,198 @@ class OptimizedSpecularStreakScene:
         print(f"NumPy: Computed {len(colors)} colors, range: {np.min(colors):.3f} to {np.max(colors):.3f}")
         return colors.astype(np.float32)
 
-    def compute_ward_lighting_fallback(self, vertices, normals):
-        #still base ward
-        colors = np.zeros((len(vertices), 3), dtype=np.float32)
+    def compute_ward_numpy(self, vertices, normals, alpha_x=None, alpha_y=None):
+        #numpy only, anisotropic (alpha_x along the floor x axis)
+        if alpha_x is None or alpha_y is None:
+            alpha_x, alpha_y = self.get_ward_alphas()
+        alpha_x = max(0.001, alpha_x)
+        alpha_y = max(0.001, alpha_y)
 
-        for i, (vertex, normal) in enumerate(zip(vertices, normals)):
-            try:
-                color = self.ward_lighting_single(vertex, normal, self.camera_pos, self.light_pos)
-                colors[i] = color
-            except:
-                colors[i] = np.array([0.1, 0.1, 0.1])
+        light_dirs = self.light_pos[np.newaxis, :] - vertices
+        light_dirs = light_dirs / np.maximum(np.linalg.norm(light_dirs, axis=1, keepdims=True), 1e-8)
+
+        view_dirs = self.camera_pos[np.newaxis, :] - vertices
+        view_dirs = view_dirs / np.maximum(np.linalg.norm(view_dirs, axis=1, keepdims=True), 1e-8)
+
+        half_vectors = light_dirs + view_dirs
+        half_vectors = half_vectors / np.maximum(np.linalg.norm(half_vectors, axis=1, keepdims=True), 1e-8)
+
+        ambient = np.tile(self.material['ambient'] * self.light['ambient'], (len(vertices), 1))
+
+        n_dot_l = np.maximum(0.0, np.sum(normals * light_dirs, axis=1))
+        diffuse = self.material['diffuse'] * self.light['diffuse'] * n_dot_l[:, np.newaxis]
+
+        # same safety checks as ward_lighting_single
+        n_dot_v = np.maximum(0.001, np.sum(normals * view_dirs, axis=1))
+        n_dot_h = np.maximum(0.0, np.sum(normals * half_vectors, axis=1))
+        valid = (n_dot_l >= 0.001) & (n_dot_v >= 0.001) & (n_dot_h >= 0.001)
+
+        tangents, bitangents = self.ward_tangent_frame(normals)
+
+        h_t = np.sum(half_vectors * tangents, axis=1) / alpha_x
+        h_b = np.sum(half_vectors * bitangents, axis=1) / alpha_y
+        safe_n_dot_h = np.where(valid, n_dot_h, 1.0)
+        exponent = (h_t * h_t + h_b * h_b) / (safe_n_dot_h * safe_n_dot_h)
+        denominator = 4.0 * math.pi * alpha_x * alpha_y * np.sqrt(n_dot_l * n_dot_v)
+
+        valid &= (exponent <= 20.0) & (denominator > 0.0001)
+        ward_spec = np.zeros(len(vertices))
+        ward_spec[valid] = np.exp(-exponent[valid]) / denominator[valid]
+        specular = self.material['specular'] * self.light['specular'] * ward_spec[:, np.newaxis]
+
+        colors = np.clip(ambient + diffuse + specular, 0.0, 1.0)
+        print(f"NumPy: Computed {len(colors)} colors, range: {np.min(colors):.3f} to {np.max(colors):.3f}")
+        return colors.astype(np.float32)
+
+    def ward_tangent_frame(self, normals):
+        # tangent frame from the world x axis (z if the normal is along x)
+        tangents = np.array([1.0, 0.0, 0.0]) - normals * normals[:, 0:1]
+        t_len = np.linalg.norm(tangents, axis=1)
+        degenerate = t_len < 1e-8
+        if np.any(degenerate):
+            tangents[degenerate] = np.array([0.0, 0.0, 1.0]) - normals[degenerate] * normals[degenerate, 2:3]
+            t_len[degenerate] = np.linalg.norm(tangents[degenerate], axis=1)
+        tangents = tangents / t_len[:, np.newaxis]
+        return tangents, np.cross(normals, tangents)
+
+    def compute_shared_lighting(self, vertices, normals):
+        # everything that does not depend on the eye: light dirs, n.l, ambient + diffuse, Ward tangent frame
+        light_dirs = self.light_pos[np.newaxis, :] - vertices
+        light_dirs = light_dirs / np.maximum(np.linalg.norm(light_dirs, axis=1, keepdims=True), 1e-8)
+        n_dot_l = np.maximum(0.0, np.sum(normals * light_dirs, axis=1))
+
+        base = (self.material['ambient'] * self.light['ambient']
+                + self.material['diffuse'] * self.light['diffuse'] * n_dot_l[:, np.newaxis])
+
+        if self.use_ward:
+            tangents, bitangents = self.ward_tangent_frame(normals)
+        else:
+            # unused by Blinn-Phong, numba still wants arrays
+            tangents = bitangents = np.zeros((1, 3))
+
+        return {
+            'light_dirs': np.ascontiguousarray(light_dirs, dtype=np.float32),
+            'n_dot_l': np.ascontiguousarray(n_dot_l, dtype=np.float32),
+            'base': base,
+            'tangents': np.ascontiguousarray(tangents, dtype=np.float32),
+            'bitangents': np.ascontiguousarray(bitangents, dtype=np.float32),
+        }
 
+    def compute_specular_term(self, vertices, normals, shared, camera_pos, lookup=None):
+        # scalar specular factor per vertex for one eye, lookup = brdf_table_lookup() to read the lobe from a table
+        # (numba only, the NumPy fallback always evaluates it)
+        alpha_x, alpha_y = self.get_ward_alphas()
+        kernels = get_kernels()
+        if kernels.NUMBA_AVAILABLE and lookup is not None:
+            try:
+                return kernels.compute_specular_table_numba(
+                    kernels.as_f32(vertices), kernels.as_f32(normals), shared['light_dirs'], shared['n_dot_l'],
+                    shared['tangents'], shared['bitangents'], kernels.as_f32(camera_pos), bool(self.use_ward),
+                    lookup[0], lookup[1], float(alpha_x), float(alpha_y))
+            except Exception as e:
+                print(f"Numba table specular failed: {e}, falling back to NumPy")
+        elif kernels.NUMBA_AVAILABLE:
+            try:
+                return kernels.compute_specular_numba(
+                    kernels.as_f32(vertices), kernels.as_f32(normals), shared['light_dirs'], shared['n_dot_l'],
+                    shared['tangents'], shared['bitangents'], kernels.as_f32(camera_pos), bool(self.use_ward),
+                    float(self.material['shininess']), float(alpha_x), float(alpha_y))
+            except Exception as e:
+                print(f"Numba specular failed: {e}, falling back to NumPy")
+
+        view_dirs = np.asarray(camera_pos)[np.newaxis, :] - vertices
+        view_dirs = view_dirs / np.maximum(np.linalg.norm(view_dirs, axis=1, keepdims=True), 1e-8)
+        half_vectors = shared['light_dirs'] + view_dirs
+        half_vectors = half_vectors / np.maximum(np.linalg.norm(half_vectors, axis=1, keepdims=True), 1e-8)
+        n_dot_h = np.maximum(0.0, np.sum(normals * half_vectors, axis=1))
+
+        if not self.use_ward:
+            return np.power(n_dot_h, self.material['shininess'])
+
+        alpha_x = max(0.001, alpha_x)
+        alpha_y = max(0.001, alpha_y)
+        n_dot_l = shared['n_dot_l']
+        n_dot_v = np.maximum(0.001, np.sum(normals * view_dirs, axis=1))
+        valid = (n_dot_l >= 0.001) & (n_dot_v >= 0.001) & (n_dot_h >= 0.001)
+
+        h_t = np.sum(half_vectors * shared['tangents'], axis=1) / alpha_x
+        h_b = np.sum(half_vectors * shared['bitangents'], axis=1) / alpha_y
+        safe_n_dot_h = np.where(valid, n_dot_h, 1.0)
+        exponent = (h_t * h_t + h_b * h_b) / (safe_n_dot_h * safe_n_dot_h)
+        denominator = 4.0 * math.pi * alpha_x * alpha_y * np.sqrt(n_dot_l * n_dot_v)
+
+        valid &= (exponent <= 20.0) & (denominator > 0.0001)
+        spec = np.zeros(len(vertices))
+        spec[valid] = np.exp(-exponent[valid]) / denominator[valid]
+        return spec
+
+    def get_stereo_lit_colors(self, vertices, normals, offsets):
+        # one lit color array per eye offset, the view independent work is done once for all eyes
+        saved_x = self.original_camera_pos[0]
+        inv_rotation = self.get_inverse_rotation_matrix()
+        keys, camera_positions, colors = [], [], []
+        for offset in offsets:
+            self.original_camera_pos[0] = offset
+            keys.append(self.lighting_state_key())
+            camera_positions.append(np.dot(inv_rotation, self.original_camera_pos))
+            colors.append(self.color_cache.get(keys[-1]))
+        self.original_camera_pos[0] = saved_x
+
+        missing = [i for i, eye_colors in enumerate(colors) if eye_colors is None]
+        if missing:
+            with self.profile_stage('lighting'):
+                lookup = self.checked_brdf_lookup(vertices, normals)
+                shared = self.compute_shared_lighting(vertices, normals)
+                specular_color = self.material['specular'] * self.light['specular']
+                for i in missing:
+                    spec = self.compute_specular_term(vertices, normals, shared, camera_positions[i], lookup)
+                    eye_colors = np.clip(shared['base'] + specular_color * spec[:, np.newaxis], 0.0, 1.0)
+                    eye_colors = np.ascontiguousarray(eye_colors, dtype=np.float32)
+                    eye_colors.setflags(write=False)
+                    self.color_cache.put(keys[i], eye_colors)
+                    colors[i] = eye_colors
         return colors
 
-    def ward_lighting_single(self, vertex_pos, normal, view_pos, light_pos):
-        #ward
+    def check_ward_parity(self, vertices, normals, alphas=((0.05, 0.05), (0.02, 0.2), (0.2, 0.02)),
+                          num_samples=500, tolerance=1e-3):
+        # vectorized and numba Ward vs the per vertex ward_lighting_single on a random subset, for every
+        # (alpha_x, alpha_y) in alphas, raises AssertionError on a mismatch (run by CheckWardParity.py)
+        # tolerance is well under one 8-bit display step
+        sample = np.random.default_rng(0).choice(len(vertices), min(num_samples, len(vertices)), replace=False)
+        sample_vertices = np.ascontiguousarray(vertices[sample])
+        sample_normals = np.ascontiguousarray(normals[sample])
+        kernels = get_kernels()
+
+        errors = {}
+        for alpha_x, alpha_y in alphas:
+            reference = np.array([self.ward_lighting_single(v, n, self.camera_pos, self.light_pos, alpha_x, alpha_y)
+                                  for v, n in zip(sample_vertices, sample_normals)], dtype=np.float32)
+            results = {'numpy': self.compute_ward_numpy(sample_vertices, sample_normals, alpha_x, alpha_y)}
+            if kernels.NUMBA_AVAILABLE:
+                results['numba'] = kernels.compute_ward_numba(
+                    *self.kernel_arguments(sample_vertices, sample_normals), float(alpha_x), float(alpha_y))
+            for name, colors in results.items():
+                errors[(name, alpha_x, alpha_y)] = float(np.max(np.abs(colors - reference)))
+
+        mismatches = []
+        for (name, alpha_x, alpha_y), max_error in errors.items():
+            ok = max_error <= tolerance
+            print(f"Ward parity ({name} vs ward_lighting_single, alpha {alpha_x:.3f} x {alpha_y:.3f}): "
+                  f"max error {max_error:.2e} {'OK' if ok else 'MISMATCH'}")
+            if not ok:
+                mismatches.append(f"{name} alpha {alpha_x} x {alpha_y}: {max_error:.2e}")
+        if mismatches:
+            raise AssertionError(f"Ward BRDF differs from ward_lighting_single by more than {tolerance}: "
+                                 + ", ".join(mismatches))
+        return errors
+
+    def ward_lighting_single(self, vertex_pos, normal, view_pos, light_pos, alpha_x=None, alpha_y=None):
+        #ward, anisotropic with alpha_x along the floor x axis (the material's alphas by default)
+        if alpha_x is None or alpha_y is None:
+            alpha_x, alpha_y = self.get_ward_alphas()
+        alpha_x = max(0.001, alpha_x)
+        alpha_y = max(0.001, alpha_y)
+
         pos = np.array(vertex_pos, dtype=np.float32)
         n = np.array(normal, dtype=np.float32)
 
@@ -323,15 +850,23 @@ class OptimizedSpecularStreakScene:
         if n_dot_l < 0.001 or n_dot_v < 0.001 or n_dot_h < 0.001:
             specular = np.array([0.0, 0.0, 0.0])
         else:
-            cos_delta = n_dot_h
-            tan_delta_sq = (1.0 - cos_delta * cos_delta) / (cos_delta * cos_delta)
-            alpha = max(0.001, self.material['roughness'])
-
-            if tan_delta_sq / (alpha * alpha) > 20:
+            # tangent from the world x axis (z if the normal is along x), bitangent = n x t
+            tangent = np.array([1.0, 0.0, 0.0]) - n * n[0]
+            if np.linalg.norm(tangent) < 1e-8:
+                tangent = np.array([0.0, 0.0, 1.0]) - n * n[2]
+            tangent = tangent / np.linalg.norm(tangent)
+            bitangent = np.cross(n, tangent)
+
+            h_t = np.dot(half_vector, tangent) / alpha_x
+            h_b = np.dot(half_vector, bitangent) / alpha_y
+            # isotropic: (h_t^2 + h_b^2) / (n.h)^2 = tan^2(delta) / alpha^2
+            exponent = (h_t * h_t + h_b * h_b) / (n_dot_h * n_dot_h)
+
+            if exponent > 20:
                 ward_spec = 0.0
             else:
-                ward_spec = math.exp(-tan_delta_sq / (alpha * alpha))
-                denominator = 4.0 * math.pi * alpha * alpha * math.sqrt(n_dot_l * n_dot_v)
+                ward_spec = math.exp(-exponent)
+                denominator = 4.0 * math.pi * alpha_x * alpha_y * math.sqrt(n_dot_l * n_dot_v)
                 if denominator > 0.0001:
                     ward_spec /= denominator
                 else:
@@ -346,20 +881,82 @@ class OptimizedSpecularStreakScene:
         self.update_lighting_positions()
 
         # gen static geo
-        vertices, normals = self.generate_floor_geometry_static()
+        vertices, normals, indices = self.generate_floor_geometry_static()
 
-        # light all vert
-        colors = self.compute_lighting_vectorized(vertices, normals)
+        # light all vert (shader path lights per fragment instead, keep the last CPU colors)
+        if self.use_shader:
+            colors = self.floor_colors
+        else:
+            colors = self.request_lit_colors(vertices, normals)
+            if colors is None:
+                # relighting in the background, poll_lighting swaps the result in
+                colors = self.floor_colors
+                if len(colors) != len(vertices):
+                    colors = self.get_lit_colors(vertices, normals)
 
         # STORE
-        self.floor_vertices = np.ascontiguousarray(vertices, dtype=np.float32)
-        self.floor_normals = np.ascontiguousarray(normals, dtype=np.float32)
-        self.floor_colors = np.ascontiguousarray(colors, dtype=np.float32)
+        self.store_floor_arrays(vertices, normals, colors, indices)
 
-        print(f"Generated geometry: {len(self.floor_vertices)} vertices")
+        print(f"Generated geometry: {len(self.floor_vertices)} vertices, {len(self.floor_indices) // 3} triangles")
         print(f"Light pos: {self.light_pos}, Camera pos: {self.camera_pos}")
         print(f"Color range: min={np.min(self.floor_colors):.3f}, max={np.max(self.floor_colors):.3f}")
 
+    def store_floor_arrays(self, vertices, normals, colors, indices):
+        self.floor_vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.floor_normals = np.ascontiguousarray(normals, dtype=np.float32)
+        self.floor_colors = np.ascontiguousarray(colors, dtype=np.float32)
+        self.floor_indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self.pack_floor_arrays()
+        self.upload_floor_buffers()
+
+    def pack_floor_arrays(self):
+        # positions/normals only get packed again when the geometry changes, a relight just repacks colors
+        if self.floor_packed is None or self._packed_geometry is not self.floor_vertices:
+            self.floor_packed = packed_vertices(self.floor_vertices, self.floor_normals, self.floor_colors)
+            self._packed_geometry = self.floor_vertices
+            print(f"Packed floor vertices: {self.floor_packed.nbytes / 1024:.0f} KB "
+                  f"(float32 arrays {unpacked_bytes(len(self.floor_packed)) / 1024:.0f} KB)")
+        elif self._packed_colors is not self.floor_colors:
+            self.floor_packed['color'] = pack_colors(self.floor_colors)
+        self.floor_color_stream = np.ascontiguousarray(self.floor_packed['color'])
+        self._packed_colors = self.floor_colors
+
+    def upload_floor_buffers(self):
+        # full upload only when the geometry itself changes (first time, R key),
+        # otherwise just overwrite the colors in place
+        with self.profile_stage('upload'):
+            try:
+                if self.floor_buffers is None:
+                    self.floor_buffers = {}
+                    for name in ['vertex', 'color', 'index']:
+                        self.floor_buffers[name] = GLuint()
+                        glGenBuffers(1, self.floor_buffers[name])
+
+                # interleaved vertices once, colors (4 bytes a vertex) in their own buffer so a relight
+                # does not resend the geometry
+                if self._buffer_geometry is not self.floor_vertices:
+                    for name, data, usage in [('vertex', self.floor_packed, GL_STATIC_DRAW),
+                                              ('color', self.floor_color_stream, GL_DYNAMIC_DRAW)]:
+                        glBindBuffer(GL_ARRAY_BUFFER, self.floor_buffers[name])
+                        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data.ctypes.data, usage)
+                    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.floor_buffers['index'])
+                    glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.floor_indices.nbytes, self.floor_indices.ctypes.data,
+                                 GL_STATIC_DRAW)
+                    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+                    self.floor_index_count = len(self.floor_indices)
+                    self._buffer_geometry = self.floor_vertices
+                elif self._buffer_colors is not self.floor_colors:
+                    glBindBuffer(GL_ARRAY_BUFFER, self.floor_buffers['color'])
+                    glBufferSubData(GL_ARRAY_BUFFER, 0, self.floor_color_stream.nbytes,
+                                    self.floor_color_stream.ctypes.data)
+
+                self._buffer_colors = self.floor_colors
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+            except Exception as e:
+                print(f"GPU buffer upload failed: {e}, using client-side arrays")
+                self.use_gpu_buffers = False
+                self.floor_buffers = None
+
     def setup_camera(self):
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
@@ -369,10 +966,248 @@ class OptimizedSpecularStreakScene:
 
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
-        gluLookAt(0.0, 1.5, 0.0, 0.0, 1.0, -10.0, 0.0, 1.0, 0.0)
+        gluLookAt(self.eye_offset_x, 1.5, 0.0, self.eye_offset_x, 1.0, -10.0, 0.0, 1.0, 0.0)
+
+    def set_eye_offset(self, offset_x):
+        # parallel stereo camera, specular depends on the eye so relight
+        self.eye_offset_x = offset_x
+        self.original_camera_pos[0] = offset_x
+        self.generate_floor_geometry()
+
+    def render_stereo_pair(self, left_target, right_target, iod=None):
+        # both eyes in one call, each into its own offscreen target (anything with bind(), e.g. an FBO)
+        # geometry, light dirs and diffuse are shared, only the specular term is redone per eye
+        iod = self.interocular_distance if iod is None else iod
+        offsets = (-iod / 2.0, iod / 2.0)
+
+        self.update_lighting_positions()
+        vertices, normals, indices = self.generate_floor_geometry_static()
+        if self.use_shader:
+            # lit per fragment, the eye only changes u_camera_pos
+            eye_colors = [self.floor_colors] * 2
+        else:
+            eye_colors = self.get_stereo_lit_colors(vertices, normals, offsets)
+
+        # the eye loop moves the camera and swaps in each eye's colors, put the scene back afterwards
+        saved_offset = self.eye_offset_x
+        saved_camera_x = self.original_camera_pos[0]
+        saved_arrays = (self.floor_vertices, self.floor_normals, self.floor_colors, self.floor_indices)
+
+        try:
+            for target, offset, colors in zip((left_target, right_target), offsets, eye_colors):
+                self.eye_offset_x = offset
+                self.original_camera_pos[0] = offset
+                self.update_lighting_positions()
+                if not self.use_shader:
+                    self.store_floor_arrays(vertices, normals, colors, indices)
+                target.bind()
+                self.render_frame()
+        finally:
+            self.eye_offset_x = saved_offset
+            self.original_camera_pos[0] = saved_camera_x
+            self.update_lighting_positions()
+            if not self.use_shader:
+                self.store_floor_arrays(*saved_arrays)
+
+        # back to the window
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(0, 0, int(self.win.size[0]), int(self.win.size[1]))
+
+    def compile_shader(self, source, shader_type):
+        shader = glCreateShader(shader_type)
+        source_buffer = ctypes.create_string_buffer(source.encode('utf-8'))
+        source_ptr = ctypes.cast(ctypes.pointer(ctypes.pointer(source_buffer)),
+                                 ctypes.POINTER(ctypes.POINTER(GLchar)))
+        glShaderSource(shader, 1, source_ptr, None)
+        glCompileShader(shader)
+
+        status = GLint()
+        glGetShaderiv(shader, GL_COMPILE_STATUS, ctypes.byref(status))
+        if not status.value:
+            log = ctypes.create_string_buffer(4096)
+            glGetShaderInfoLog(shader, 4096, None, log)
+            raise RuntimeError(f"Shader compile failed: {log.value.decode(errors='replace')}")
+        return shader
+
+    def setup_shader_path(self):
+        shader_dir = os.path.dirname(os.path.abspath(__file__))
+        with open(os.path.join(shader_dir, 'streak.vert')) as f:
+            vertex_source = f.read()
+        with open(os.path.join(shader_dir, 'streak.frag')) as f:
+            fragment_source = f.read()
+
+        program = glCreateProgram()
+        glAttachShader(program, self.compile_shader(vertex_source, GL_VERTEX_SHADER))
+        glAttachShader(program, self.compile_shader(fragment_source, GL_FRAGMENT_SHADER))
+        glLinkProgram(program)
+
+        status = GLint()
+        glGetProgramiv(program, GL_LINK_STATUS, ctypes.byref(status))
+        if not status.value:
+            log = ctypes.create_string_buffer(4096)
+            glGetProgramInfoLog(program, 4096, None, log)
+            raise RuntimeError(f"Shader link failed: {log.value.decode(errors='replace')}")
+
+        self.shader_uniforms = {}
+        for name in ['u_proj', 'u_view', 'u_model', 'u_camera_pos', 'u_light_pos',
+                     'u_mat_ambient', 'u_mat_diffuse', 'u_mat_specular',
+                     'u_light_ambient', 'u_light_diffuse', 'u_light_specular',
+                     'u_shininess', 'u_alpha', 'u_use_ward',
+                     'u_use_normal_map', 'u_normal_map', 'u_floor_rect']:
+            self.shader_uniforms[name] = glGetUniformLocation(program, name.encode('utf-8'))
+
+        if self.floor_buffers is None:
+            raise RuntimeError("floor GPU buffers not available")
+
+        # positions (location 0) and normals (location 1) from the shared packed floor buffer, colors are not needed
+        self.shader_vao = GLuint()
+        glGenVertexArrays(1, self.shader_vao)
+
+        glBindVertexArray(self.shader_vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.floor_buffers['vertex'])
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, PACKED_STRIDE, POSITION_OFFSET)
+        glEnableVertexAttribArray(1)
+        # packed types always take 4 components, the shader only reads xyz
+        glVertexAttribPointer(1, 4, GL_INT_2_10_10_10_REV, GL_TRUE, PACKED_STRIDE, NORMAL_OFFSET)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.floor_buffers['index'])
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        self.shader_program = program
+        print("GLSL shading path ready")
+
+    def setup_normal_map(self):
+        # same field statistics as the per-vertex normals in generate_floor_geometry_static
+        # not cached on disk, a 2048^2 field is 50 MB of .npy and cheap next to the upload
+        size = self.normal_map_size
+        normals = microfacet_normals(size * size, 'gaussian', seed=42, cache=False, sigma_x=0.1, sigma_z=0.1)
+        texels = np.ascontiguousarray(normals.reshape(size, size, 3))  # rows along z, columns along x
+
+        texture = GLuint()
+        glGenTextures(1, texture)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        # half floats keep the signed components, a 4096 map is ~100 MB before mipmaps
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB16F, size, size, 0, GL_RGB, GL_FLOAT, texels.ctypes.data)
+        glGenerateMipmap(GL_TEXTURE_2D)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        # one quad over the floor rect, flat normal (the fragment shader replaces it)
+        x0, z0 = -self.floor_size_x / 2, -self.floor_size_z
+        x1, z1 = x0 + self.floor_size_x, z0 + self.floor_size_z
+        quad = np.array([[x0, 0.0, z0], [x1, 0.0, z0], [x0, 0.0, z1],
+                         [x1, 0.0, z0], [x1, 0.0, z1], [x0, 0.0, z1]], dtype=np.float32)
+        quad_normals = np.tile(np.array([0.0, 1.0, 0.0], dtype=np.float32), (6, 1))
+
+        self.normal_map_buffers = [GLuint(), GLuint()]
+        self.normal_map_vao = GLuint()
+        glGenVertexArrays(1, self.normal_map_vao)
+        glBindVertexArray(self.normal_map_vao)
+        for location, (buffer, data) in enumerate(zip(self.normal_map_buffers, (quad, quad_normals))):
+            glGenBuffers(1, buffer)
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data.ctypes.data, GL_STATIC_DRAW)
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, 0, 0)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        self.normal_map_texture = texture
+        print(f"Normal map ready ({size}x{size})")
+
+    def toggle_normal_map(self):
+        if not self.use_normal_map:
+            if not self.use_shader:
+                self.toggle_shader_path()
+                if not self.use_shader:
+                    return
+            if self.normal_map_texture is None:
+                try:
+                    self.setup_normal_map()
+                except Exception as e:
+                    print(f"Normal map unavailable: {e}")
+                    return
+        self.use_normal_map = not self.use_normal_map
+        print(f"Switched to {'normal map' if self.use_normal_map else 'per-vertex'} microfacet normals")
+
+    def toggle_shader_path(self):
+        if not self.use_shader and self.shader_program is None:
+            try:
+                self.setup_shader_path()
+            except Exception as e:
+                print(f"GLSL shading unavailable: {e}")
+                return
+        self.use_shader = not self.use_shader
+        print(f"Switched to {'per-fragment GLSL' if self.use_shader else 'per-vertex CPU'} lighting")
+        self.generate_floor_geometry()
+
+    def set_uniform_matrix(self, name, matrix):
+        matrix_gl = np.ascontiguousarray(matrix, dtype=np.float32)
+        # numpy is row major
+        glUniformMatrix4fv(self.shader_uniforms[name], 1, GL_TRUE,
+                           matrix_gl.ctypes.data_as(ctypes.POINTER(GLfloat)))
+
+    def set_uniform_vec3(self, name, value):
+        glUniform3f(self.shader_uniforms[name], float(value[0]), float(value[1]), float(value[2]))
+
+    def render_shader(self):
+        aspect_ratio = self.win.size[0] / self.win.size[1]
+        # same camera as setup_camera and the glRotatef pair in render_frame
+        proj = perspective_matrix(45.0, aspect_ratio, 0.1, 100.0)
+        view = look_at_matrix((self.eye_offset_x, 1.5, 0.0), (self.eye_offset_x, 1.0, -10.0), (0.0, 1.0, 0.0))
+        model = rotation_matrix(self.angle_x, 1.0, 0.0, 0.0) @ rotation_matrix(self.angle_z, 0.0, 1.0, 0.0)
+
+        glUseProgram(self.shader_program)
+        self.set_uniform_matrix('u_proj', proj)
+        self.set_uniform_matrix('u_view', view)
+        self.set_uniform_matrix('u_model', model)
+        self.set_uniform_vec3('u_camera_pos', self.camera_pos)
+        self.set_uniform_vec3('u_light_pos', self.light_pos)
+        self.set_uniform_vec3('u_mat_ambient', self.material['ambient'])
+        self.set_uniform_vec3('u_mat_diffuse', self.material['diffuse'])
+        self.set_uniform_vec3('u_mat_specular', self.material['specular'])
+        self.set_uniform_vec3('u_light_ambient', self.light['ambient'])
+        self.set_uniform_vec3('u_light_diffuse', self.light['diffuse'])
+        self.set_uniform_vec3('u_light_specular', self.light['specular'])
+        glUniform1f(self.shader_uniforms['u_shininess'], float(self.material['shininess']))
+        glUniform2f(self.shader_uniforms['u_alpha'], *self.get_ward_alphas())
+        glUniform1i(self.shader_uniforms['u_use_ward'], int(self.use_ward))
+        glUniform1i(self.shader_uniforms['u_use_normal_map'], int(self.use_normal_map))
+
+        if self.use_normal_map:
+            glActiveTexture(GL_TEXTURE0)
+            glBindTexture(GL_TEXTURE_2D, self.normal_map_texture)
+            glUniform1i(self.shader_uniforms['u_normal_map'], 0)
+            glUniform4f(self.shader_uniforms['u_floor_rect'], -self.floor_size_x / 2, -self.floor_size_z,
+                        self.floor_size_x, self.floor_size_z)
+            glBindVertexArray(self.normal_map_vao)
+            glDrawArrays(GL_TRIANGLES, 0, 6)
+            glBindTexture(GL_TEXTURE_2D, 0)
+        else:
+            glBindVertexArray(self.shader_vao)
+            glDrawElements(GL_TRIANGLES, self.floor_index_count, GL_UNSIGNED_INT, 0)
+        glBindVertexArray(0)
+        glUseProgram(0)
 
     def render_glossy_floor(self):
         #optimized witbh fallback
+        if self.use_shader:
+            try:
+                self.render_shader()
+                return
+            except Exception as e:
+                glUseProgram(0)
+                print(f"GLSL rendering failed: {e}")
+                print("Switching back to per-vertex lighting...")
+                self.use_shader = False
+                self.generate_floor_geometry()
+
         if self.rendering_method == "vertex_arrays" and self.use_vertex_arrays:
             try:
                 self.render_vertex_arrays()
@@ -385,30 +1220,55 @@ class OptimizedSpecularStreakScene:
         else:
             self.render_immediate_mode()
 
+    def render_path_name(self):
+        if self.use_shader:
+            return "GLSL normal map" if self.use_normal_map else "GLSL"
+        if self.rendering_method == "vertex_arrays" and self.use_vertex_arrays:
+            return "GPU buffers" if self.use_gpu_buffers else "client arrays"
+        return "immediate mode"
+
+    def render_buffer_objects(self):
+        # everything already on the GPU, nothing copied per frame
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.floor_buffers['vertex'])
+        glVertexPointer(3, GL_FLOAT, PACKED_STRIDE, POSITION_OFFSET)
+        glNormalPointer(GL_INT_2_10_10_10_REV, PACKED_STRIDE, NORMAL_OFFSET)
+        glBindBuffer(GL_ARRAY_BUFFER, self.floor_buffers['color'])
+        glColorPointer(4, GL_UNSIGNED_BYTE, 0, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.floor_buffers['index'])
+        glDrawElements(GL_TRIANGLES, self.floor_index_count, GL_UNSIGNED_INT, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_COLOR_ARRAY)
+
     def render_vertex_arrays(self):
-        #vertex array
-        vertices_gl = np.ascontiguousarray(self.floor_vertices, dtype=np.float32)
-        normals_gl = np.ascontiguousarray(self.floor_normals, dtype=np.float32)
-        colors_gl = np.ascontiguousarray(self.floor_colors, dtype=np.float32)
-
-        # sometimes the shape were weird so debug
-        if len(vertices_gl.shape) != 2 or vertices_gl.shape[1] != 3:
-            raise ValueError(f"Invalid vertex array shape: {vertices_gl.shape}")
-        if len(normals_gl.shape) != 2 or normals_gl.shape[1] != 3:
-            raise ValueError(f"Invalid normal array shape: {normals_gl.shape}")
-        if len(colors_gl.shape) != 2 or colors_gl.shape[1] != 3:
-            raise ValueError(f"Invalid color array shape: {colors_gl.shape}")
+        if self.use_gpu_buffers and self.floor_buffers is not None:
+            self.render_buffer_objects()
+            return
+
+        #vertex array (client side, copied to the driver every frame), the packed floor is 20 bytes a vertex
+        packed = self.floor_packed
+        if packed is None or len(packed) != len(self.floor_vertices):
+            raise ValueError("Packed floor vertices missing or out of date")
+        base = packed.ctypes.data
 
         glEnableClientState(GL_VERTEX_ARRAY)
         glEnableClientState(GL_NORMAL_ARRAY)
         glEnableClientState(GL_COLOR_ARRAY)
 
-        # ctypes
-        glVertexPointer(3, GL_FLOAT, 0, vertices_gl.ctypes.data)
-        glNormalPointer(GL_FLOAT, 0, normals_gl.ctypes.data)
-        glColorPointer(3, GL_FLOAT, 0, colors_gl.ctypes.data)
+        # ctypes, one interleaved array
+        glVertexPointer(3, GL_FLOAT, PACKED_STRIDE, base + POSITION_OFFSET)
+        glNormalPointer(GL_INT_2_10_10_10_REV, PACKED_STRIDE, base + NORMAL_OFFSET)
+        glColorPointer(4, GL_UNSIGNED_BYTE, PACKED_STRIDE, base + COLOR_OFFSET)
 
-        glDrawArrays(GL_TRIANGLES, 0, len(self.floor_vertices))
+        glDrawElements(GL_TRIANGLES, len(self.floor_indices), GL_UNSIGNED_INT, self.floor_indices.ctypes.data)
 
         glDisableClientState(GL_VERTEX_ARRAY)
         glDisableClientState(GL_NORMAL_ARRAY)
@@ -417,7 +1277,7 @@ class OptimizedSpecularStreakScene:
     def render_immediate_mode(self):
         #FALLBACK NORMAL
         glBegin(GL_TRIANGLES)
-        for i in range(len(self.floor_vertices)):
+        for i in self.floor_indices:
             color = self.floor_colors[i]
             glColor3f(float(color[0]), float(color[1]), float(color[2]))
 
@@ -453,23 +1313,22 @@ class OptimizedSpecularStreakScene:
         if self.angle_x != old_angle_x or self.angle_z != old_angle_z:
             print(f"Rotation updated - X: {self.angle_x}, Z: {self.angle_z}")
 
-            cache_key = (round(self.angle_x, 2), round(self.angle_z, 2))
-            if cache_key in self._rotation_cache:
-                del self._rotation_cache[cache_key]
-
             # update light pos
             self.update_lighting_positions()
             print(f"Light position after rotation: {self.light_pos}")
             print(f"Camera position after rotation: {self.camera_pos}")
 
+            # shader reads the new positions as uniforms, nothing to recompute
+            if self.use_shader:
+                return
+
             # regen only lightning
-            vertices, normals = self.generate_floor_geometry_static()
-            colors = self.compute_lighting_vectorized(vertices, normals)
+            vertices, normals, indices = self.generate_floor_geometry_static()
+            colors = self.request_lit_colors(vertices, normals)
 
-            # Store
-            self.floor_vertices = np.ascontiguousarray(vertices, dtype=np.float32)
-            self.floor_normals = np.ascontiguousarray(normals, dtype=np.float32)
-            self.floor_colors = np.ascontiguousarray(colors, dtype=np.float32)
+            # Store (None: still relighting in the background, poll_lighting swaps it in)
+            if colors is not None:
+                self.store_floor_arrays(vertices, normals, colors, indices)
 
     def render_frame(self):
         try:
@@ -493,7 +1352,14 @@ class OptimizedSpecularStreakScene:
 
 
 def run_optimized_specular_scene():
+    start_loading_kernels()
+    # psychopy is the slowest import, only pulled in when the scene actually runs
+    from psychopy import visual, core, event
+    mark_startup('psychopy')
+
     win = None
+    scene = None
+    profiler = None
     try:
         win = visual.Window(
             size=[1024, 768],
@@ -508,11 +1374,16 @@ def run_optimized_specular_scene():
         win.recordFrameIntervals = False
         win.autoDraw = False
         win.flip()
+        mark_startup('window')
 
         print("Window created successfully")
         print("Initializing optimized specular streak scene...")
 
         scene = OptimizedSpecularStreakScene(win)
+        mark_startup('scene (first lighting)')
+        startup_total = startup_report()
+        if startup_total > startup_budget:
+            print(f"Startup took {startup_total:.2f} s (budget {startup_budget:.1f} s)")
 
         print("Controls:")
         print("SPACE - Start scene")
@@ -523,6 +1394,9 @@ def run_optimized_specular_scene():
         print("7/8 - Adjust light Z position")
         print("W - Toggle Ward/Blinn-Phong lighting")
         print("V - Toggle vertex arrays/immediate mode rendering")
+        print("B - Toggle GPU buffers/client-side arrays")
+        print("G - Toggle per-fragment GLSL lighting")
+        print("N - Toggle normal map floor (GLSL)")
         print("R - Regenerate geometry")
         print("ESC/Q - Exit")
 
@@ -530,11 +1404,20 @@ def run_optimized_specular_scene():
 
         clock = core.Clock()
         frame_count = 0
-        fps_counter = 0
         fps_timer = clock.getTime()
+        frames_since_report = 0
+
+        # per stage timings, dropped frames measured against the monitor refresh
+        profiler = FrameProfiler(refresh_interval=getattr(win, 'monitorFramePeriod', None) or 1.0 / 60.0)
+        scene.profiler = profiler
+
+        # held keys queue relights on a worker thread instead of stalling the frame
+        scene.start_async_lighting()
 
         while True:
-            keys = event.getKeys()
+            profiler.begin_frame()
+            with profiler.stage('events'):
+                keys = event.getKeys()
             if 'escape' in keys or 'q' in keys:
                 print("Exiting...")
                 break
@@ -585,24 +1468,40 @@ def run_optimized_specular_scene():
                     scene.rendering_method = "vertex_arrays" if scene.use_vertex_arrays else "immediate_mode"
                     render_method = "Vertex Arrays" if scene.use_vertex_arrays else "Immediate Mode"
                     print(f"Switched to {render_method} rendering")
+                if 'b' in keys:
+                    scene.use_gpu_buffers = not scene.use_gpu_buffers
+                    print(f"Switched to {scene.render_path_name()} rendering")
+                if 'g' in keys:
+                    scene.toggle_shader_path()
+                if 'n' in keys:
+                    scene.toggle_normal_map()
                 if 'r' in keys:
                     print("Regenerating geometry...")
                     scene._geometry_cache = None  # Clear cache
+                    scene.color_cache.clear()
                     scene.generate_floor_geometry()
 
             try:
-                scene.render_frame()
-                win.flip()
+                scene.poll_lighting()
+                with profiler.stage('draw'):
+                    scene.render_frame()
+                with profiler.stage('flip'):
+                    win.flip()
+                profiler.end_frame()
 
                 frame_count += 1
-                fps_counter += 1
+                frames_since_report += 1
 
                 # FPS reporting every 2 seconds
                 current_time = clock.getTime()
                 if current_time - fps_timer >= 2.0:
-                    fps = fps_counter / (current_time - fps_timer)
-                    print(f"FPS: {fps:.1f} ({frame_count} total frames)")
-                    fps_counter = 0
+                    fps = frames_since_report / (current_time - fps_timer)
+                    frame_times = profiler.frame_times(last=frames_since_report)
+                    print(f"FPS: {fps:.1f} ({frame_count} total frames) | frame time "
+                          f"{1000 * np.mean(frame_times):.2f} ms avg, {1000 * np.max(frame_times):.2f} ms max "
+                          f"[{scene.render_path_name()}] | {scene.color_cache.stats()}")
+                    print(f"  {profiler.summary(last=frames_since_report)}")
+                    frames_since_report = 0
                     fps_timer = current_time
 
             except Exception as render_error:
@@ -619,6 +1518,14 @@ def run_optimized_specular_scene():
         import traceback
         traceback.print_exc()
     finally:
+        if scene is not None:
+            scene.stop_async_lighting()
+        if profiler is not None and profiler.frames:
+            os.makedirs(profile_folder, exist_ok=True)
+            stem = os.path.join(profile_folder, f"frame_profile_{time.strftime('%Y%m%d_%H%M%S')}")
+            csv_path, trace_path = profiler.export(stem)
+            print(f"Frame profile: {profiler.summary()}")
+            print(f"Saved frame profile to {csv_path} and {trace_path}")
         if win is not None:
             win.close()
         core.quit()
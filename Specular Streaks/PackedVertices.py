@@ -0,0 +1,61 @@
+import numpy as np
+
+# Interleaved vertex format of the floor scenes, White Column/PackedVertices.py has the same layout for the brick columns
+# 20 bytes per vertex instead of 36 for separate float32 position / normal / color arrays:
+#   position  3 x float32                      -> glVertexPointer(3, GL_FLOAT, stride, 0)
+#   normal    signed 10/10/10 bits + 2 unused  -> glNormalPointer(GL_INT_2_10_10_10_REV, stride, 12)
+#   color     RGBA uint8, normalized            -> glColorPointer(4, GL_UNSIGNED_BYTE, stride, 16)
+
+PACKED_VERTEX_DTYPE = np.dtype([
+    ('position', np.float32, (3,)),
+    ('normal', np.uint32),
+    ('color', np.uint8, (4,)),
+])
+
+PACKED_STRIDE = PACKED_VERTEX_DTYPE.itemsize
+POSITION_OFFSET = PACKED_VERTEX_DTYPE.fields['position'][1]
+NORMAL_OFFSET = PACKED_VERTEX_DTYPE.fields['normal'][1]
+COLOR_OFFSET = PACKED_VERTEX_DTYPE.fields['color'][1]
+
+
+def pack_normals(normals):
+    # (N, 3) floats in [-1, 1] -> (N,) uint32, x in the low bits like GL_INT_2_10_10_10_REV
+    # quantized to 1/511, a couple of milliradians
+    normals = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+    components = np.clip(np.rint(normals * 511.0), -511, 511).astype(np.int32) & 0x3FF
+    return (components[:, 0] | (components[:, 1] << 10) | (components[:, 2] << 20)).astype(np.uint32)
+
+
+def unpack_normals(packed):
+    packed = np.asarray(packed, dtype=np.uint32)
+    components = np.stack([(packed >> shift) & 0x3FF for shift in (0, 10, 20)], axis=1).astype(np.int32)
+    components[components >= 512] -= 1024  # sign extend
+    return components.astype(np.float32) / 511.0
+
+
+def pack_colors(colors, alpha=1.0):
+    # (N, 3) or (N, 4) floats in [0, 1] -> (N, 4) uint8, alpha filled in when only RGB is given
+    colors = np.asarray(colors, dtype=np.float32)
+    packed = np.empty((len(colors), 4), dtype=np.uint8)
+    packed[:, :colors.shape[1]] = np.clip(colors * 255.0 + 0.5, 0.0, 255.0).astype(np.uint8)
+    if colors.shape[1] == 3:
+        packed[:, 3] = int(round(alpha * 255.0))
+    return packed
+
+
+def packed_vertices(positions, normals, colors=None, color=(1.0, 1.0, 1.0)):
+    # one structured array from separate float arrays, a single `color` for every vertex when colors is None
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    vertices = np.empty(len(positions), dtype=PACKED_VERTEX_DTYPE)
+    vertices['position'] = positions
+    vertices['normal'] = pack_normals(normals)
+    if colors is None:
+        vertices['color'] = pack_colors(np.asarray([color], dtype=np.float32))
+    else:
+        vertices['color'] = pack_colors(colors)
+    return vertices
+
+
+def unpacked_bytes(vertex_count):
+    # the float32 position + normal + RGB color layout this replaces
+    return vertex_count * 3 * 3 * 4
@@ -0,0 +1,342 @@
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from SoftwareRasterizer import scene_mvp, to_uint8
+
+# Offline ground truth for the streak scenes: same floor, light and camera as OptimizedSpecularStreakScene,
+# but the floor is a field of mirror microfacets (Beckmann) and the light a small sphere.
+# Every sample picks a point in the pixel, then a microfacet normal (mirror reflection, counts if it hits the
+# light) and a direction towards the light (Cook-Torrance with the same Beckmann lobe), combined with
+# multiple importance sampling so both tiny lights and tight lobes converge. Tiles go to a process pool,
+# passes accumulate until the noise estimate is low enough (or Ctrl+C), then the result is saved next to
+# the Blinn-Phong render.
+
+output_folder = 'ReferenceRenders'
+metrics_name = 'metrics.csv'
+
+image_width = 512
+image_height = 384
+tile_size = 64
+samples_per_pass = 8
+max_passes = 256
+target_noise = 0.002  # std error of the mean, in [0, 1] color units (half an 8 bit step)
+
+# per-vertex floor normals are jittered with sigma 0.1 per component, Beckmann slopes have std alpha / sqrt(2)
+default_roughness = 0.1 * math.sqrt(2.0)
+light_radius = 1.0  # scene units, the scene light is a point at distance ~100
+light_power = 1.0  # radiance * solid angle of the light as seen from the floor center
+
+
+def tracer_config(scene, width, height, roughness=default_roughness, radius=light_radius, power=light_power):
+    # everything a worker needs, plain numpy so it pickles (no GL objects)
+    scene.update_lighting_positions()
+    eye_x = scene.eye_offset_x
+    mvp = scene_mvp(width, height, scene.angle_x, scene.angle_z, eye=(eye_x, 1.5, 0.0), center=(eye_x, 1.0, -10.0))
+
+    light_pos = np.asarray(scene.light_pos, dtype=np.float64)
+    distance = np.linalg.norm(light_pos)
+    solid_angle = math.pi * radius * radius / max(distance * distance, 1e-12)
+
+    return {
+        'width': width,
+        'height': height,
+        'inv_mvp': np.linalg.inv(mvp),
+        'floor_rect': (-scene.floor_size_x / 2, -scene.floor_size_z, scene.floor_size_x, scene.floor_size_z),
+        'light_pos': light_pos,
+        'light_radius': radius,
+        'light_radiance': power / solid_angle,
+        'alpha': (roughness, roughness),
+        'ambient': np.asarray(scene.material['ambient'] * scene.light['ambient'], dtype=np.float64),
+        'diffuse': np.asarray(scene.material['diffuse'] * scene.light['diffuse'], dtype=np.float64),
+        'specular': np.asarray(scene.material['specular'] * scene.light['specular'], dtype=np.float64),
+    }
+
+
+def _smith_g1(cos_theta, alpha):
+    # Beckmann Smith masking, rational approximation (Walter et al. 2007)
+    cos_theta = np.clip(cos_theta, 1e-6, 1.0)
+    tan_theta = np.sqrt(1.0 - cos_theta * cos_theta) / cos_theta
+    a = 1.0 / np.maximum(alpha * tan_theta, 1e-12)
+    g = (3.535 * a + 2.181 * a * a) / (1.0 + 2.276 * a + 2.577 * a * a)
+    return np.where(a < 1.6, g, 1.0)
+
+
+def _beckmann_d(half, alpha_x, alpha_z):
+    # anisotropic Beckmann NDF, floor normal (0, 1, 0)
+    cos_theta = np.maximum(half[:, 1], 1e-6)
+    slope = (half[:, 0] / alpha_x) ** 2 + (half[:, 2] / alpha_z) ** 2
+    return np.exp(-slope / (cos_theta * cos_theta)) / (math.pi * alpha_x * alpha_z * cos_theta ** 4)
+
+
+def _trace_tile(config, tile, samples, seed):
+    y0, y1, x0, x1 = tile
+    width, height = config['width'], config['height']
+    rng = np.random.default_rng(seed)
+
+    py, px = np.mgrid[y0:y1, x0:x1]
+    px = px.ravel().astype(np.float64)
+    py = py.ravel().astype(np.float64)
+    count = len(px)
+
+    color_sum = np.zeros((count, 3))
+    color_sq = np.zeros((count, 3))
+
+    x_min, z_min, size_x, size_z = config['floor_rect']
+    light_pos = config['light_pos']
+    alpha_x, alpha_z = config['alpha']
+    alpha = math.sqrt(0.5 * (alpha_x * alpha_x + alpha_z * alpha_z))
+    radius = config['light_radius']
+    radiance = config['light_radiance']
+
+    for _ in range(samples):
+        # jittered point in the pixel -> floor space ray through the inverse MVP (row 0 at the top)
+        ndc_x = (px + rng.random(count)) / width * 2.0 - 1.0
+        ndc_y = 1.0 - (py + rng.random(count)) / height * 2.0
+        near = np.stack([ndc_x, ndc_y, -np.ones(count), np.ones(count)], axis=1) @ config['inv_mvp'].T
+        far = np.stack([ndc_x, ndc_y, np.ones(count), np.ones(count)], axis=1) @ config['inv_mvp'].T
+        near = near[:, :3] / near[:, 3:4]
+        far = far[:, :3] / far[:, 3:4]
+        direction = far - near
+        direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+
+        # floor plane y = 0 inside the floor rect
+        safe_dy = np.where(direction[:, 1] < -1e-9, direction[:, 1], -1e-9)
+        t = -near[:, 1] / safe_dy
+        hit_point = near + t[:, np.newaxis] * direction
+        on_floor = ((direction[:, 1] < -1e-9) & (t > 0.0)
+                    & (hit_point[:, 0] >= x_min) & (hit_point[:, 0] <= x_min + size_x)
+                    & (hit_point[:, 2] >= z_min) & (hit_point[:, 2] <= z_min + size_z))
+
+        view = -direction
+        n_dot_v = np.maximum(view[:, 1], 1e-6)
+
+        # light cone seen from the hit point, uniform direction pdf inside it
+        to_light = light_pos - hit_point
+        light_distance = np.linalg.norm(to_light, axis=1)
+        light_axis = to_light / light_distance[:, np.newaxis]
+        cos_max = np.sqrt(np.maximum(1.0 - (radius / np.maximum(light_distance, radius)) ** 2, 0.0))
+        light_pdf = 1.0 / (2.0 * math.pi * np.maximum(1.0 - cos_max, 1e-12))
+
+        # strategy 1: microfacet normal from the Beckmann slope distribution (pdf D(m) m.n), mirror reflection
+        normal = np.empty((count, 3))
+        normal[:, 0] = -rng.standard_normal(count) * (alpha_x / math.sqrt(2.0))
+        normal[:, 1] = 1.0
+        normal[:, 2] = -rng.standard_normal(count) * (alpha_z / math.sqrt(2.0))
+        normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+
+        v_dot_m = np.sum(view * normal, axis=1)
+        reflected = 2.0 * v_dot_m[:, np.newaxis] * normal - view
+        n_dot_l = reflected[:, 1]
+        in_cone = np.sum(reflected * light_axis, axis=1) >= cos_max
+
+        valid = on_floor & (v_dot_m > 0.0) & (n_dot_l > 0.0) & in_cone
+        safe_v_dot_m = np.maximum(v_dot_m, 1e-6)
+        brdf_pdf = _beckmann_d(normal, alpha_x, alpha_z) * normal[:, 1] / (4.0 * safe_v_dot_m)
+        # f cos / pdf for normals sampled with D(m) m.n: G |v.m| / (|v.n| |m.n|), F = 1 (white mirror)
+        weight = (_smith_g1(n_dot_v, alpha) * _smith_g1(n_dot_l, alpha) * safe_v_dot_m
+                  / (n_dot_v * np.maximum(normal[:, 1], 1e-6)))
+        mis = brdf_pdf / (brdf_pdf + light_pdf)
+        specular = np.where(valid, mis * weight * radiance, 0.0)
+
+        # strategy 2: direction inside the light cone, Cook-Torrance with the same lobe
+        cos_theta = 1.0 - rng.random(count) * (1.0 - cos_max)
+        sin_theta = np.sqrt(np.maximum(1.0 - cos_theta * cos_theta, 0.0))
+        phi = rng.random(count) * (2.0 * math.pi)
+        helper = np.where(np.abs(light_axis[:, 0:1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+        tangent = np.cross(helper, light_axis)
+        tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+        bitangent = np.cross(light_axis, tangent)
+        light_dir = (light_axis * cos_theta[:, np.newaxis]
+                     + tangent * (sin_theta * np.cos(phi))[:, np.newaxis]
+                     + bitangent * (sin_theta * np.sin(phi))[:, np.newaxis])
+
+        n_dot_l = light_dir[:, 1]
+        half = view + light_dir
+        half /= np.maximum(np.linalg.norm(half, axis=1, keepdims=True), 1e-12)
+        v_dot_h = np.maximum(np.sum(view * half, axis=1), 1e-6)
+        d = _beckmann_d(half, alpha_x, alpha_z)
+        brdf = (d * _smith_g1(n_dot_v, alpha) * _smith_g1(np.maximum(n_dot_l, 1e-6), alpha)
+                / (4.0 * n_dot_v * np.maximum(n_dot_l, 1e-6)))
+        brdf_pdf = d * np.maximum(half[:, 1], 0.0) / (4.0 * v_dot_h)
+        mis = light_pdf / (brdf_pdf + light_pdf)
+        valid = on_floor & (n_dot_l > 0.0) & (half[:, 1] > 0.0)
+        specular += np.where(valid, mis * brdf * radiance * np.maximum(n_dot_l, 0.0) / light_pdf, 0.0)
+
+        # view independent part is deterministic, same terms as the per-vertex lighting
+        base = config['ambient'] + config['diffuse'] * np.maximum(light_axis[:, 1], 0.0)[:, np.newaxis]
+
+        color = np.where(on_floor[:, np.newaxis], base + config['specular'] * specular[:, np.newaxis], 0.0)
+        color_sum += color
+        color_sq += color * color
+
+    shape = (y1 - y0, x1 - x0, 3)
+    return tile, color_sum.reshape(shape), color_sq.reshape(shape)
+
+
+def image_tiles(width, height, size=tile_size):
+    return [(y, min(y + size, height), x, min(x + size, width))
+            for y in range(0, height, size) for x in range(0, width, size)]
+
+
+def render_reference(config, passes=max_passes, samples=samples_per_pass, noise_target=target_noise,
+                     workers=None, seed=0, on_pass=None):
+    # returns (image, samples per pixel, noise), can be stopped with Ctrl+C and keeps what it has
+    width, height = config['width'], config['height']
+    tiles = image_tiles(width, height)
+    color_sum = np.zeros((height, width, 3))
+    color_sq = np.zeros((height, width, 3))
+    spp = 0
+    noise = float('inf')
+    image = color_sum
+
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context('spawn')
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    start = time.perf_counter()
+    try:
+        for pass_index in range(passes):
+            futures = [pool.submit(_trace_tile, config, tile, samples, (seed, pass_index, k))
+                       for k, tile in enumerate(tiles)]
+            for future in as_completed(futures):
+                (y0, y1, x0, x1), tile_sum, tile_sq = future.result()
+                color_sum[y0:y1, x0:x1] += tile_sum
+                color_sq[y0:y1, x0:x1] += tile_sq
+            spp += samples
+
+            image = color_sum / spp
+            variance = np.maximum(color_sq / spp - image * image, 0.0)
+            # saturated pixels show as white whatever their variance, only judge what is displayable
+            unsaturated = image < 1.0
+            noise = float(np.sqrt(np.mean(variance[unsaturated] / spp))) if unsaturated.any() else 0.0
+            print(f"Pass {pass_index + 1}: {spp} spp, noise {noise:.5f} ({time.perf_counter() - start:.1f}s)")
+            if on_pass is not None:
+                on_pass(image, spp, noise)
+            if noise <= noise_target:
+                break
+    except KeyboardInterrupt:
+        print(f"Stopped at {spp} spp, keeping the current estimate")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return np.clip(image, 0.0, 1.0), spp, noise
+
+
+def difference_metrics(reference, proxy):
+    # both float images in [0, 1]; the proxy has no physical scale so also compare after a best fit gain
+    reference = np.asarray(reference, dtype=np.float64)
+    proxy = np.asarray(proxy, dtype=np.float64)
+    diff = reference - proxy
+    rmse = float(np.sqrt(np.mean(diff * diff)))
+
+    gain = float(np.sum(reference * proxy) / max(np.sum(proxy * proxy), 1e-12))
+    scaled_diff = reference - gain * proxy
+
+    ref_centered = reference - reference.mean()
+    proxy_centered = proxy - proxy.mean()
+    ncc = float(np.sum(ref_centered * proxy_centered)
+                / max(np.sqrt(np.sum(ref_centered ** 2) * np.sum(proxy_centered ** 2)), 1e-12))
+
+    return {
+        'rmse': round(rmse, 6),
+        'psnr_db': round(20.0 * math.log10(1.0 / rmse), 3) if rmse > 0 else float('inf'),
+        'max_abs_diff': round(float(np.max(np.abs(diff))), 6),
+        'gain': round(gain, 6),
+        'scaled_rmse': round(float(np.sqrt(np.mean(scaled_diff * scaled_diff))), 6),
+        'ncc': round(ncc, 6),
+    }
+
+
+def _open_scene(width, height, headless):
+    # hidden GL context + FBO for the Blinn-Phong render, same setup as GenerateStreakImages
+    import pyglet
+    pyglet.options['headless'] = headless
+    pyglet.options['shadow_window'] = False
+    window = pyglet.window.Window(width=width, height=height, visible=False)
+    window.switch_to()
+
+    from GenerateStreakImages import OffscreenTarget
+    from OptimizedFromScratch import OptimizedSpecularStreakScene
+
+    target = OffscreenTarget(width, height)
+    return window, target, OptimizedSpecularStreakScene(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference microfacet render of the streak scene vs Blinn-Phong")
+    parser.add_argument('--theta', type=float, default=0.0, help="floor slant (scene angle_x)")
+    parser.add_argument('--angle-z', type=float, default=0.0)
+    parser.add_argument('--light-height', type=float, default=1.0)
+    parser.add_argument('--shininess', type=float, default=None)
+    parser.add_argument('--roughness', type=float, default=default_roughness, help="Beckmann alpha")
+    parser.add_argument('--light-radius', type=float, default=light_radius)
+    parser.add_argument('--light-power', type=float, default=light_power)
+    parser.add_argument('--size', type=int, nargs=2, default=[image_width, image_height])
+    parser.add_argument('--noise', type=float, default=target_noise, help="stop below this noise level")
+    parser.add_argument('--passes', type=int, default=max_passes)
+    parser.add_argument('--spp-per-pass', type=int, default=samples_per_pass)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=output_folder)
+    parser.add_argument('--windowed', action='store_true', help="use a hidden window instead of headless EGL")
+    args = parser.parse_args()
+
+    from PIL import Image
+
+    width, height = args.size
+    window, target, scene = _open_scene(width, height, headless=not args.windowed)
+
+    scene.use_ward = False
+    scene.angle_x = args.theta
+    scene.angle_z = args.angle_z
+    scene.update_lighting_params(light_height=args.light_height, shininess=args.shininess)
+
+    # Blinn-Phong proxy through the normal GL path
+    target.bind()
+    scene.render_frame()
+    proxy = target.read_pixels()
+    window.close()
+
+    os.makedirs(args.out, exist_ok=True)
+    stem = (f"theta_{args.theta:.1f}_anglez_{args.angle_z:.1f}_height_{args.light_height:.1f}"
+            f"_alpha_{args.roughness:.3f}").replace('.', '_')
+    reference_path = os.path.join(args.out, f"{stem}_reference.png")
+    Image.fromarray(proxy).save(os.path.join(args.out, f"{stem}_blinn_phong.png"))
+
+    def save_progress(image, spp, noise):
+        Image.fromarray(to_uint8(image)).save(reference_path)
+
+    config = tracer_config(scene, width, height, args.roughness, args.light_radius, args.light_power)
+    reference, spp, noise = render_reference(config, args.passes, args.spp_per_pass, args.noise, args.workers,
+                                             args.seed, on_pass=save_progress)
+    save_progress(reference, spp, noise)
+
+    proxy_float = proxy.astype(np.float64) / 255.0
+    metrics = difference_metrics(reference, proxy_float)
+    diff = np.abs(reference - proxy_float).mean(axis=2)
+    Image.fromarray(to_uint8(diff / max(diff.max(), 1e-12))).save(os.path.join(args.out, f"{stem}_difference.png"))
+
+    row = {'image': stem, 'theta': args.theta, 'angle_z': args.angle_z, 'light_height': args.light_height,
+           'shininess': scene.material['shininess'], 'roughness': args.roughness, 'spp': spp,
+           'noise': round(noise, 6), **metrics}
+    metrics_path = os.path.join(args.out, metrics_name)
+    write_header = not os.path.exists(metrics_path)
+    with open(metrics_path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+        if write_header:
+            writer.writeheader()
+        writer.writerow(row)
+
+    print(json.dumps(row, indent=2))
+    print(f"Saved reference, Blinn-Phong and difference images to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from psychopy import visual, core, event
 from pyglet.gl import *
-import random
+
+from FloorMesh import generate_floor_grid, expand_indexed
+from MicrofacetNormals import microfacet_normals
 
 
 class SpecularStreakScene:
@@ -15,6 +17,7 @@ class SpecularStreakScene:
         print("Scene initialization complete")
         self.angle_x = 0  # Rotation around X axis
         self.angle_z = 0  # Rotation around Z axis
+        self.floor_corners = None  # built on first frame
 
     def setup_opengl(self):
         glEnable(GL_DEPTH_TEST)
@@ -76,36 +79,21 @@ class SpecularStreakScene:
         # Tessellation parameters
         floor_size = 40.0
         divisions = 100
-        step = floor_size / divisions
 
-        def jittered_normal():
-            nx = random.uniform(-0.3, 0.3)
-            ny = 1.0
-            nz = random.uniform(-0.05, 0.05)  # little variation in x but not in z
-            # variable
-            length = (nx ** 2 + ny ** 2 + nz ** 2) ** 0.5
-            return (nx / length, ny / length, nz / length)
+        # positions never change, only the normals get re-jittered each frame
+        if self.floor_corners is None:
+            vertices, indices = generate_floor_grid(floor_size, floor_size, divisions, divisions)
+            self.floor_corners = expand_indexed(vertices, indices).tolist()
+
+        # new random field every frame (seed=None), little variation in x but not in z
+        normals = microfacet_normals(len(self.floor_corners), 'uniform', seed=None,
+                                     range_x=0.3, range_z=0.05).tolist()
 
         glBegin(GL_TRIANGLES)
 
-        for i in range(divisions):
-            for j in range(divisions):
-                x1 = -floor_size / 2 + i * step
-                x2 = x1 + step
-                z1 = -floor_size / 2 + j * step
-                z2 = z1 + step
-
-                # Triangle 1
-                for (x, z) in [(x1, z1), (x2, z1), (x1, z2)]:
-                    nx, ny, nz = jittered_normal()
-                    glNormal3f(nx, ny, nz)
-                    glVertex3f(x, 0.0, z)
-
-                # Triangle 2
-                for (x, z) in [(x2, z1), (x2, z2), (x1, z2)]:
-                    nx, ny, nz = jittered_normal()
-                    glNormal3f(nx, ny, nz)
-                    glVertex3f(x, 0.0, z)
+        for (x, y, z), (nx, ny, nz) in zip(self.floor_corners, normals):
+            glNormal3f(nx, ny, nz)
+            glVertex3f(x, y, z)
 
         glEnd()
 
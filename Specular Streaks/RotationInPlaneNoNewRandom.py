@@ -1,6 +1,8 @@
 from psychopy import visual, core, event
 from pyglet.gl import *
-import random
+
+from FloorMesh import generate_floor_grid, expand_indexed
+from MicrofacetNormals import microfacet_normals
 
 #HYPERPARAMETERS TO TOUCH ARE LIGHT DISTANCE AND SPECIFIC RANDOMIZATION
 class SpecularStreakScene:
@@ -68,7 +70,6 @@ class SpecularStreakScene:
         floor_size = 40.0
         #divisions = 100
         divisions = 250
-        step = floor_size / divisions
 
         # Store vertices and normals
         self.floor_vertices = []
@@ -82,34 +83,13 @@ class SpecularStreakScene:
             length = (nx ** 2 + ny ** 2 + nz ** 2) ** 0.5
             return (nx / length, ny / length, nz / length)"""
 
-        def jittered_normal():
-            #nx = random.gauss(0.0, 0.05) #increasing standard deviation makes streak more wide ??
-            nx = 0.0
-            ny = 1.0
-            nz = 0.0  # perfectly vertical streaks changing the z makes a more conical streak?
-            length = (nx ** 2 + ny ** 2) ** 0.5
-            return (nx / length, ny / length, 0.0)
-
-        for i in range(divisions):
-            for j in range(divisions):
-                x1 = -floor_size / 2 + i * step
-                x2 = x1 + step
-                z1 = -floor_size / 2 + j * step
-                z2 = z1 + step
-
-                # Triangle 1 vertices and normals
-                triangle1_vertices = [(x1, 0.0, z1), (x2, 0.0, z1), (x1, 0.0, z2)]
-                triangle1_normals = [jittered_normal() for _ in range(3)]
-
-                # Triangle 2 vertices and normals
-                triangle2_vertices = [(x2, 0.0, z1), (x2, 0.0, z2), (x1, 0.0, z2)]
-                triangle2_normals = [jittered_normal() for _ in range(3)]
-
-                # Store all of em
-                self.floor_vertices.extend(triangle1_vertices)
-                self.floor_vertices.extend(triangle2_vertices)
-                self.floor_normals.extend(triangle1_normals)
-                self.floor_normals.extend(triangle2_normals)
+        # shared grid, expanded back to one entry per triangle corner so every corner keeps its own normal
+        vertices, indices = generate_floor_grid(floor_size, floor_size, divisions, divisions)
+        self.floor_vertices = expand_indexed(vertices, indices).tolist()
+        # sigma_x 0 = flat (0.05 before), increasing standard deviation makes streak more wide ??
+        # sigma_z 0 = perfectly vertical streaks, changing the z makes a more conical streak?
+        self.floor_normals = microfacet_normals(len(self.floor_vertices), 'gaussian', seed=0,
+                                                sigma_x=0.0, sigma_z=0.0).tolist()
 
     def render_glossy_floor(self):
         #pre gen geometry this time
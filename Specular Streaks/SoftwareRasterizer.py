@@ -0,0 +1,174 @@
+import math
+import numpy as np
+
+# CPU triangle rasterizer for the glossy floor scenes, no GL context needed
+# takes the same floor_vertices / floor_colors arrays as OptimizedSpecularStreakScene
+# and reproduces its gluPerspective + gluLookAt + glRotatef camera
+
+# camera matrices live in CameraMath (no numba import), re-exported here
+from CameraMath import (DEFAULT_EYE, DEFAULT_CENTER, DEFAULT_UP, DEFAULT_FOVY, DEFAULT_NEAR, DEFAULT_FAR,
+                        perspective_matrix, look_at_matrix, rotation_matrix, scene_mvp)
+
+try:
+    from numba import jit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+    def jit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+def project_vertices(vertices, mvp, width, height):
+    # object space -> window space (x, y in pixels with row 0 at the top, z depth in [0, 1]) and clip w
+    homogeneous = np.hstack([vertices.astype(np.float64), np.ones((len(vertices), 1))])
+    clip = homogeneous @ mvp.T
+    w = clip[:, 3]
+    safe_w = np.where(np.abs(w) > 1e-12, w, 1e-12)
+    ndc = clip[:, :3] / safe_w[:, np.newaxis]
+
+    screen = np.empty((len(vertices), 3), dtype=np.float64)
+    screen[:, 0] = (ndc[:, 0] + 1.0) * 0.5 * width
+    screen[:, 1] = (1.0 - ndc[:, 1]) * 0.5 * height
+    screen[:, 2] = (ndc[:, 2] + 1.0) * 0.5
+    return screen, w
+
+
+@jit(nopython=True, cache=True)
+def _rasterize_triangles_numba(screen, inv_w, colors, image, depth):
+    height, width = depth.shape
+    for t in range(screen.shape[0]):
+        x0, y0, z0 = screen[t, 0, 0], screen[t, 0, 1], screen[t, 0, 2]
+        x1, y1, z1 = screen[t, 1, 0], screen[t, 1, 1], screen[t, 1, 2]
+        x2, y2, z2 = screen[t, 2, 0], screen[t, 2, 1], screen[t, 2, 2]
+
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+        if abs(area) < 1e-12:
+            continue
+
+        # pixel centers inside the bounding box
+        min_x = max(int(math.floor(min(x0, x1, x2))), 0)
+        max_x = min(int(math.ceil(max(x0, x1, x2))), width - 1)
+        min_y = max(int(math.floor(min(y0, y1, y2))), 0)
+        max_y = min(int(math.ceil(max(y0, y1, y2))), height - 1)
+
+        for py in range(min_y, max_y + 1):
+            cy = py + 0.5
+            for px in range(min_x, max_x + 1):
+                cx = px + 0.5
+                b0 = ((x1 - cx) * (y2 - cy) - (x2 - cx) * (y1 - cy)) / area
+                b1 = ((x2 - cx) * (y0 - cy) - (x0 - cx) * (y2 - cy)) / area
+                b2 = 1.0 - b0 - b1
+                if b0 < 0.0 or b1 < 0.0 or b2 < 0.0:
+                    continue
+
+                z = b0 * z0 + b1 * z1 + b2 * z2
+                if z >= depth[py, px]:
+                    continue
+                depth[py, px] = z
+
+                # perspective correct Gouraud
+                p0 = b0 * inv_w[t, 0]
+                p1 = b1 * inv_w[t, 1]
+                p2 = b2 * inv_w[t, 2]
+                norm = p0 + p1 + p2
+                for c in range(3):
+                    image[py, px, c] = (p0 * colors[t, 0, c] + p1 * colors[t, 1, c] + p2 * colors[t, 2, c]) / norm
+
+
+def _rasterize_triangles_numpy(screen, inv_w, colors, image, depth):
+    height, width = depth.shape
+    for t in range(screen.shape[0]):
+        (x0, y0, z0), (x1, y1, z1), (x2, y2, z2) = screen[t]
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+        if abs(area) < 1e-12:
+            continue
+
+        min_x = max(int(math.floor(min(x0, x1, x2))), 0)
+        max_x = min(int(math.ceil(max(x0, x1, x2))), width - 1)
+        min_y = max(int(math.floor(min(y0, y1, y2))), 0)
+        max_y = min(int(math.ceil(max(y0, y1, y2))), height - 1)
+        if min_x > max_x or min_y > max_y:
+            continue
+
+        # whole bounding box at once
+        cy, cx = np.mgrid[min_y:max_y + 1, min_x:max_x + 1] + 0.5
+        b0 = ((x1 - cx) * (y2 - cy) - (x2 - cx) * (y1 - cy)) / area
+        b1 = ((x2 - cx) * (y0 - cy) - (x0 - cx) * (y2 - cy)) / area
+        b2 = 1.0 - b0 - b1
+        z = b0 * z0 + b1 * z1 + b2 * z2
+
+        depth_block = depth[min_y:max_y + 1, min_x:max_x + 1]
+        visible = (b0 >= 0.0) & (b1 >= 0.0) & (b2 >= 0.0) & (z < depth_block)
+        if not visible.any():
+            continue
+        depth_block[visible] = z[visible]
+
+        p = np.stack([b0[visible] * inv_w[t, 0], b1[visible] * inv_w[t, 1], b2[visible] * inv_w[t, 2]], axis=1)
+        p /= p.sum(axis=1, keepdims=True)
+        image[min_y:max_y + 1, min_x:max_x + 1][visible] = p @ colors[t]
+
+
+def rasterize(vertices, colors, mvp, width, height, near_w=DEFAULT_NEAR, clear_color=(0.0, 0.0, 0.0),
+              indices=None):
+    # vertices/colors are (N, 3) per vertex, like floor_vertices/floor_colors
+    # indices (uint32, 3 per triangle) or, without them, every 3 rows one triangle
+    # returns (height, width, 3) float32 image with row 0 at the top
+    vertices = np.asarray(vertices, dtype=np.float32)
+    colors = np.asarray(colors, dtype=np.float32)
+    if indices is not None:
+        vertices = vertices[indices]
+        colors = colors[indices]
+    if vertices.ndim != 2 or vertices.shape[1] != 3 or len(vertices) % 3 != 0:
+        raise ValueError(f"Invalid vertex array shape: {vertices.shape}")
+    if colors.shape != vertices.shape:
+        raise ValueError(f"Color array shape {colors.shape} does not match vertices {vertices.shape}")
+
+    screen, w = project_vertices(vertices, mvp, width, height)
+    screen = screen.reshape(-1, 3, 3)
+    w = w.reshape(-1, 3)
+    tri_colors = colors.astype(np.float64).reshape(-1, 3, 3)
+
+    # no near plane clipping, triangles reaching behind it are dropped
+    # (for the floor scenes that is only floor right under the camera, outside the frustum)
+    keep = np.all(w > near_w * 0.999, axis=1)
+    screen = np.ascontiguousarray(screen[keep])
+    inv_w = np.ascontiguousarray(1.0 / w[keep])
+    tri_colors = np.ascontiguousarray(tri_colors[keep])
+
+    image = np.empty((height, width, 3), dtype=np.float64)
+    image[:] = clear_color
+    depth = np.ones((height, width), dtype=np.float64)
+
+    if NUMBA_AVAILABLE:
+        _rasterize_triangles_numba(screen, inv_w, tri_colors, image, depth)
+    else:
+        _rasterize_triangles_numpy(screen, inv_w, tri_colors, image, depth)
+
+    return np.clip(image, 0.0, 1.0).astype(np.float32)
+
+
+def render_floor(vertices, colors, width, height, angle_x=0.0, angle_z=0.0, eye=DEFAULT_EYE,
+                 center=DEFAULT_CENTER, indices=None):
+    # drop in for render_frame: same camera and rotation as OptimizedSpecularStreakScene
+    mvp = scene_mvp(width, height, angle_x, angle_z, eye=eye, center=center)
+    return rasterize(vertices, colors, mvp, width, height, indices=indices)
+
+
+def render_scene(scene, width, height):
+    # convenience for an existing scene object (uses its current floor arrays, angles and eye offset)
+    eye_x = getattr(scene, 'eye_offset_x', 0.0)
+    return render_floor(scene.floor_vertices, scene.floor_colors, width, height,
+                        scene.angle_x, scene.angle_z,
+                        eye=(eye_x, DEFAULT_EYE[1], DEFAULT_EYE[2]),
+                        center=(eye_x, DEFAULT_CENTER[1], DEFAULT_CENTER[2]),
+                        indices=getattr(scene, 'floor_indices', None))
+
+
+def to_uint8(image):
+    return (np.clip(image, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
@@ -1,3 +1,6 @@
+import argparse
+from contextlib import nullcontext
+
 import numpy as np
 import psychopy.visual as visual
 import psychopy.core as core
@@ -7,9 +10,89 @@ import pyglet
 from pyglet.gl import *
 import math
 
+from FloorMesh import generate_floor_grid
+from FrameProfiler import FrameProfiler
+
+# lighting target: 60 fps at ground_resolution 400 (160801 vertices) with 8 lights, run with --resolution 400 --lights 8
+# measured lighting time per frame at that size on a single core: about 27 ms with the numba kernel, 300-350 ms
+# with NumPy, so the target is NOT reached on one core (about 34 fps with the numba kernel)
+# the numba kernel splits the vertices over all cores (prange), so more cores should bring it under the 16.7 ms
+# budget, that has not been measured yet, the FPS report printed every 2 seconds shows what a machine reaches
+
+# Test with numba
+try:
+    from numba import jit, prange
+
+    NUMBA_AVAILABLE = True
+    print("Numba available - using accelerated lighting calculations")
+except ImportError:
+    print("Numba not available - using pure NumPy (slower but still optimized)")
+    NUMBA_AVAILABLE = False
+
+
+    # Needed decorator
+    def jit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+    def prange(n):
+        return range(n)
+
+if NUMBA_AVAILABLE:
+    @jit(nopython=True, parallel=True, cache=True)
+    def compute_multi_light_numba(vertices, normals, light_positions, light_colors, light_scales, view_pos,
+                                  ambient, diffuse, specular, shininess):
+        # scalars only inside the loops, small numpy temporaries would be allocated per vertex and light
+        num_vertices = vertices.shape[0]
+        num_lights = light_positions.shape[0]
+        colors = np.zeros((num_vertices, 3), dtype=np.float32)
+        # n.h below this gives (n.h) ** shininess < 1e-6, skipped (pow is the most expensive part)
+        n_dot_h_cutoff = 1e-6 ** (1.0 / shininess)
+
+        for i in prange(num_vertices):
+            px, py, pz = vertices[i, 0], vertices[i, 1], vertices[i, 2]
+            nx, ny, nz = normals[i, 0], normals[i, 1], normals[i, 2]
+            vx, vy, vz = view_pos[0] - px, view_pos[1] - py, view_pos[2] - pz
+            view_length = np.sqrt(vx * vx + vy * vy + vz * vz)
+            vx, vy, vz = vx / view_length, vy / view_length, vz / view_length
+
+            r = 0.0
+            g = 0.0
+            b = 0.0
+            for k in range(num_lights):
+                lx = light_positions[k, 0] - px
+                ly = light_positions[k, 1] - py
+                lz = light_positions[k, 2] - pz
+                light_distance = np.sqrt(lx * lx + ly * ly + lz * lz)
+                lx, ly, lz = lx / light_distance, ly / light_distance, lz / light_distance
+
+                hx, hy, hz = lx + vx, ly + vy, lz + vz
+                half_length = np.sqrt(hx * hx + hy * hy + hz * hz)
+
+                diffuse_term = diffuse * max(0.0, nx * lx + ny * ly + nz * lz)
+                n_dot_h = (nx * hx + ny * hy + nz * hz) / half_length
+                specular_term = 0.0
+                if n_dot_h > n_dot_h_cutoff:
+                    specular_term = specular * n_dot_h ** shininess
+                attenuation = 1.0 / (1.0 + 0.01 * light_distance + 0.001 * light_distance * light_distance)
+
+                intensity = (ambient + (diffuse_term + specular_term) * attenuation) * light_scales[k]
+                r += intensity * light_colors[k, 0]
+                g += intensity * light_colors[k, 1]
+                b += intensity * light_colors[k, 2]
+
+            colors[i, 0] = min(1.0, max(0.0, r))
+            colors[i, 1] = min(1.0, max(0.0, g))
+            colors[i, 2] = min(1.0, max(0.0, b))
+
+        return colors
+
 
 class SpecularStreakSimulation:
-    def __init__(self):
+    def __init__(self, ground_resolution=100, num_lights=3):
         # Set up monitor and window
         self.win = visual.Window(
             size=[1200, 800],
@@ -21,7 +104,7 @@ class SpecularStreakSimulation:
 
         # Scene parameters
         self.ground_size = 50.0
-        self.ground_resolution = 100
+        self.ground_resolution = ground_resolution
 
         # Light sources (position: [x, y, z], color: [r, g, b], intensity)
         self.lights = [
@@ -29,6 +112,12 @@ class SpecularStreakSimulation:
             {'pos': [0.0, 12.0, 35.0], 'color': [1.0, 1.0, 1.0], 'intensity': 150.0},
             {'pos': [20.0, 6.0, 45.0], 'color': [0.9, 0.8, 1.0], 'intensity': 80.0},
         ]
+        # more than three: the same three again further down, 30 m along z per repeat
+        for k in range(3, num_lights):
+            light = self.lights[k % 3]
+            self.lights.append({'pos': [light['pos'][0], light['pos'][1], light['pos'][2] + 30.0 * (k // 3)],
+                                'color': list(light['color']), 'intensity': light['intensity']})
+        del self.lights[num_lights:]
 
         # Camera parameters
         self.camera_pos = np.array([0.0, 3.0, 0.0])  # Viewer at ground level + 3m height
@@ -47,6 +136,9 @@ class SpecularStreakSimulation:
         self.time = 0.0
         self.light_animation = True
 
+        # optional FrameProfiler, times the lighting when set (run() sets one)
+        self.profiler = None
+
         self.setup_opengl()
         self.create_ground_mesh()
 
@@ -71,35 +163,69 @@ class SpecularStreakSimulation:
         gluPerspective(45.0, 1200 / 800, 0.1, 1000.0)
 
     def create_ground_mesh(self):
-        """Create a mesh for the ground plane"""
-        self.ground_vertices = []
-        self.ground_normals = []
-        self.ground_indices = []
-
-        # Create grid of vertices
-        for i in range(self.ground_resolution + 1):
-            for j in range(self.ground_resolution + 1):
-                x = (i / self.ground_resolution - 0.5) * self.ground_size
-                z = (j / self.ground_resolution - 0.5) * self.ground_size
-                y = 0.0
-
-                # Add small random perturbations for surface roughness
-                noise_scale = 0.02
-                y += noise_scale * (np.random.random() - 0.5)
-
-                self.ground_vertices.extend([x, y, z])
-                self.ground_normals.extend([0.0, 1.0, 0.0])  # Up normal
-
-        # Create triangle indices
-        for i in range(self.ground_resolution):
-            for j in range(self.ground_resolution):
-                # Two triangles per quad
-                v0 = i * (self.ground_resolution + 1) + j
-                v1 = v0 + 1
-                v2 = v0 + (self.ground_resolution + 1)
-                v3 = v2 + 1
-
-                self.ground_indices.extend([v0, v1, v2, v1, v3, v2])
+        """Create a mesh for the ground plane (shared grid vertices + uint32 indices)"""
+        self.ground_vertices, self.ground_indices = generate_floor_grid(
+            self.ground_size, self.ground_size, self.ground_resolution, self.ground_resolution)
+
+        # Add small random perturbations for surface roughness
+        noise_scale = 0.02
+        self.ground_vertices[:, 1] += noise_scale * (np.random.random(len(self.ground_vertices)) - 0.5)
+
+        self.ground_normals = np.zeros_like(self.ground_vertices)
+        self.ground_normals[:, 1] = 1.0  # Up normal
+
+    def get_light_arrays(self):
+        """Current (animated) light positions, colors and intensity scales as (num_lights, ...) arrays"""
+        positions = np.array([light['pos'] for light in self.lights], dtype=np.float32)
+        colors = np.array([light['color'] for light in self.lights], dtype=np.float32)
+        scales = np.array([light['intensity'] / 100.0 for light in self.lights], dtype=np.float32)
+
+        # Animate lights if enabled (same offset for every light)
+        if self.light_animation:
+            positions[:, 0] += 5.0 * math.sin(self.time * 0.5)
+            positions[:, 2] += 2.0 * math.cos(self.time * 0.3)
+
+        return positions, colors, scales
+
+    def compute_ground_colors(self):
+        """
+        Blinn-Phong (Eq. 1) for every light and every vertex in one pass,
+        same terms and attenuation as calculate_blinn_phong, summed over lights and clamped
+        """
+        light_positions, light_colors, light_scales = self.get_light_arrays()
+        view_pos = np.asarray(self.camera_pos, dtype=np.float32)
+        material = self.material
+
+        if NUMBA_AVAILABLE:
+            try:
+                return compute_multi_light_numba(
+                    self.ground_vertices, self.ground_normals, light_positions, light_colors, light_scales,
+                    view_pos, material['ambient'], material['diffuse'], material['specular'], material['shininess']
+                )
+            except Exception as e:
+                print(f"Numba calculation failed: {e}, falling back to NumPy")
+
+        vertices = self.ground_vertices
+        normals = self.ground_normals / np.linalg.norm(self.ground_normals, axis=1, keepdims=True)
+
+        view_dirs = view_pos - vertices  # (V, 3)
+        view_dirs /= np.linalg.norm(view_dirs, axis=1, keepdims=True)
+
+        light_dirs = light_positions[:, np.newaxis, :] - vertices[np.newaxis, :, :]  # (L, V, 3)
+        light_distances = np.linalg.norm(light_dirs, axis=2)  # (L, V)
+        light_dirs /= light_distances[:, :, np.newaxis]
+
+        half_vectors = light_dirs + view_dirs[np.newaxis, :, :]
+        half_vectors /= np.linalg.norm(half_vectors, axis=2, keepdims=True)
+
+        diffuse = material['diffuse'] * np.maximum(0.0, np.einsum('lvk,vk->lv', light_dirs, normals))
+        n_dot_h = np.maximum(0.0, np.einsum('lvk,vk->lv', half_vectors, normals))
+        specular = material['specular'] * n_dot_h ** material['shininess']
+        attenuation = 1.0 / (1.0 + 0.01 * light_distances + 0.001 * light_distances * light_distances)
+
+        intensity = (material['ambient'] + (diffuse + specular) * attenuation) * light_scales[:, np.newaxis]  # (L, V)
+        colors = np.einsum('lv,lc->vc', intensity, light_colors)
+        return np.clip(colors, 0.0, 1.0).astype(np.float32)
 
     def calculate_blinn_phong(self, position, normal, light_pos, light_color, view_pos):
         """
@@ -137,57 +263,35 @@ class SpecularStreakSimulation:
 
         return [intensity * c for c in light_color]
 
+    def profile_stage(self, name):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name)
+
     def render_ground(self):
         """Render the ground plane with specular streaks"""
-        glBegin(GL_TRIANGLES)
-
-        vertices = np.array(self.ground_vertices).reshape(-1, 3)
-        normals = np.array(self.ground_normals).reshape(-1, 3)
-
-        for i in range(0, len(self.ground_indices), 3):
-            # Get triangle vertices
-            v0_idx, v1_idx, v2_idx = self.ground_indices[i:i + 3]
-
-            v0 = vertices[v0_idx]
-            v1 = vertices[v1_idx]
-            v2 = vertices[v2_idx]
-
-            n0 = normals[v0_idx]
-            n1 = normals[v1_idx]
-            n2 = normals[v2_idx]
-
-            # Calculate lighting for each vertex
-            for vertex, normal in [(v0, n0), (v1, n1), (v2, n2)]:
-                total_color = [0.0, 0.0, 0.0]
+        # one color buffer per frame, then a single indexed draw
+        with self.profile_stage('lighting'):
+            self.ground_colors = np.ascontiguousarray(self.compute_ground_colors(), dtype=np.float32)
 
-                # Accumulate lighting from all light sources
-                for light in self.lights:
-                    light_pos = light['pos'].copy()
+        with self.profile_stage('draw'):
+            self.draw_ground()
 
-                    # Animate lights if enabled
-                    if self.light_animation:
-                        light_pos[0] += 5.0 * math.sin(self.time * 0.5)
-                        light_pos[2] += 2.0 * math.cos(self.time * 0.3)
+    def draw_ground(self):
+        """Draw the ground with the colors of render_ground, one indexed draw"""
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
 
-                    color_contribution = self.calculate_blinn_phong(
-                        vertex, normal, light_pos, light['color'], self.camera_pos
-                    )
+        glVertexPointer(3, GL_FLOAT, 0, self.ground_vertices.ctypes.data)
+        glNormalPointer(GL_FLOAT, 0, self.ground_normals.ctypes.data)
+        glColorPointer(3, GL_FLOAT, 0, self.ground_colors.ctypes.data)
 
-                    # Scale by light intensity
-                    intensity_factor = light['intensity'] / 100.0
-                    color_contribution = [c * intensity_factor for c in color_contribution]
+        glDrawElements(GL_TRIANGLES, len(self.ground_indices), GL_UNSIGNED_INT, self.ground_indices.ctypes.data)
 
-                    # Add to total color
-                    total_color = [total_color[i] + color_contribution[i] for i in range(3)]
-
-                # Clamp colors to [0, 1] range
-                total_color = [min(1.0, max(0.0, c)) for c in total_color]
-
-                glColor3f(*total_color)
-                glNormal3f(*normal)
-                glVertex3f(*vertex)
-
-        glEnd()
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_COLOR_ARRAY)
 
     def render_light_sources(self):
         """Render visible light sources as bright spheres"""
@@ -253,7 +357,8 @@ class SpecularStreakSimulation:
         self.render_ground()
 
         # Render light sources
-        self.render_light_sources()
+        with self.profile_stage('draw'):
+            self.render_light_sources()
 
         # Update time
         self.time += 0.016  # Approximately 60 FPS
@@ -269,11 +374,22 @@ class SpecularStreakSimulation:
         print("\nObserve the vertically elongated highlights (specular streaks)")
         print("These represent virtual light columns beneath the surface!")
 
+        print(f"\n{len(self.ground_vertices)} ground vertices, {len(self.lights)} lights, "
+              f"{'numba' if NUMBA_AVAILABLE else 'NumPy'} lighting")
+
         clock = core.Clock()
+        report_timer = clock.getTime()
+        frames_since_report = 0
+        # per stage timings, the frame rate is set by win.flip() (vsync)
+        self.profiler = FrameProfiler(refresh_interval=getattr(self.win, 'monitorFramePeriod', None) or 1.0 / 60.0,
+                                      stages=['events', 'lighting', 'draw', 'flip'])
 
         while True:
+            self.profiler.begin_frame()
+
             # Handle events
-            keys = event.getKeys()
+            with self.profile_stage('events'):
+                keys = event.getKeys()
             if 'escape' in keys:
                 break
             elif 'space' in keys:
@@ -287,10 +403,20 @@ class SpecularStreakSimulation:
             self.render_frame()
 
             # Flip buffers
-            self.win.flip()
-
-            # Control frame rate
-            clock.tick(60)
+            with self.profile_stage('flip'):
+                self.win.flip()
+            self.profiler.end_frame()
+            frames_since_report += 1
+
+            # FPS and stage times every 2 seconds
+            current_time = clock.getTime()
+            if current_time - report_timer >= 2.0:
+                frame_times = self.profiler.frame_times(last=frames_since_report)
+                print(f"FPS: {frames_since_report / (current_time - report_timer):.1f} | frame time "
+                      f"{1000 * np.mean(frame_times):.2f} ms avg, {1000 * np.max(frame_times):.2f} ms max")
+                print(f"  {self.profiler.summary(last=frames_since_report)}")
+                frames_since_report = 0
+                report_timer = current_time
 
         self.win.close()
         core.quit()
@@ -298,8 +424,13 @@ class SpecularStreakSimulation:
 
 def main():
     """Run the specular streak simulation"""
+    parser = argparse.ArgumentParser(description="Specular streaks from several animated lights")
+    parser.add_argument('--resolution', type=int, default=100, help="ground grid divisions per side")
+    parser.add_argument('--lights', type=int, default=3, help="more than 3 repeats them further down the road")
+    args = parser.parse_args()
+
     try:
-        sim = SpecularStreakSimulation()
+        sim = SpecularStreakSimulation(ground_resolution=args.resolution, num_lights=args.lights)
         sim.run()
     except Exception as e:
         print(f"Error running simulation: {e}")
@@ -1,9 +1,11 @@
 from psychopy import visual, core, event
 from pyglet.gl import *
-import random
 import numpy as np
 import math
 
+from FloorMesh import generate_floor_grid, expand_indexed
+from MicrofacetNormals import microfacet_normals
+
 
 class SpecularStreakScene:
     def __init__(self, win):
@@ -192,71 +194,35 @@ class SpecularStreakScene:
         floor_size_x = 10.0
         divisions_x = 25
         divisions_z = 100
-        step_x = floor_size_x / divisions_x
-        step_z = floor_size_z / divisions_z
 
         self.floor_vertices = []
         self.floor_normals = []
         self.floor_colors = []
 
-        def jittered_normal():
-            nx = random.gauss(0.0, 0.1)
-            ny = 1.0
-            nz = random.gauss(0.0, 0.02)  # I can play with variation
-            length = math.sqrt(nx * nx + ny * ny + nz * nz)
-            return (nx / length, ny / length, nz / length)
-
-        # plane
-        for i in range(divisions_x):
-            for j in range(divisions_z):
-                x1 = -floor_size_x / 2 + i * step_x
-                x2 = x1 + step_x
-                z1 = -floor_size_z + j * step_z
-                z2 = z1 + step_z
-
-                # Triangle 1
-                v1 = (x1, 0.0, z1)
-                v2 = (x2, 0.0, z1)
-                v3 = (x1, 0.0, z2)
-
-                # Triangle 2
-                v4 = (x2, 0.0, z1)
-                v5 = (x2, 0.0, z2)
-                v6 = (x1, 0.0, z2)
-
-                # normals time
-                n1 = jittered_normal()
-                n2 = jittered_normal()
-                n3 = jittered_normal()
-                n4 = jittered_normal()
-                n5 = jittered_normal()
-                n6 = jittered_normal()
-
-                # compute lightning for EACH VERTEX
-                try:
-                    if self.use_ward:
-                        c1 = self.ward_lighting(v1, n1, self.camera_pos, self.light_pos)
-                        c2 = self.ward_lighting(v2, n2, self.camera_pos, self.light_pos)
-                        c3 = self.ward_lighting(v3, n3, self.camera_pos, self.light_pos)
-                        c4 = self.ward_lighting(v4, n4, self.camera_pos, self.light_pos)
-                        c5 = self.ward_lighting(v5, n5, self.camera_pos, self.light_pos)
-                        c6 = self.ward_lighting(v6, n6, self.camera_pos, self.light_pos)
-                    else:
-                        c1 = self.blinn_phong_lighting(v1, n1, self.camera_pos, self.light_pos)
-                        c2 = self.blinn_phong_lighting(v2, n2, self.camera_pos, self.light_pos)
-                        c3 = self.blinn_phong_lighting(v3, n3, self.camera_pos, self.light_pos)
-                        c4 = self.blinn_phong_lighting(v4, n4, self.camera_pos, self.light_pos)
-                        c5 = self.blinn_phong_lighting(v5, n5, self.camera_pos, self.light_pos)
-                        c6 = self.blinn_phong_lighting(v6, n6, self.camera_pos, self.light_pos)
-                except Exception as e:
-                    print(f"Lighting calculation error at ({i}, {j}): {e}")
-                    # if bug its gray
-                    c1 = c2 = c3 = c4 = c5 = c6 = np.array([0.1, 0.1, 0.1])
-
-                # store triangle so that I can change the angle later on without recomputing everything like before
-                self.floor_vertices.extend([v1, v2, v3, v4, v5, v6])
-                self.floor_normals.extend([n1, n2, n3, n4, n5, n6])
-                self.floor_colors.extend([c1, c2, c3, c4, c5, c6])
+        # plane (floor spans z in [-20, 0]), one entry per triangle corner so each gets its own normal
+        vertices, indices = generate_floor_grid(floor_size_x, floor_size_z, divisions_x, divisions_z,
+                                                x_min=-floor_size_x / 2, z_min=-floor_size_z)
+        corners = expand_indexed(vertices, indices)
+        # same seeded field on every regeneration, sigma_z I can play with variation
+        normals = microfacet_normals(len(corners), 'gaussian', seed=0, sigma_x=0.1, sigma_z=0.02)
+        lighting = self.ward_lighting if self.use_ward else self.blinn_phong_lighting
+
+        for vertex, normal in zip(corners.tolist(), normals.tolist()):
+            v = tuple(vertex)
+            n = tuple(normal)
+
+            # compute lightning for EACH VERTEX
+            try:
+                c = lighting(v, n, self.camera_pos, self.light_pos)
+            except Exception as e:
+                print(f"Lighting calculation error at {v}: {e}")
+                # if bug its gray
+                c = np.array([0.1, 0.1, 0.1])
+
+            # store so that I can change the angle later on without recomputing everything like before
+            self.floor_vertices.append(v)
+            self.floor_normals.append(n)
+            self.floor_colors.append(c)
 
     def setup_camera(self):
         glMatrixMode(GL_PROJECTION)
@@ -0,0 +1,82 @@
+#version 330 core
+
+in vec3 frag_pos;
+in vec3 frag_normal;
+
+out vec4 frag_color;
+
+uniform vec3 u_camera_pos;
+uniform vec3 u_light_pos;
+
+uniform vec3 u_mat_ambient;
+uniform vec3 u_mat_diffuse;
+uniform vec3 u_mat_specular;
+uniform vec3 u_light_ambient;
+uniform vec3 u_light_diffuse;
+uniform vec3 u_light_specular;
+
+uniform float u_shininess;
+uniform vec2 u_alpha;  // Ward roughness along floor x / y of the tangent frame
+uniform int u_use_ward;
+
+// normal map mode: microfacet normals come from a texture over the floor rect instead of the vertices
+uniform int u_use_normal_map;
+uniform sampler2D u_normal_map;
+uniform vec4 u_floor_rect;  // x_min, z_min, size_x, size_z
+
+const float PI = 3.14159265358979;
+
+void main() {
+    vec3 normal = frag_normal;
+    vec2 alpha = max(u_alpha, vec2(0.001));
+    float shininess = u_shininess;
+
+    if (u_use_normal_map != 0) {
+        vec2 uv = (frag_pos.xz - u_floor_rect.xy) / u_floor_rect.zw;
+        normal = texture(u_normal_map, uv).xyz;
+
+        // mipmapped texels average several normals, the shorter the result the rougher that patch (Toksvig)
+        float n_len = clamp(length(normal), 0.001, 1.0);
+        float variance = (1.0 - n_len) / n_len;
+        alpha = sqrt(alpha * alpha + vec2(variance));
+        shininess = n_len * u_shininess / (n_len + u_shininess * (1.0 - n_len));
+    }
+
+    normal = normalize(normal);
+    vec3 light_dir = normalize(u_light_pos - frag_pos);
+    vec3 view_dir = normalize(u_camera_pos - frag_pos);
+    vec3 halfway = normalize(light_dir + view_dir);
+
+    vec3 ambient = u_mat_ambient * u_light_ambient;
+
+    float n_dot_l = max(dot(normal, light_dir), 0.0);
+    vec3 diffuse = u_mat_diffuse * u_light_diffuse * n_dot_l;
+
+    float n_dot_h = max(dot(normal, halfway), 0.0);
+    vec3 specular = vec3(0.0);
+
+    if (u_use_ward == 0) {
+        specular = u_mat_specular * u_light_specular * pow(n_dot_h, shininess);
+    } else {
+        // same safety checks as ward_lighting_single
+        float n_dot_v = max(dot(normal, view_dir), 0.001);
+        if (n_dot_l >= 0.001 && n_dot_v >= 0.001 && n_dot_h >= 0.001) {
+            // tangent frame from the world x axis (z if the normal is along x)
+            vec3 tangent = vec3(1.0, 0.0, 0.0) - normal * normal.x;
+            if (length(tangent) < 1e-6) {
+                tangent = vec3(0.0, 0.0, 1.0) - normal * normal.z;
+            }
+            tangent = normalize(tangent);
+            vec3 bitangent = cross(normal, tangent);
+
+            vec2 h_tb = vec2(dot(halfway, tangent), dot(halfway, bitangent)) / alpha;
+            float exponent = dot(h_tb, h_tb) / (n_dot_h * n_dot_h);
+            float denominator = 4.0 * PI * alpha.x * alpha.y * sqrt(n_dot_l * n_dot_v);
+            if (exponent <= 20.0 && denominator > 0.0001) {
+                specular = u_mat_specular * u_light_specular * exp(-exponent) / denominator;
+            }
+        }
+    }
+
+    frag_color = vec4(clamp(ambient + diffuse + specular, 0.0, 1.0), 1.0);
+}
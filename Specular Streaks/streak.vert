@@ -0,0 +1,19 @@
+#version 330 core
+
+layout(location = 0) in vec3 in_position;
+layout(location = 1) in vec3 in_normal;
+
+uniform mat4 u_proj;
+uniform mat4 u_view;
+uniform mat4 u_model;
+
+out vec3 frag_pos;
+out vec3 frag_normal;
+
+void main() {
+    // shading stays in floor space, light and camera are inverse rotated on the CPU like the vertex path
+    frag_pos = in_position;
+    frag_normal = in_normal;
+
+    gl_Position = u_proj * u_view * u_model * vec4(in_position, 1.0);
+}
@@ -5,19 +5,30 @@ import random
 import csv
 import os
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
+from BrickMesh import brick_column, column_rng, load_column_geometry
+from ColumnBuffers import ColumnBuffer, world_vertices
+from CheckerboardFloor import CheckerboardFloor, link_program, set_uniforms
+from TrialFrame import TrialFrame
+
 # WITH THIS SCALING!
 # DONT PLACE ANYTHING BETWEEN 6.485 and 15.297 (sqrt234) ALONG VECTOR. distance along vector at 15 is below the plane, and at 6 its above the plane.
 good_distances_to_test = [3, 25]
 # good_disparities = [-0.6, -0.3, -0.1, 0.0, 0.1, 0.3, 0.6]
 good_disparities = [0.3]
 
+# anaglyph.vert, the disparity model of calculate_disparity_for_point
+disparity_uniform_names = ['u_camera_pos', 'u_convergence_distance', 'u_base_disparity', 'u_force_onplane',
+                           'u_pixels_per_degree', 'u_eye_sign', 'u_color_filter']
+
 
 class AnaglyphColumnExperiment:
     def __init__(self, win):
         self.win = win
         self.setup_opengl()
+        self.setup_disparity_shader()
 
         # cam params
         self.camera_pos = [0, 3.0, 0]
@@ -34,8 +45,11 @@ class AnaglyphColumnExperiment:
         # gen checkerboard
         self.generate_checkerboard_floor()
 
-        # pre gen the columns
+        # pre gen the columns, seeded so every session and lab machine shows the same bricks
+        self.column_seed = 0
         self.column_geometries = {}
+        self.column_buffers = {}  # world space, the disparity shader shifts them per eye
+        self.shifted_column_buffers = {}  # without it: (distance, disparity, eye, filter, onplane) -> ColumnBuffer
         self.generate_all_column_geometries()
 
         # exp parmas
@@ -94,83 +108,19 @@ class AnaglyphColumnExperiment:
 
     def generate_checkerboard_floor(self):
         floor_size = 60.0  # large floor
-        square_size = self.checkerboard_square_size
-
-        # get # of squares
-        num_squares = int(floor_size / square_size) + 4  # extra coverage
 
-        self.floor_white_vertices = []
-        self.floor_white_normals = []
-
-        #verif for debug
-        column_positions = []
+        # squares aligned with the first column, the corridor through x = 0 (the columns) left transparent
+        reference_z = self.calculate_position_along_vector(good_distances_to_test[0])[2]
         for distance in good_distances_to_test:
             pos = self.calculate_position_along_vector(distance)
-            column_positions.append((pos[0], pos[2]))  # x, z coordinates
             print(f"Column at distance {distance}: x={pos[0]:.2f}, z={pos[2]:.2f}")
 
-        # start ref point
-        reference_x = 0.0
-        reference_z = column_positions[0][1]
-
-        # align grid with center of colmn
-        start_x = reference_x - (num_squares * square_size) / 2
-        start_z = reference_z - (num_squares * square_size) / 2
-
-        # adjust pos
-        grid_offset_x = (reference_x - start_x) % square_size - square_size / 2
-        grid_offset_z = (reference_z - start_z) % square_size - square_size / 2
-        start_x += grid_offset_x
-        start_z += grid_offset_z
-
-        # see which contains the column
-        column_x_grid_index = round((0.0 - reference_x) / square_size)
-
-        for i in range(num_squares):
-            for j in range(num_squares):
-                x1 = start_x + i * square_size
-                x2 = x1 + square_size
-                z1 = start_z + j * square_size
-                z2 = z1 + square_size
-
-                square_center_x = (x1 + x2) / 2
-                square_center_z = (z1 + z2) / 2
-
-                grid_i = round((square_center_x - reference_x) / square_size)
-                grid_j = round((square_center_z - reference_z) / square_size)
-
-                # remove all white square
-                is_in_column_corridor = (grid_i == column_x_grid_index)
-
-                if is_in_column_corridor:
-                    # Force this entire row to be transparent (no white squares)
-                    print(f"Removing white square in column corridor at ({square_center_x:.1f}, {square_center_z:.1f})")
-                    continue  # Skip the square so its transparent
-
-                # normal checkerboard
-                is_white = (grid_i + grid_j) % 2 == 1
-
-                # white square vrtx list
-                if is_white:
-                    # 2 triangles/square
-                    triangle1_vertices = [(x1, 0.0, z1), (x2, 0.0, z1), (x1, 0.0, z2)]
-                    triangle1_normals = [(0, 1, 0)] * 3
-
-                    triangle2_vertices = [(x2, 0.0, z1), (x2, 0.0, z2), (x1, 0.0, z2)]
-                    triangle2_normals = [(0, 1, 0)] * 3
-
-                    self.floor_white_vertices.extend(triangle1_vertices)
-                    self.floor_white_vertices.extend(triangle2_vertices)
-                    self.floor_white_normals.extend(triangle1_normals)
-                    self.floor_white_normals.extend(triangle2_normals)
-                else:
-                    # This is a transparent square - cif column position we remove it woo
-                    for dist, (col_x, col_z) in zip(good_distances_to_test, column_positions):
-                        if (abs(square_center_x - col_x) < square_size / 4 and
-                                abs(square_center_z - col_z) < square_size / 4):
-                            print(f"  Column clearance: x=±{square_size / 2:.1f}, z=±{square_size / 2:.1f}")
-
-        print(f"Total white squares generated: {len(self.floor_white_vertices) // 6}")  # 6 vertices per square
+        # vertex at every square corner so the per vertex disparity shift matches the old white square triangles
+        self.floor = CheckerboardFloor(self.checkerboard_square_size, 0.0, reference_z, floor_size,
+                                       corridor_x=0.0, square_corners=True,
+                                       vertex_file='anaglyph.vert', extra_uniforms=disparity_uniform_names)
+
+        print(f"Total white squares generated: {self.floor.white_square_count()}")
 
     def calculate_disparity_for_point(self, world_x, world_y, world_z, base_disparity_degrees, force_onplane=False):
         if force_onplane:
@@ -206,6 +156,17 @@ class AnaglyphColumnExperiment:
         glShadeModel(GL_FLAT)  # flat shading
         glClearColor(0.0, 0.0, 0.0, 1.0)
 
+    def setup_disparity_shader(self):
+        # per vertex disparity on the GPU, otherwise the vertices are shifted on the CPU
+        self.disparity_program = None
+        self.disparity_uniforms = {}
+        try:
+            self.disparity_program, self.disparity_uniforms = link_program('anaglyph.vert', 'anaglyph.frag',
+                                                                           disparity_uniform_names)
+            print("Anaglyph disparity shader ready")
+        except Exception as e:
+            print(f"Anaglyph disparity shader unavailable: {e}, shifting vertices on the CPU")
+
     def calculate_size_for_distance(self, distance):
         # size factor/distance so always about same size
         size_factor = distance / self.reference_distance
@@ -216,13 +177,12 @@ class AnaglyphColumnExperiment:
         distances = good_distances_to_test  # Along viewing vector
 
         for distance in distances:
-            self.column_geometries[distance] = self.generate_column_geometry_for_distance(distance)
+            self.column_geometries[distance] = load_column_geometry(self, distance, self.column_seed)
+            if self.disparity_program is not None:
+                self.column_buffers[distance] = ColumnBuffer(world_vertices(self.column_geometries[distance]))
 
-    def generate_column_geometry_for_distance(self, distance_along_vector):
+    def generate_column_geometry_for_distance(self, distance_along_vector, seed=0):
         column_data = {}
-        column_data['vertices'] = []
-        column_data['normals'] = []
-        column_data['brick_data'] = []
         column_data['position'] = self.calculate_position_along_vector(distance_along_vector)
 
         # scaling factor on distance
@@ -240,7 +200,6 @@ class AnaglyphColumnExperiment:
 
         num_bricks = 80  # less bricks
         max_offset = 0.04 * size_factor  # scale offset as well
-        brick_height = total_height / num_bricks
         missing_brick_probability = 0.1
 
         # uniform brightness
@@ -252,84 +211,14 @@ class AnaglyphColumnExperiment:
               f"size_factor={size_factor:.3f}, height={total_height:.3f}")
         print(f"  Plane relationship: {'ABOVE' if pos[1] > 0 else 'BELOW'} ground plane")
 
-        for brick_i in range(num_bricks):
-            y_top = -brick_i * brick_height
-            y_bottom = -(brick_i + 1) * brick_height
-
-            if random.random() < missing_brick_probability:
-                continue
-
-            x_offset = random.uniform(-max_offset, max_offset)
-            z_offset = random.uniform(-max_offset, max_offset)
-
-            # small random variation like my prev column
-            brightness = uniform_brightness + random.uniform(-0.1, 0.1)
-            brightness = max(0.6, min(1.0, brightness))
-
-            brick_x = x_offset
-            brick_z = z_offset
-
-            x1 = brick_x - brick_width / 2
-            x2 = brick_x + brick_width / 2
-            z1 = brick_z - brick_depth / 2
-            z2 = brick_z + brick_depth / 2
-
-            brick_vertices = []
-            brick_normals = []
-            self.add_brick_faces(x1, x2, y_top, y_bottom, z1, z2, brick_vertices, brick_normals)
-
-            column_data['brick_data'].append({
-                'vertices': brick_vertices,
-                'normals': brick_normals,
-                'brightness': brightness,
-                'base_z': brick_z
-            })
+        # whole column at once (BrickMesh), small random brightness variation like my prev column
+        column_data.update(brick_column(column_rng(seed, distance_along_vector), num_bricks, total_height,
+                                        brick_width, brick_depth, max_offset, missing_brick_probability,
+                                        brightness=uniform_brightness, brightness_jitter=0.1,
+                                        brightness_limits=(0.6, 1.0)))
 
         return column_data
 
-    def add_brick_faces(self, x1, x2, y_top, y_bottom, z1, z2, vertices, normals):
-        # Front face
-        vertices.extend([
-            (x1, y_top, z1), (x2, y_top, z1), (x2, y_bottom, z1),
-            (x1, y_top, z1), (x2, y_bottom, z1), (x1, y_bottom, z1)
-        ])
-        normals.extend([(0, 0, 1)] * 6)
-
-        # Back face
-        vertices.extend([
-            (x2, y_top, z2), (x1, y_top, z2), (x1, y_bottom, z2),
-            (x2, y_top, z2), (x1, y_bottom, z2), (x2, y_bottom, z2)
-        ])
-        normals.extend([(0, 0, -1)] * 6)
-
-        # Left face
-        vertices.extend([
-            (x1, y_top, z2), (x1, y_top, z1), (x1, y_bottom, z1),
-            (x1, y_top, z2), (x1, y_bottom, z1), (x1, y_bottom, z2)
-        ])
-        normals.extend([(-1, 0, 0)] * 6)
-
-        # Right face
-        vertices.extend([
-            (x2, y_top, z1), (x2, y_top, z2), (x2, y_bottom, z2),
-            (x2, y_top, z1), (x2, y_bottom, z2), (x2, y_bottom, z1)
-        ])
-        normals.extend([(1, 0, 0)] * 6)
-
-        # Top face
-        vertices.extend([
-            (x1, y_top, z1), (x1, y_top, z2), (x2, y_top, z2),
-            (x1, y_top, z1), (x2, y_top, z2), (x2, y_top, z1)
-        ])
-        normals.extend([(0, 1, 0)] * 6)
-
-        # Bottom face
-        vertices.extend([
-            (x1, y_bottom, z2), (x1, y_bottom, z1), (x2, y_bottom, z1),
-            (x1, y_bottom, z2), (x2, y_bottom, z1), (x2, y_bottom, z2)
-        ])
-        normals.extend([(0, -1, 0)] * 6)
-
     def load_experiment_conditions(self, csv_filename):
         try:
             df = pd.read_csv(csv_filename)
@@ -392,69 +281,74 @@ class AnaglyphColumnExperiment:
             0.0, 1.0, 0.0  # Up vector
         )
 
+    def disparity_uniform_values(self, base_disparity_degrees, eye='left', force_onplane=False,
+                                 color_filter=(1.0, 1.0, 1.0)):
+        return {
+            'u_camera_pos': tuple(self.camera_pos),
+            'u_convergence_distance': self.convergence_distance,
+            'u_base_disparity': base_disparity_degrees,
+            'u_force_onplane': bool(force_onplane),
+            'u_pixels_per_degree': self.win.size[0] / 60.0,
+            'u_eye_sign': -1.0 if eye == 'left' else 1.0,
+            'u_color_filter': tuple(color_filter),
+        }
+
+    def disparity_shift(self, points, base_disparity_degrees, eye='left', force_onplane=False):
+        # calculate_disparity_for_point for an (N, 3) array, as that eye's x shift in world units
+        offset = np.asarray(points, dtype=np.float64) - np.asarray(self.camera_pos, dtype=np.float64)
+        if force_onplane:
+            offset[:, 1] = 0 - self.camera_pos[1]  # Plane is at y=0
+        distance = np.sqrt(np.sum(offset * offset, axis=1))
+
+        distance_factor = (self.convergence_distance - distance) / self.convergence_distance
+        disparity_pixels = (base_disparity_degrees + distance_factor * 0.5) * (self.win.size[0] / 60.0)
+
+        shift = disparity_pixels / 2 * 0.01  # Convert to world units
+        return -shift if eye == 'left' else shift
+
     def render_column_with_proper_disparity(self, distance_along_vector, base_disparity_degrees, eye='left',
                                             color_filter=(1.0, 1.0, 1.0), force_onplane=False):
         if distance_along_vector not in self.column_geometries:
             print(f"Warning: No geometry found for distance {distance_along_vector}")
             return
 
-        column_data = self.column_geometries[distance_along_vector]
-        column_position = column_data['position']
-
-        for brick in column_data['brick_data']:
-            brightness = brick['brightness']
-
-            # no lighting
-            r, g, b = color_filter
-            color_r = brightness * r
-            color_g = brightness * g
-            color_b = brightness * b
-
-            # color directly
-            glColor4f(color_r, color_g, color_b, 1.0)
-
-            glBegin(GL_TRIANGLES)
-            for i in range(len(brick['vertices'])):
-                x, y, z = brick['vertices'][i]
-                # position along vector
-                x_world = x + column_position[0]
-                y_world = y + column_position[1]
-                z_world = z + column_position[2]
-
-                # disparity for 1 vertex with optional onplane forcing
-                vertex_disparity_pixels = self.calculate_disparity_for_point(x_world, y_world, z_world,
-                                                                             base_disparity_degrees, force_onplane)
+        if self.disparity_program is not None:
+            # no lighting, brick grey levels times the filter, shifted in anaglyph.vert
+            glUseProgram(self.disparity_program)
+            set_uniforms(self.disparity_uniforms,
+                         self.disparity_uniform_values(base_disparity_degrees, eye, force_onplane, color_filter))
+            self.column_buffers[distance_along_vector].draw(use_colors=True)
+            glUseProgram(0)
+            return
 
-                # eye specific disparity
-                if eye == 'left':
-                    disparity_x = -vertex_disparity_pixels / 2 * 0.01  # Convert to world units
-                else:
-                    disparity_x = vertex_disparity_pixels / 2 * 0.01
+        # baked once per eye and condition: world space, disparity shifted, brick grey level times the filter
+        key = (distance_along_vector, base_disparity_degrees, eye, tuple(color_filter), force_onplane)
+        if key not in self.shifted_column_buffers:
+            vertices = world_vertices(self.column_geometries[distance_along_vector])
+            vertices['position'][:, 0] += self.disparity_shift(vertices['position'], base_disparity_degrees, eye,
+                                                               force_onplane)
+            # no lighting, color directly
+            vertices['color'][:, :3] = np.rint(vertices['color'][:, :3] * np.asarray(color_filter, dtype=np.float32))
+            self.shifted_column_buffers[key] = ColumnBuffer(vertices)
 
-                glVertex3f(x_world + disparity_x, y_world, z_world)
-            glEnd()
+        self.shifted_column_buffers[key].draw(use_colors=True)
 
     def render_checkerboard_floor_with_disparity(self, base_disparity_degrees, eye='left',
                                                  color_filter=(1.0, 1.0, 1.0)):
+        if self.floor.program is not None:
+            # never force onplane for floor, shifted in anaglyph.vert
+            glColor4f(0.9, 0.9, 0.9, 1.0)
+            self.floor.draw(uniforms=self.disparity_uniform_values(base_disparity_degrees, eye, False, color_filter))
+            return
+
         r, g, b = color_filter
 
         glColor4f(0.9 * r, 0.9 * g, 0.9 * b, 1.0)
 
-        glBegin(GL_TRIANGLES)
-        for i in range(len(self.floor_white_vertices)):
-            x, y, z = self.floor_white_vertices[i]
-
-            # Calculate disparity for each floor vertex (never force onplane for floor)
-            vertex_disparity_pixels = self.calculate_disparity_for_point(x, y, z, base_disparity_degrees, False)
-
-            # eye specific disparity
-            if eye == 'left':
-                disparity_x = -vertex_disparity_pixels / 2 * 0.01
-            else:
-                disparity_x = vertex_disparity_pixels / 2 * 0.01
-
-            glVertex3f(x + disparity_x, y, z)
-        glEnd()
+        # disparity for each floor vertex (never force onplane for floor), the squares stay where they were
+        positions = self.floor.positions.copy()
+        positions[:, 0] += self.disparity_shift(positions, base_disparity_degrees, eye, False)
+        self.floor.draw(positions)
 
     def render_anaglyph_frame(self, trial_data):
         disparity = trial_data['disparity_degrees']
@@ -639,16 +533,22 @@ Press ESC to quit at any time.""",
         self.load_experiment_conditions('experiment_conditions.csv')
         self.show_instructions()
 
+        # offscreen copy of the current trial's image
+        trial_frame = TrialFrame(self.win)
+
         for trial_num, trial_data in enumerate(self.trials, 1):
             if trial_num > 1:
                 self.show_trial_feedback(trial_num, len(self.trials))
 
+            # static scene: rendered once before onset, each frame only blits it
+            trial_frame.capture(lambda: self.render_anaglyph_frame(trial_data))
+
             # show image
             start_time = core.getTime()
             stimulus_duration = trial_data.get('presentation_time', 3.0)
 
             while core.getTime() - start_time < stimulus_duration:
-                self.render_anaglyph_frame(trial_data)
+                trial_frame.draw()
                 self.win.flip()
 
                 # Check for escape
@@ -0,0 +1,111 @@
+import zlib
+
+import numpy as np
+
+from PackedVertices import PACKED_VERTEX_DTYPE, PACKED_STRIDE, POSITION_OFFSET, COLOR_OFFSET, pack_normals, pack_colors
+from GeometrySnapshots import load_snapshot, source_digest
+
+# Brick geometry for the column experiments, emitted straight into PackedVertices arrays
+# same 36 vertices per brick and face order as the old add_brick_faces: front, back, left, right, top, bottom
+
+# per face corner: (which x, which y, which z) with 0 = x1 / y_top / z1 and 1 = x2 / y_bottom / z2
+BRICK_CORNERS = np.array([
+    # Front face
+    (0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 0, 0), (1, 1, 0), (0, 1, 0),
+    # Back face
+    (1, 0, 1), (0, 0, 1), (0, 1, 1), (1, 0, 1), (0, 1, 1), (1, 1, 1),
+    # Left face
+    (0, 0, 1), (0, 0, 0), (0, 1, 0), (0, 0, 1), (0, 1, 0), (0, 1, 1),
+    # Right face
+    (1, 0, 0), (1, 0, 1), (1, 1, 1), (1, 0, 0), (1, 1, 1), (1, 1, 0),
+    # Top face
+    (0, 0, 0), (0, 0, 1), (1, 0, 1), (0, 0, 0), (1, 0, 1), (1, 0, 0),
+    # Bottom face
+    (0, 1, 1), (0, 1, 0), (1, 1, 0), (0, 1, 1), (1, 1, 0), (1, 1, 1),
+], dtype=np.intp)
+
+BRICK_NORMALS = np.repeat(np.array([
+    (0, 0, 1), (0, 0, -1), (-1, 0, 0), (1, 0, 0), (0, 1, 0), (0, -1, 0),
+], dtype=np.float32), 6, axis=0)
+
+VERTICES_PER_BRICK = len(BRICK_CORNERS)
+
+_packed_brick_normals = pack_normals(BRICK_NORMALS)
+
+
+def packed_bricks(x1, x2, y_top, y_bottom, z1, z2, brightness=1.0):
+    # scalars for one brick or equal length arrays for many, returns (bricks * 36,) PACKED_VERTEX_DTYPE
+    x = np.stack(np.broadcast_arrays(np.atleast_1d(x1), np.atleast_1d(x2)), axis=1).astype(np.float32)
+    y = np.stack(np.broadcast_arrays(np.atleast_1d(y_top), np.atleast_1d(y_bottom)), axis=1).astype(np.float32)
+    z = np.stack(np.broadcast_arrays(np.atleast_1d(z1), np.atleast_1d(z2)), axis=1).astype(np.float32)
+    num_bricks = max(len(x), len(y), len(z))
+    x, y, z = (np.broadcast_to(axis, (num_bricks, 2)) for axis in (x, y, z))
+
+    vertices = np.empty((num_bricks, VERTICES_PER_BRICK), dtype=PACKED_VERTEX_DTYPE)
+    vertices['position'][..., 0] = x[:, BRICK_CORNERS[:, 0]]
+    vertices['position'][..., 1] = y[:, BRICK_CORNERS[:, 1]]
+    vertices['position'][..., 2] = z[:, BRICK_CORNERS[:, 2]]
+    vertices['normal'] = _packed_brick_normals
+
+    # grey level per brick
+    gray = np.broadcast_to(np.asarray(brightness, dtype=np.float32).reshape(-1), (num_bricks,))
+    vertices['color'] = pack_colors(np.repeat(gray, 3).reshape(-1, 3))[:, np.newaxis, :]
+    return vertices.reshape(-1)
+
+
+def column_rng(seed, distance):
+    # one independent, reproducible numpy stream per column (crc32 of the distance, same in every run)
+    return np.random.default_rng([seed, zlib.crc32(repr(float(distance)).encode('utf-8'))])
+
+
+def brick_column(rng, num_bricks, total_height, brick_width, brick_depth, max_offset, missing_probability,
+                 brightness=None, brightness_jitter=0.0, brightness_limits=(0.6, 1.0)):
+    # every brick of a column in one go, rows stacked down from y = 0, centred on x = z = 0
+    # returns 'vertices' (kept bricks * 36,) PACKED_VERTEX_DTYPE (its 'position' field is the (N, 3) array),
+    # 'rows' of the kept bricks, their x / z 'offsets' and, when a brightness is given, a grey level per brick
+    brick_height = total_height / num_bricks
+    rows = np.flatnonzero(rng.random(num_bricks) >= missing_probability)
+    offsets = rng.uniform(-max_offset, max_offset, (len(rows), 2))
+
+    y_top = -rows * brick_height
+    x, z = offsets[:, 0], offsets[:, 1]
+    column = {'rows': rows, 'offsets': offsets}
+
+    gray = 1.0
+    if brightness is not None:
+        gray = np.clip(brightness + rng.uniform(-brightness_jitter, brightness_jitter, len(rows)),
+                       *brightness_limits)
+        column['brightness'] = gray
+
+    column['vertices'] = packed_bricks(x - brick_width / 2, x + brick_width / 2, y_top, y_top - brick_height,
+                                       z - brick_depth / 2, z + brick_depth / 2, gray)
+    return column
+
+
+def column_arrays(column_data):
+    # generate_column_geometry_for_distance() dict -> arrays for a snapshot
+    arrays = {name: np.asarray(value) for name, value in column_data.items()}
+    arrays['position'] = np.asarray(column_data['position'], dtype=np.float64)
+    return arrays
+
+
+def column_from_arrays(arrays):
+    column_data = dict(arrays)
+    column_data['position'] = arrays['position'].tolist()
+    return column_data
+
+
+def load_column_geometry(renderer, distance, seed):
+    # renderer.generate_column_geometry_for_distance(distance, seed), or the snapshot of an identical earlier call
+    params = {
+        'distance': distance,
+        'seed': seed,
+        'camera_pos': renderer.camera_pos,
+        'look_at_point': renderer.look_at_point,
+        'reference_distance': renderer.reference_distance,
+        'generator': source_digest(type(renderer).generate_column_geometry_for_distance,
+                                   brick_column, packed_bricks, column_rng),
+    }
+    arrays = load_snapshot('column', params,
+                           lambda: column_arrays(renderer.generate_column_geometry_for_distance(distance, seed)))
+    return column_from_arrays(arrays)
@@ -0,0 +1,172 @@
+import ctypes
+import os
+
+import numpy as np
+from pyglet.gl import *
+
+# Checkerboard floor for the column experiments, the pattern computed per fragment (checkerboard.vert / .frag)
+# same squares as the old generate_checkerboard_floor loop: square (0, 0) centred on (reference_x, reference_z),
+# white where grid_i + grid_j is odd, the grid column holding the columns (corridor) left out
+# drawn as one quad, or with square_corners=True as a grid with a vertex at every square corner so a per vertex
+# shift (anaglyph disparity) lands exactly where it did on the old triangles
+# without shaders the white squares are built as triangles (vectorized) and drawn as before
+
+shader_dir = os.path.dirname(os.path.abspath(__file__))
+
+# per square corner (which x, which z) with 0 = x1 / z1 and 1 = x2 / z2, old triangle order
+SQUARE_CORNERS = np.array([(0, 0), (1, 0), (0, 1), (1, 0), (1, 1), (0, 1)], dtype=np.intp)
+
+
+def floor_grid_range(floor_size, square_size):
+    # first and last grid index along x and z, int(floor_size / square_size) + 4 squares a side like before
+    num_squares = int(floor_size / square_size) + 4
+    first = -(num_squares // 2)
+    return first, first + num_squares - 1
+
+
+def square_triangles(x_edges, z_edges):
+    # (squares, 2) x and z edges -> (squares * 6, 3) float32 triangle vertices on y = 0
+    vertices = np.zeros((len(x_edges), len(SQUARE_CORNERS), 3), dtype=np.float32)
+    vertices[..., 0] = x_edges[:, SQUARE_CORNERS[:, 0]]
+    vertices[..., 2] = z_edges[:, SQUARE_CORNERS[:, 1]]
+    return vertices.reshape(-1, 3)
+
+
+def compile_shader(source, shader_type):
+    shader = glCreateShader(shader_type)
+    source_buffer = ctypes.create_string_buffer(source.encode('utf-8'))
+    source_ptr = ctypes.cast(ctypes.pointer(ctypes.pointer(source_buffer)),
+                             ctypes.POINTER(ctypes.POINTER(GLchar)))
+    glShaderSource(shader, 1, source_ptr, None)
+    glCompileShader(shader)
+
+    status = GLint()
+    glGetShaderiv(shader, GL_COMPILE_STATUS, ctypes.byref(status))
+    if not status.value:
+        log = ctypes.create_string_buffer(4096)
+        glGetShaderInfoLog(shader, 4096, None, log)
+        raise RuntimeError(f"Shader compile failed: {log.value.decode(errors='replace')}")
+    return shader
+
+
+def link_program(vertex_file, fragment_file, uniform_names):
+    # program from two shader files next to this one, and its uniform locations by name
+    with open(os.path.join(shader_dir, vertex_file)) as f:
+        vertex_source = f.read()
+    with open(os.path.join(shader_dir, fragment_file)) as f:
+        fragment_source = f.read()
+
+    program = glCreateProgram()
+    glAttachShader(program, compile_shader(vertex_source, GL_VERTEX_SHADER))
+    glAttachShader(program, compile_shader(fragment_source, GL_FRAGMENT_SHADER))
+    glLinkProgram(program)
+
+    status = GLint()
+    glGetProgramiv(program, GL_LINK_STATUS, ctypes.byref(status))
+    if not status.value:
+        log = ctypes.create_string_buffer(4096)
+        glGetProgramInfoLog(program, 4096, None, log)
+        raise RuntimeError(f"Shader link failed: {log.value.decode(errors='replace')}")
+
+    uniforms = {name: glGetUniformLocation(program, name.encode('utf-8')) for name in uniform_names}
+    return program, uniforms
+
+
+def set_uniforms(locations, values):
+    # name -> int (or bool), float or 2 / 3 floats, on the program in use
+    for name, value in values.items():
+        if isinstance(value, (bool, int)):
+            glUniform1i(locations[name], int(value))
+        elif isinstance(value, (tuple, list)) and len(value) == 2:
+            glUniform2f(locations[name], float(value[0]), float(value[1]))
+        elif isinstance(value, (tuple, list)):
+            glUniform3f(locations[name], float(value[0]), float(value[1]), float(value[2]))
+        else:
+            glUniform1f(locations[name], float(value))
+
+
+class CheckerboardFloor:
+    def __init__(self, square_size, reference_x, reference_z, floor_size=60.0, corridor_x=0.0,
+                 square_corners=False, vertex_file='checkerboard.vert', extra_uniforms=()):
+        # needs the GL context, corridor_x is any world x in the corridor (None keeps every square)
+        # another vertex_file (with its extra_uniforms) can move the vertices, it must pass on floor_xz
+        self.reference_x = reference_x
+        self.reference_z = reference_z
+        self.floor_size = floor_size
+        self.corridor_x = corridor_x
+        self.square_corners = square_corners
+
+        self.program = None
+        self.uniforms = {}
+        try:
+            self.program, self.uniforms = link_program(
+                vertex_file, 'checkerboard.frag',
+                ['u_square_size', 'u_grid_origin', 'u_corridor', 'u_hide_corridor'] + list(extra_uniforms))
+        except Exception as e:
+            print(f"Checkerboard shader unavailable: {e}, drawing the white squares as triangles")
+
+        self.set_square_size(square_size)
+
+    def set_square_size(self, square_size):
+        # only a handful of vertices to redo with the shader, a new pattern is just new uniforms
+        self.square_size = square_size
+        first, last = floor_grid_range(self.floor_size, square_size)
+        if self.corridor_x is None:
+            self.corridor = None
+        else:
+            self.corridor = round((self.corridor_x - self.reference_x) / square_size)
+
+        if self.program is not None and not self.square_corners:
+            grid_i = grid_j = np.array([first])
+            size = last - first + 1
+        else:
+            grid_i, grid_j = self.grid_squares(white_only=self.program is None)
+            size = 1
+
+        x1 = self.reference_x + (grid_i - 0.5) * square_size
+        z1 = self.reference_z + (grid_j - 0.5) * square_size
+        self.positions = square_triangles(np.stack([x1, x1 + size * square_size], axis=1),
+                                          np.stack([z1, z1 + size * square_size], axis=1))
+        # world x / z for the shader, stays put when the positions are shifted
+        self.floor_xz = np.ascontiguousarray(self.positions[:, [0, 2]])
+
+    def draw(self, positions=None, uniforms=None):
+        # current glColor, positions: (N, 3) replacement for self.positions (e.g. shifted for one eye)
+        # uniforms: values for the extra_uniforms, see set_uniforms
+        positions = self.positions if positions is None else np.ascontiguousarray(positions, dtype=np.float32)
+
+        if self.program is not None:
+            glUseProgram(self.program)
+            glUniform1f(self.uniforms['u_square_size'], float(self.square_size))
+            glUniform2f(self.uniforms['u_grid_origin'], float(self.reference_x), float(self.reference_z))
+            glUniform1f(self.uniforms['u_corridor'], float(self.corridor or 0))
+            glUniform1i(self.uniforms['u_hide_corridor'], int(self.corridor is not None))
+            if uniforms:
+                set_uniforms(self.uniforms, uniforms)
+
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glTexCoordPointer(2, GL_FLOAT, 0, self.floor_xz.ctypes.data)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, positions.ctypes.data)
+        glDrawArrays(GL_TRIANGLES, 0, len(positions))
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        if self.program is not None:
+            glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+            glUseProgram(0)
+
+    def grid_squares(self, white_only=False):
+        # (grid_i, grid_j) of every square on the floor, or just the drawn white ones
+        first, last = floor_grid_range(self.floor_size, self.square_size)
+        grid_i, grid_j = np.meshgrid(np.arange(first, last + 1), np.arange(first, last + 1), indexing='ij')
+        grid_i, grid_j = grid_i.ravel(), grid_j.ravel()
+        if white_only:
+            white = (grid_i + grid_j) % 2 == 1
+            if self.corridor is not None:
+                white &= grid_i != self.corridor
+            grid_i, grid_j = grid_i[white], grid_j[white]
+        return grid_i, grid_j
+
+    def white_square_count(self):
+        return len(self.grid_squares(white_only=True)[0])
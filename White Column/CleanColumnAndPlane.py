@@ -7,6 +7,11 @@ import os
 from datetime import datetime
 import pandas as pd
 
+from BrickMesh import brick_column, column_rng, load_column_geometry
+from ColumnBuffers import ColumnBuffer, world_vertices
+from CheckerboardFloor import CheckerboardFloor
+from TrialFrame import TrialFrame
+
 good_distances_to_test = [3, 25]
 good_disparities = [0.3]
 
@@ -31,8 +36,10 @@ class SimpleColumnRenderer:
         # gen checkerboard
         self.generate_checkerboard_floor()
 
-        # pre gen the columns
+        # pre gen the columns, seeded so every session and lab machine shows the same bricks
+        self.column_seed = 0
         self.column_geometries = {}
+        self.column_buffers = {}
         self.generate_all_column_geometries()
 
         # exp parmas
@@ -84,72 +91,11 @@ class SimpleColumnRenderer:
 
     def generate_checkerboard_floor(self):
         floor_size = 60.0  # large floor
-        square_size = self.checkerboard_square_size
-
-        # get # of squares
-        num_squares = int(floor_size / square_size) + 4  # extra coverage
-
-        self.floor_white_vertices = []
-        self.floor_white_normals = []
-
-        # verif column positions for debug
-        column_positions = []
-        for distance in good_distances_to_test:
-            pos = self.calculate_position_along_vector(distance)
-            column_positions.append((pos[0], pos[2]))  # x, z coordinates
-
-        # start ref point
-        reference_x = 0.0
-        reference_z = column_positions[0][1]
-
-        # align grid with center of colmn
-        start_x = reference_x - (num_squares * square_size) / 2
-        start_z = reference_z - (num_squares * square_size) / 2
-
-        # adjust pos
-        grid_offset_x = (reference_x - start_x) % square_size - square_size / 2
-        grid_offset_z = (reference_z - start_z) % square_size - square_size / 2
-        start_x += grid_offset_x
-        start_z += grid_offset_z
-
-        # see which contains the column
-        column_x_grid_index = round((0.0 - reference_x) / square_size)
-
-        for i in range(num_squares):
-            for j in range(num_squares):
-                x1 = start_x + i * square_size
-                x2 = x1 + square_size
-                z1 = start_z + j * square_size
-                z2 = z1 + square_size
-
-                square_center_x = (x1 + x2) / 2
-                square_center_z = (z1 + z2) / 2
-
-                grid_i = round((square_center_x - reference_x) / square_size)
-                grid_j = round((square_center_z - reference_z) / square_size)
-
-                # remove all white square
-                is_in_column_corridor = (grid_i == column_x_grid_index)
-
-                if is_in_column_corridor:
-                    continue  # Skip the square so its transparent
-
-                # normal checkerboard
-                is_white = (grid_i + grid_j) % 2 == 1
 
-                # white square vrtx list
-                if is_white:
-                    # 2 triangles/square
-                    triangle1_vertices = [(x1, 0.0, z1), (x2, 0.0, z1), (x1, 0.0, z2)]
-                    triangle1_normals = [(0, 1, 0)] * 3
-
-                    triangle2_vertices = [(x2, 0.0, z1), (x2, 0.0, z2), (x1, 0.0, z2)]
-                    triangle2_normals = [(0, 1, 0)] * 3
-
-                    self.floor_white_vertices.extend(triangle1_vertices)
-                    self.floor_white_vertices.extend(triangle2_vertices)
-                    self.floor_white_normals.extend(triangle1_normals)
-                    self.floor_white_normals.extend(triangle2_normals)
+        # squares aligned with the first column, the corridor through x = 0 (the columns) left transparent
+        reference_z = self.calculate_position_along_vector(good_distances_to_test[0])[2]
+        # one quad, the checker pattern is computed in its fragment shader (CheckerboardFloor)
+        self.floor = CheckerboardFloor(self.checkerboard_square_size, 0.0, reference_z, floor_size, corridor_x=0.0)
 
     def setup_opengl(self):
         glEnable(GL_DEPTH_TEST)
@@ -168,13 +114,12 @@ class SimpleColumnRenderer:
         distances = good_distances_to_test
 
         for distance in distances:
-            self.column_geometries[distance] = self.generate_column_geometry_for_distance(distance)
+            self.column_geometries[distance] = load_column_geometry(self, distance, self.column_seed)
+            # baked into world space on the GPU, one draw call per frame
+            self.column_buffers[distance] = ColumnBuffer(world_vertices(self.column_geometries[distance]))
 
-    def generate_column_geometry_for_distance(self, distance_along_vector):
+    def generate_column_geometry_for_distance(self, distance_along_vector, seed=0):
         column_data = {}
-        column_data['vertices'] = []
-        column_data['normals'] = []
-        column_data['brick_data'] = []
         column_data['position'] = self.calculate_position_along_vector(distance_along_vector)
 
         # scaling factor on distance
@@ -192,83 +137,14 @@ class SimpleColumnRenderer:
 
         num_bricks = 80
         max_offset = 0.04 * size_factor  # scale offset as well
-        brick_height = total_height / num_bricks
         missing_brick_probability = 0.1
 
-        pos = column_data['position']
-
-        for brick_i in range(num_bricks):
-            y_top = -brick_i * brick_height
-            y_bottom = -(brick_i + 1) * brick_height
-
-            if random.random() < missing_brick_probability:
-                continue
-
-            x_offset = random.uniform(-max_offset, max_offset)
-            z_offset = random.uniform(-max_offset, max_offset)
-
-            brick_x = x_offset
-            brick_z = z_offset
-
-            x1 = brick_x - brick_width / 2
-            x2 = brick_x + brick_width / 2
-            z1 = brick_z - brick_depth / 2
-            z2 = brick_z + brick_depth / 2
-
-            brick_vertices = []
-            brick_normals = []
-            self.add_brick_faces(x1, x2, y_top, y_bottom, z1, z2, brick_vertices, brick_normals)
-
-            column_data['brick_data'].append({
-                'vertices': brick_vertices,
-                'normals': brick_normals
-            })
+        # whole column at once (BrickMesh): missing brick mask, offsets, packed vertices with normals
+        column_data.update(brick_column(column_rng(seed, distance_along_vector), num_bricks, total_height,
+                                        brick_width, brick_depth, max_offset, missing_brick_probability))
 
         return column_data
 
-    def add_brick_faces(self, x1, x2, y_top, y_bottom, z1, z2, vertices, normals):
-        # Front face
-        vertices.extend([
-            (x1, y_top, z1), (x2, y_top, z1), (x2, y_bottom, z1),
-            (x1, y_top, z1), (x2, y_bottom, z1), (x1, y_bottom, z1)
-        ])
-        normals.extend([(0, 0, 1)] * 6)
-
-        # Back face
-        vertices.extend([
-            (x2, y_top, z2), (x1, y_top, z2), (x1, y_bottom, z2),
-            (x2, y_top, z2), (x1, y_bottom, z2), (x2, y_bottom, z2)
-        ])
-        normals.extend([(0, 0, -1)] * 6)
-
-        # Left face
-        vertices.extend([
-            (x1, y_top, z2), (x1, y_top, z1), (x1, y_bottom, z1),
-            (x1, y_top, z2), (x1, y_bottom, z1), (x1, y_bottom, z2)
-        ])
-        normals.extend([(-1, 0, 0)] * 6)
-
-        # Right face
-        vertices.extend([
-            (x2, y_top, z1), (x2, y_top, z2), (x2, y_bottom, z2),
-            (x2, y_top, z1), (x2, y_bottom, z2), (x2, y_bottom, z1)
-        ])
-        normals.extend([(1, 0, 0)] * 6)
-
-        # Top face
-        vertices.extend([
-            (x1, y_top, z1), (x1, y_top, z2), (x2, y_top, z2),
-            (x1, y_top, z1), (x2, y_top, z2), (x2, y_top, z1)
-        ])
-        normals.extend([(0, 1, 0)] * 6)
-
-        # Bottom face
-        vertices.extend([
-            (x1, y_bottom, z2), (x1, y_bottom, z1), (x2, y_bottom, z1),
-            (x1, y_bottom, z2), (x2, y_bottom, z1), (x2, y_bottom, z2)
-        ])
-        normals.extend([(0, -1, 0)] * 6)
-
     def setup_camera(self):
         # cam setup
         glMatrixMode(GL_PROJECTION)
@@ -287,36 +163,19 @@ class SimpleColumnRenderer:
         )
 
     def render_column(self, distance_along_vector):
-        if distance_along_vector not in self.column_geometries:
+        if distance_along_vector not in self.column_buffers:
             return
 
-        column_data = self.column_geometries[distance_along_vector]
-        column_position = column_data['position']
-
         # white color
         glColor4f(1.0, 1.0, 1.0, 1.0)
 
-        for brick in column_data['brick_data']:
-            glBegin(GL_TRIANGLES)
-            for i in range(len(brick['vertices'])):
-                x, y, z = brick['vertices'][i]
-                # position along vector
-                x_world = x + column_position[0]
-                y_world = y + column_position[1]
-                z_world = z + column_position[2]
-
-                glVertex3f(x_world, y_world, z_world)
-            glEnd()
+        self.column_buffers[distance_along_vector].draw()
 
     def render_checkerboard_floor(self):
         # white color for floor
         glColor4f(0.9, 0.9, 0.9, 1.0)
 
-        glBegin(GL_TRIANGLES)
-        for i in range(len(self.floor_white_vertices)):
-            x, y, z = self.floor_white_vertices[i]
-            glVertex3f(x, y, z)
-        glEnd()
+        self.floor.draw()
 
     def render_frame(self):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -524,16 +383,22 @@ Press ESC to quit at any time.""",
         self.load_experiment_conditions('experiment_conditions.csv')
         self.show_instructions()
 
+        # offscreen copy of the current trial's image
+        trial_frame = TrialFrame(self.win)
+
         for trial_num, trial_data in enumerate(self.trials, 1):
             if trial_num > 1:
                 self.show_trial_feedback(trial_num, len(self.trials))
 
+            # static scene: rendered once before onset, each frame only blits it
+            trial_frame.capture(lambda: self.render_trial_frame(trial_data))
+
             # show image
             start_time = core.getTime()
             stimulus_duration = trial_data.get('presentation_time', 3.0)
 
             while core.getTime() - start_time < stimulus_duration:
-                self.render_trial_frame(trial_data)
+                trial_frame.draw()
                 self.win.flip()
 
                 # Check for escape
@@ -0,0 +1,58 @@
+import numpy as np
+from pyglet.gl import *
+
+from BrickMesh import PACKED_STRIDE, POSITION_OFFSET, COLOR_OFFSET
+
+# A column baked into world space once and kept in a GPU buffer, one glDrawArrays per frame (per eye)
+# instead of a glVertex3f per vertex with the column position added in Python
+
+
+def world_vertices(column_data):
+    # generate_column_geometry_for_distance() vertices moved to the column's position, a copy
+    vertices = column_data['vertices'].copy()
+    vertices['position'] += np.asarray(column_data['position'], dtype=np.float32)
+    return vertices
+
+
+class ColumnBuffer:
+    def __init__(self, vertices):
+        # needs the GL context, client side arrays if the buffer can't be made
+        self.vertices = np.ascontiguousarray(vertices)
+        self.count = len(self.vertices)
+        self.buffer = None
+        try:
+            buffer = GLuint()
+            glGenBuffers(1, buffer)
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices.ctypes.data, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            self.buffer = buffer
+        except Exception as e:
+            print(f"Column buffer upload failed: {e}, using client-side arrays")
+
+    def draw(self, use_colors=False):
+        # use_colors: the packed per vertex colors, otherwise the current glColor
+        if self.buffer is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+            base = 0
+        else:
+            base = self.vertices.ctypes.data
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, PACKED_STRIDE, base + POSITION_OFFSET)
+        if use_colors:
+            glEnableClientState(GL_COLOR_ARRAY)
+            glColorPointer(4, GL_UNSIGNED_BYTE, PACKED_STRIDE, base + COLOR_OFFSET)
+
+        glDrawArrays(GL_TRIANGLES, 0, self.count)
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if use_colors:
+            glDisableClientState(GL_COLOR_ARRAY)
+        if self.buffer is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        if self.buffer is not None:
+            glDeleteBuffers(1, self.buffer)
+            self.buffer = None
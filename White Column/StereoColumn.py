@@ -78,12 +78,13 @@ class WhiteColumnScene:
         self.floor_vertices = []
         self.floor_normals = []
 
+        # seeded so both eyes see the same floor
+        rng = random.Random(0)
+
         def jittered_normal():
-            nx = random.gauss(0.0, 0.05)
-            ny = 1.0
-            nz = 0.0
-            length = (nx ** 2 + ny ** 2) ** 0.5
-            return (nx / length, ny / length, 0.0)
+            nx = rng.gauss(0.0, 0.05)
+            length = (nx ** 2 + 1.0) ** 0.5
+            return (nx / length, 1.0 / length, 0.0)
 
         for i in range(divisions):
             for j in range(divisions):
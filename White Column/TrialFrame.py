@@ -0,0 +1,72 @@
+from pyglet.gl import *
+
+# The static stimulus of a trial rendered once into an offscreen texture before onset, every frame of the
+# presentation then only blits it to the window, so frame times no longer depend on the scene
+# without framebuffer objects the scene is rendered every frame as before
+
+
+class TrialFrame:
+    def __init__(self, win):
+        # needs the GL context, same size as the window
+        self.size = (int(win.size[0]), int(win.size[1]))
+        self.render = None
+        self.fbo = None
+        try:
+            self.create_framebuffer()
+        except Exception as e:
+            print(f"Offscreen trial frame unavailable: {e}, rendering every frame")
+            self.fbo = None
+
+    def create_framebuffer(self):
+        width, height = self.size
+
+        fbo = GLuint()
+        glGenFramebuffers(1, fbo)
+        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+
+        self.texture = GLuint()
+        glGenTextures(1, self.texture)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0)
+
+        self.depth_rb = GLuint()
+        glGenRenderbuffers(1, self.depth_rb)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_rb)
+
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"Offscreen framebuffer incomplete (status {status})")
+        self.fbo = fbo
+
+    def capture(self, render):
+        # render() draws the whole frame (clears included), done here once per trial
+        self.render = render
+        if self.fbo is None:
+            return
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.size[0], self.size[1])
+        render()
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(0, 0, self.size[0], self.size[1])
+
+        # finished before the onset clock starts
+        glFinish()
+
+    def draw(self):
+        if self.fbo is None:
+            self.render()
+            return
+
+        width, height = self.size
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+        glBlitFramebuffer(0, 0, width, height, 0, 0, width, height, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
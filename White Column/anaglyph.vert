@@ -0,0 +1,32 @@
+#version 120
+
+// calculate_disparity_for_point per vertex: the eye's x shift grows with the vertex's distance from the
+// convergence distance, so the CPU only writes these uniforms per eye
+
+uniform vec3 u_camera_pos;
+uniform float u_convergence_distance;
+uniform float u_base_disparity;       // degrees
+uniform int u_force_onplane;          // distance measured to the plane point (y = 0) below the vertex
+uniform float u_pixels_per_degree;    // window width / 60
+uniform float u_eye_sign;             // -1 left eye, +1 right eye
+uniform vec3 u_color_filter;
+
+varying vec2 floor_xz;
+
+void main() {
+    vec3 world = gl_Vertex.xyz;
+
+    vec3 offset = world - u_camera_pos;
+    if (u_force_onplane != 0) {
+        offset.y = -u_camera_pos.y;
+    }
+    float distance_factor = (u_convergence_distance - length(offset)) / u_convergence_distance;
+    float disparity_pixels = (u_base_disparity + distance_factor * 0.5) * u_pixels_per_degree;
+    world.x += u_eye_sign * disparity_pixels / 2.0 * 0.01;  // to world units
+
+    // unshifted, for checkerboard.frag
+    floor_xz = gl_Vertex.xz;
+
+    gl_FrontColor = vec4(gl_Color.rgb * u_color_filter, gl_Color.a);
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(world, 1.0);
+}
@@ -0,0 +1,21 @@
+#version 120
+
+varying vec2 floor_xz;
+
+uniform float u_square_size;
+uniform vec2 u_grid_origin;   // world x / z of the centre of square (0, 0)
+uniform float u_corridor;     // grid column (along x) left transparent
+uniform int u_hide_corridor;
+
+void main() {
+    vec2 grid = floor((floor_xz - u_grid_origin) / u_square_size + 0.5);
+
+    // only the white squares are drawn, black ones and the column corridor stay transparent
+    bool is_white = mod(grid.x + grid.y, 2.0) > 0.5;
+    bool in_corridor = u_hide_corridor != 0 && abs(grid.x - u_corridor) < 0.5;
+    if (!is_white || in_corridor) {
+        discard;
+    }
+
+    gl_FragColor = gl_Color;
+}
@@ -0,0 +1,13 @@
+#version 120
+
+// legacy GLSL, the experiments set up their cameras with gluPerspective / gluLookAt
+
+varying vec2 floor_xz;
+
+void main() {
+    // the square is picked from the unshifted world x / z, the drawn position may carry an eye's shift
+    floor_xz = gl_MultiTexCoord0.xy;
+
+    gl_FrontColor = gl_Color;
+    gl_Position = gl_ModelViewProjectionMatrix * gl_Vertex;
+}